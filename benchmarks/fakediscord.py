@@ -0,0 +1,247 @@
+""" A local stand-in for Discord, for running the bot without a connection.
+
+    `FakeClient` replaces the parts of `discord.Client` that reach Discord's
+    API (sending, editing, deleting and pinning messages, and changing the
+    presence) with calls that take a configurable time, and that answer
+    with a 429 when Discord would. The other classes stand in for the
+    servers, channels, members and messages the bot works with.
+"""
+
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+
+import discord
+
+# discord.py's HTTP logger, through which 429s are reported (and counted by
+# `pomodorobot.metrics.RateLimitCounter`).
+http_log = logging.getLogger('discord.http')
+
+
+class FakeServer:
+
+    def __init__(self, server_id: str, name: str):
+        self.id = server_id
+        self.name = name
+        self.channels = []
+        self.members = []
+        self.roles = []
+
+    def get_channel(self, channel_id):
+        for channel in self.channels:
+            if channel.id == channel_id:
+                return channel
+        return None
+
+    def get_member(self, member_id):
+        for member in self.members:
+            if member.id == member_id:
+                return member
+        return None
+
+    def __str__(self):
+        return self.name
+
+
+class FakeChannel:
+
+    def __init__(self, channel_id: str, name: str, server: FakeServer):
+        self.id = channel_id
+        self.name = name
+        self.server = server
+        self.is_private = False
+        self.type = discord.ChannelType.text
+
+        server.channels.append(self)
+
+    @property
+    def mention(self):
+        return "<#{}>".format(self.id)
+
+    def __str__(self):
+        return self.name
+
+
+class FakeMember:
+
+    def __init__(self, member_id: str, name: str, server=None, bot=False):
+        self.id = member_id
+        self.name = name
+        self.discriminator = member_id[-4:].rjust(4, '0')
+        self.nick = None
+        self.display_name = name
+        self.server = server
+        self.roles = []
+        self.bot = bot
+
+        if server is not None:
+            server.members.append(self)
+
+    @property
+    def mention(self):
+        return "<@{}>".format(self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, FakeMember) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return "{}#{}".format(self.name, self.discriminator)
+
+
+class FakeMessage:
+
+    _next_id = 1
+
+    def __init__(self, channel, author, content='', embed=None):
+        self.id = str(FakeMessage._next_id)
+        FakeMessage._next_id += 1
+
+        self.channel = channel
+        self.server = getattr(channel, 'server', None)
+        self.author = author
+        self.content = content
+        self.clean_content = content
+        self.embeds = [] if embed is None else [embed]
+        self.timestamp = datetime.utcnow()
+        self.pinned = False
+        self.mentions = []
+        self.channel_mentions = []
+        self.role_mentions = []
+        self.mention_everyone = False
+
+
+class Limiter:
+    """ Keeps track of the requests made in a sliding window, to tell when
+        Discord would answer with a 429.
+    """
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self._sent = deque()
+
+    def retry_after(self, now: float) -> float:
+        """ Tells how long to wait before a request would be accepted.
+
+        :return: The time to wait, in seconds, or 0 if a request would be
+            accepted right away.
+        """
+
+        while self._sent and now - self._sent[0] >= self.per:
+            self._sent.popleft()
+
+        if len(self._sent) >= self.limit:
+            return self.per - (now - self._sent[0])
+        return 0
+
+    def record(self, now: float):
+        self._sent.append(now)
+
+
+class FakeClient(discord.Client):
+    """ A client that never connects to Discord. Mixed in after the bot's
+        class (as in `class SimBot(PomodoroBot, FakeClient)`), it sits
+        between the bot's instrumented API calls and `discord.Client`'s.
+
+        Each call takes `latency` seconds (plus up to `jitter` more) and is
+        counted by route. Calls over the per-channel (`channel_limit` per
+        `channel_per` seconds) or global (`global_limit` per second) rate
+        limits get a 429, are logged the way discord.py logs them, and are
+        retried once the limit allows it.
+    """
+
+    def __init__(self, *args, latency=0.05, jitter=0.05, channel_limit=5,
+                 channel_per=5.0, global_limit=50, seed=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.latency = latency
+        self.jitter = jitter
+        self.channel_limit = channel_limit
+        self.channel_per = channel_per
+
+        # The amount of calls made, and of 429s received, by route.
+        self.calls = {}
+        self.rate_limited = {}
+        # The functions called with (destination, content, time) whenever a
+        # message is sent.
+        self.on_send = []
+
+        self._random = random.Random(seed)
+        self._channel_limiters = {}
+        self._global_limiter = Limiter(global_limit, 1.0)
+        self._sim_closed = False
+
+        self.connection.user = FakeMember('1', 'PomodoroBot', bot=True)
+
+    @property
+    def is_closed(self):
+        return self._sim_closed
+
+    def close_simulation(self):
+        self._sim_closed = True
+
+    async def wait_until_ready(self):
+        pass
+
+    async def _request(self, route: str, destination):
+        self.calls[route] = self.calls.get(route, 0) + 1
+
+        key = getattr(destination, 'id', None)
+        limiter = self._channel_limiters.get(key)
+        if limiter is None:
+            limiter = self._channel_limiters[key] = \
+                Limiter(self.channel_limit, self.channel_per)
+
+        while True:
+            now = time.monotonic()
+            retry_after = max(self._global_limiter.retry_after(now),
+                              limiter.retry_after(now))
+            if retry_after == 0:
+                self._global_limiter.record(now)
+                limiter.record(now)
+                break
+
+            self.rate_limited[route] = self.rate_limited.get(route, 0) + 1
+            http_log.info('We are being rate limited. Retrying in {:.2} '
+                          'seconds. Handled under the bucket "{}"'
+                          .format(retry_after, route))
+            await asyncio.sleep(retry_after)
+
+        await asyncio.sleep(self.latency +
+                            self._random.random() * self.jitter)
+
+    async def send_message(self, destination, content=None, *, tts=False,
+                           embed=None):
+        await self._request('send_message', destination)
+
+        message = FakeMessage(destination, self.user,
+                              '' if content is None else str(content), embed)
+        now = time.perf_counter()
+        for listener in self.on_send:
+            listener(destination, message.content, now)
+        return message
+
+    async def edit_message(self, message, new_content=None, *, embed=None):
+        await self._request('edit_message', message.channel)
+
+        if new_content is not None:
+            message.content = message.clean_content = str(new_content)
+        if embed is not None:
+            message.embeds = [embed]
+        return message
+
+    async def delete_message(self, message):
+        await self._request('delete_message', message.channel)
+
+    async def pin_message(self, message):
+        await self._request('pin_message', message.channel)
+        message.pinned = True
+
+    async def change_presence(self, *, game=None, status=None, afk=False):
+        await self._request('change_presence', None)
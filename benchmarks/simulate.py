@@ -0,0 +1,396 @@
+""" Simulates a load on the bot, offline, and reports how it coped.
+
+    N channels (spread over servers) each get a timer, M subscribers, and K
+    commands or chat messages per minute, for a given time, against
+    `FakeClient`'s stand-in for Discord. The results (tick drift, API calls
+    and 429s by route, the time period changes take to reach every
+    subscriber, command latency, CPU and memory) are printed as JSON, and
+    can be written to a file to compare runs.
+
+    Run from the repository's root, e.g.:
+        python -m benchmarks.simulate --channels 50 --subscribers 10 \\
+            --commands 6 --duration 120 --speed 60 --output results.json
+
+    By default, the speed compresses the periods' lengths: with a speed of
+    60, a 25-minute period lasts 25 seconds. Timers still tick every
+    `--step` seconds, so the load on Discord's API is that of real timers.
+    With `--clock simulated`, the periods keep their length and the timers
+    run on a `SimulatedClock` going that many times faster instead, ticks
+    included, to go through long sessions (inactivity expiry, period
+    rollovers) quickly.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+import yaml
+
+import pomodorobot.config as config
+import pomodorobot.dbmanager as dbmanager
+import pomodorobot.lib as lib
+import pomodorobot.metrics as metrics
+
+from pomodorobot.bot import PomodoroBot
+from pomodorobot.core.clock import SimulatedClock
+from pomodorobot.core.eventbus import bus
+from pomodorobot.timer import TimerPeriodEvent
+
+from benchmarks.fakediscord import FakeClient, FakeServer, FakeChannel, \
+    FakeMember, FakeMessage
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# The periods each timer is set up with, in minutes (before the speed-up).
+PERIODS = (('Study', 25), ('Break', 5))
+# The channels per simulated server.
+CHANNELS_PER_SERVER = 10
+# What the simulated users send, with how likely each one is.
+TRAFFIC = (('!timer status', 3), ('!timer time', 3),
+           ("Hey, how's it going?", 3), ('resub', 1))
+
+
+class SimBot(PomodoroBot, FakeClient):
+    """ The bot, talking to the stand-in for Discord.
+    """
+    pass
+
+
+class Simulation:
+    """ Sets up the bot, the servers, channels and users, and drives the
+        traffic, collecting what's needed for the report.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+
+        self.bot = None
+        # The simulated channels, by ID, as (channel, owner, subscribers).
+        self.channels = {}
+
+        # The period changes not yet announced to every subscriber, by
+        # channel ID, as (time of the change, IDs of the members left).
+        self._fan_outs = {}
+        # The time announcing each period change to every subscriber took.
+        self.fan_out = metrics.Histogram(
+            'fan_out_seconds', "", buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0,
+                                            2.5, 5.0, 10.0, 30.0, 60.0))
+
+    def setup(self, workdir: str):
+        """ Prepares the configuration, database and bot, and the servers,
+            channels and members they'll see.
+
+        :param workdir: A directory for the files of the run.
+        """
+
+        channels = {}
+        for i in range(self.args.channels):
+            server_id = str(1000 + i // CHANNELS_PER_SERVER)
+            channels.setdefault(server_id, {})[str(100000 + i)] = \
+                'channel-{}'.format(i)
+
+        with open('bot.yml', 'r') as file:
+            cfg = yaml.safe_load(file)
+
+        cfg['startup_broadcast']['enabled'] = False
+        cfg['metrics']['serve'] = False
+        cfg['journal']['enabled'] = False
+        cfg['timer']['time_step'] = self.args.step
+        cfg['timer']['engine'] = self.args.engine
+        cfg['timer']['channel_whitelist'] = channels
+        cfg['bot']['bot_admin_id'] = '2'
+
+        path = os.path.join(workdir, 'bot.yml')
+        with open(path, 'w') as file:
+            yaml.safe_dump(cfg, file)
+        config.load(path)
+
+        lib.init_logger(self.args.log_file or
+                        os.path.join(workdir, 'simulation.log'), echo=False)
+        logging.getLogger().setLevel(self.args.log_level)
+        # The 429s are logged at the info level, and must reach the bot's
+        # counter whatever the level of the log.
+        http_log = logging.getLogger('discord.http')
+        http_log.setLevel(logging.INFO)
+        http_log.propagate = False
+
+        dbmanager.DB_URL = 'sqlite:///' + os.path.join(workdir, 'sim.db')
+
+        clock = SimulatedClock(self.args.speed) \
+            if self.args.clock == 'simulated' else None
+
+        self.bot = SimBot(command_prefix='!', pm_help=True, clock=clock,
+                          latency=self.args.latency, jitter=self.args.jitter,
+                          channel_limit=self.args.channel_limit,
+                          channel_per=self.args.channel_per,
+                          global_limit=self.args.global_limit,
+                          seed=self.args.seed)
+        self.bot.reload_config(config.get_config())
+        self.bot.load_extension('pomodorobot.ext.timercommands')
+        self.bot.load_extension('pomodorobot.ext.events')
+
+        member_id = 10000000
+        for server_id, server_channels in channels.items():
+            server = FakeServer(server_id, 'server-' + server_id)
+            owner = FakeMember('2', 'Owner', server)
+
+            for channel_id, name in server_channels.items():
+                members = []
+                for _ in range(self.args.subscribers):
+                    member_id += 1
+                    members.append(FakeMember(
+                        str(member_id), 'user-{}'.format(member_id), server))
+
+                self.channels[channel_id] = \
+                    (FakeChannel(channel_id, name, server), owner, members)
+
+        bus.subscribe(TimerPeriodEvent, self._on_period)
+        self.bot.on_send.append(self._on_send)
+
+    def _on_period(self, e: TimerPeriodEvent):
+        channel_id = e.timer.get_channel_id()
+        members = set(member.id for member in e.timer.get_users_subscribed())
+        if members:
+            self._fan_outs[channel_id] = (time.perf_counter(), members)
+
+    def _on_send(self, destination, content: str, now: float):
+        if not isinstance(destination, FakeMember) or \
+                'period' not in content:
+            return
+
+        for channel_id, (started, members) in list(self._fan_outs.items()):
+            if destination.id in members:
+                members.discard(destination.id)
+                if not members:
+                    del self._fan_outs[channel_id]
+                    self.fan_out.observe(now - started)
+                break
+
+    def say(self, channel, author, content: str):
+        """ Makes a member send a message to a channel.
+        """
+
+        self.bot.dispatch('message', FakeMessage(channel, author, content))
+
+    async def run(self):
+        """ Sets the timers up, then sends the traffic for the duration of
+            the simulation.
+        """
+
+        await self.bot.start_metrics()
+
+        compression = self.args.speed \
+            if self.args.clock == 'compressed' else 1
+        periods = ','.join('{}:{}'.format(name, round(length / compression,
+                                                      4))
+                           for name, length in PERIODS)
+
+        for channel, owner, _ in self.channels.values():
+            self.say(channel, owner, '!timer setup {} on'.format(periods))
+        await asyncio.sleep(1)
+
+        for channel, owner, members in self.channels.values():
+            for member in members:
+                self.say(channel, member, '!timer sub')
+            self.say(channel, owner, '!timer start')
+            await asyncio.sleep(self.args.ramp / max(1, self.args.channels))
+
+        deadline = time.monotonic() + self.args.duration
+        await asyncio.gather(*(self._traffic(channel, members, deadline)
+                               for channel, _, members in
+                               self.channels.values()))
+
+    async def _traffic(self, channel, members, deadline):
+        if self.args.commands <= 0 or not members:
+            await asyncio.sleep(max(0, deadline - time.monotonic()))
+            return
+
+        population = [content for content, weight in TRAFFIC
+                      for _ in range(weight)]
+        while True:
+            wait = self.random.expovariate(self.args.commands / 60)
+            if time.monotonic() + wait >= deadline:
+                await asyncio.sleep(max(0, deadline - time.monotonic()))
+                return
+            await asyncio.sleep(wait)
+
+            member = self.random.choice(members)
+            content = self.random.choice(population)
+            if content == 'resub':
+                self.say(channel, member, '!timer unsub')
+                self.say(channel, member, '!timer sub')
+            else:
+                self.say(channel, member, content)
+
+    async def stop(self):
+        self.bot.close_simulation()
+
+        current = _current_task()
+        pending = [task for task in _all_tasks() if task is not current]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def report(self, wall: float, cpu: float) -> dict:
+        """ Sums up the simulation.
+
+        :param wall: The time the simulation took, in seconds.
+        :param cpu: The CPU time the process used during it, in seconds.
+
+        :return: The results, ready to be dumped as JSON.
+        """
+
+        calls = dict(self.bot.calls)
+        commands = {command: metrics.COMMAND_LATENCY.summary((command,))
+                    for (command,) in metrics.COMMAND_LATENCY.keys()}
+
+        return {
+            'time': datetime.utcnow().isoformat() + 'Z',
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'parameters': vars(self.args),
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'cpu_percent': 100 * cpu / wall if wall > 0 else None,
+            'max_rss_mb': _max_rss_mb(),
+            'api_calls': calls,
+            'api_calls_total': sum(calls.values()),
+            'api_calls_per_second': sum(calls.values()) / wall,
+            'rate_limited': dict(self.bot.rate_limited),
+            'rate_limited_total': int(metrics.RATE_LIMITED.total()),
+            'tick_drift': metrics.TICK_DRIFT.summary(),
+            'loop_lag': metrics.LOOP_LAG.summary(),
+            'fan_out': self.fan_out.summary(),
+            'fan_outs_unfinished': len(self._fan_outs),
+            'db_commit': metrics.DB_COMMIT.summary(),
+            'commands': commands
+        }
+
+
+def _current_task():
+    try:
+        return asyncio.current_task()
+    except AttributeError:
+        # Before Python 3.7
+        return asyncio.Task.current_task()
+
+
+def _all_tasks():
+    try:
+        return asyncio.all_tasks()
+    except AttributeError:
+        # Before Python 3.7
+        return asyncio.Task.all_tasks()
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simulates a load on the bot against a stand-in for "
+                    "Discord.")
+    parser.add_argument('--channels', type=int, default=20,
+                        help="the amount of channels with a timer (N)")
+    parser.add_argument('--subscribers', type=int, default=5,
+                        help="the subscribers per timer (M)")
+    parser.add_argument('--commands', type=float, default=4,
+                        help="the messages per minute in each channel (K)")
+    parser.add_argument('--duration', type=float, default=60,
+                        help="the time to run the traffic for, in seconds")
+    parser.add_argument('--speed', type=float, default=60,
+                        help="how many times faster the timers go")
+    parser.add_argument('--clock', choices=('compressed', 'simulated'),
+                        default='compressed',
+                        help="whether the speed shortens the periods, or "
+                             "makes the timers' clock go faster")
+    parser.add_argument('--step', type=int, default=2,
+                        help="the timers' step, in seconds")
+    parser.add_argument('--ramp', type=float, default=5,
+                        help="the time over which the timers are started, "
+                             "in seconds")
+    parser.add_argument('--engine', choices=('local', 'process'),
+                        default='local', help="where the timers run")
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="the time each API call takes, in seconds")
+    parser.add_argument('--jitter', type=float, default=0.05,
+                        help="the extra time API calls can take, in seconds")
+    parser.add_argument('--channel-limit', type=int, default=5,
+                        help="the API calls allowed per channel and window")
+    parser.add_argument('--channel-per', type=float, default=5.0,
+                        help="the length of the per-channel window, in "
+                             "seconds")
+    parser.add_argument('--global-limit', type=int, default=50,
+                        help="the API calls allowed per second overall")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="the seed for the traffic and the latencies")
+    parser.add_argument('--log-level', default='WARNING',
+                        help="the level of the simulation's log")
+    parser.add_argument('--log-file',
+                        help="the file to write the simulation's log to")
+    parser.add_argument('--output', help="the file to write the results to")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    with tempfile.TemporaryDirectory(prefix='pomodorobot-sim-') as workdir:
+        simulation = Simulation(args)
+        simulation.setup(workdir)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            loop.run_until_complete(simulation.run())
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            loop.run_until_complete(simulation.stop())
+            if simulation.bot.engine is not None:
+                simulation.bot.engine.stop()
+            lib.stop_logger()
+            dbmanager.dispose()
+
+        results = simulation.report(wall, cpu)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    print(text)
+    return results
+
+
+if __name__ == '__main__':
+    main()
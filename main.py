@@ -1,54 +1,150 @@
+import time
+BOOT = time.perf_counter()  # Taken before the heavier imports below
+
+import os
 import sys
 import io
+from functools import partial
 
 import pomodorobot.config as config
+import pomodorobot.dbmanager as dbmanager
+import pomodorobot.journal as journal
 import pomodorobot.lib as lib
 
 from pomodorobot.dbmanager import db_manager
 from pomodorobot.bot import PomodoroBot
 
 
-USAGE = sys.argv[0] + " <token>"
+USAGE = sys.argv[0] + " <token> [shards]"
 DESCRIPTION = '''A marinara timer bot that can be configured to your needs.'''
 
-bot = PomodoroBot(
-    command_prefix='!',
-    description=DESCRIPTION,
-    timer_step=2,
-    response_lifespan=15,
-    pm_help=True
-)
+# The extensions that can be loaded on first use (see `bot.lazy_extensions`),
+# with the commands that trigger their loading.
+LAZY_EXTENSIONS = {
+    'pomodorobot.ext.other': ['aboot', 'about', 'howto', 'why', 'howcome',
+                              'no', 'faint', 'potato', 'fine', 'whale',
+                              'skillz'],
+    'pomodorobot.ext.admin': ['admin'],
+    'pomodorobot.ext.registry': ['registry']
+}
 
-if __name__ == '__main__':
 
-    TOKEN = ""
-    if len(sys.argv) < 2:
-        print("Not enough arguments received!\nUsage: " + sys.argv[0] +
-              " <token>")
-        exit(-1)
+def start(token: str, shard_id=None, shard_count=None):
+    """ Sets up and runs the bot, either on its own or as one of several
+        shards.
 
-    elif len(sys.argv) == 2:
-        TOKEN = sys.argv[1]
+    :param token: The bot's token.
+    :param shard_id: The ID of the shard to run, or None if not sharded.
+    :param shard_count: The amount of shards, or None if not sharded.
+    """
 
-    else:
-        exit(-2)
+    sharded = shard_id is not None
+
+    # The time each startup phase took, in order.
+    phases = [('imports', time.perf_counter() - BOOT)]
+    phase_start = time.perf_counter()
+
+    def phase(name: str):
+        nonlocal phase_start
+        now = time.perf_counter()
+        phases.append((name, now - phase_start))
+        phase_start = now
 
     # Config
     config.load('bot.yml')
+    phase('config')
 
     # Logging
     sys.stdout = sys.__stdout__ = io.TextIOWrapper(sys.stdout.detach(),
                                                    encoding='utf8',
                                                    errors='backslashreplace',
                                                    line_buffering=True)
-    lib.init_logger()
+    log_cfg = config.get_config().get_section('logging')
+    lib.init_logger('pomodorobot-shard{}.log'.format(shard_id) if sharded
+                    else 'pomodorobot.log',
+                    json_lines=log_cfg['json_lines'],
+                    max_bytes=log_cfg['max_bytes'],
+                    backup_count=log_cfg['backup_count'])
+    phase('logging')
+
+    # Journal
+    if config.get_config().get_boolean('journal.enabled'):
+        directory = config.get_config().get_str('journal.directory')
+        if sharded:
+            directory = os.path.join(directory, 'shard-' + str(shard_id))
+
+        journal.start(directory,
+                      config.get_config().get_int('journal.segment_records'))
+        phase('journal')
 
     # Bot init
+    bot = PomodoroBot(
+        command_prefix='!',
+        description=DESCRIPTION,
+        timer_step=2,
+        response_lifespan=15,
+        pm_help=True,
+        shard_id=shard_id,
+        shard_count=shard_count
+    )
+    bot.boot_time = BOOT
+
+    if sharded:
+        # Connections inherited from the launcher must not be shared.
+        dbmanager.dispose()
+        # Leftovers from a previous run of this shard
+        db_manager.clear_timer_snapshots(shard_id)
+
     bot.reload_config(config.get_config())
+    phase('bot')
+
     bot.load_extension('pomodorobot.ext.timercommands')
     bot.load_extension('pomodorobot.ext.events')
-    bot.load_extension('pomodorobot.ext.other')
-    bot.load_extension('pomodorobot.ext.admin')
-    bot.load_extension('pomodorobot.ext.registry')
+    if config.get_config().get_boolean('bot.lazy_extensions'):
+        for name, command_names in LAZY_EXTENSIONS.items():
+            bot.defer_extension(name, command_names)
+    else:
+        for name in LAZY_EXTENSIONS.keys():
+            bot.load_extension(name)
+    phase('extensions')
 
-    bot.run(TOKEN)
+    lib.log("Startup took {:.3f}s before connecting ({})."
+            .format(time.perf_counter() - BOOT,
+                    ", ".join("{}: {:.3f}s".format(name, duration)
+                              for name, duration in phases)))
+
+    try:
+        bot.run(token)
+    finally:
+        if bot.engine is not None:
+            bot.engine.stop()
+        journal.stop()
+        lib.stop_logger()
+
+
+if __name__ == '__main__':
+
+    TOKEN = ""
+    SHARDS = 1
+    if len(sys.argv) < 2:
+        print("Not enough arguments received!\nUsage: " + USAGE)
+        exit(-1)
+
+    elif len(sys.argv) <= 3:
+        TOKEN = sys.argv[1]
+        if len(sys.argv) == 3:
+            try:
+                SHARDS = int(sys.argv[2])
+            except ValueError:
+                print("The amount of shards must be a number.\nUsage: " +
+                      USAGE)
+                exit(-1)
+
+    else:
+        exit(-2)
+
+    if SHARDS > 1:
+        import pomodorobot.launcher as launcher
+        launcher.run(partial(start, TOKEN), SHARDS)
+    else:
+        start(TOKEN)
@@ -1,18 +1,31 @@
+import time
 import asyncio
 import logging
 from datetime import datetime
 
+import yaml
 import discord
 
 from discord import errors as d_err
 from discord.enums import Status
 from discord.ext import commands
 
+import pomodorobot.engine as engine
+import pomodorobot.journal as journal
 import pomodorobot.lib as lib
+import pomodorobot.metrics as metrics
 
 from pomodorobot.config import Config
-from pomodorobot.timer import Action, State
-from pomodorobot.channeltimerinterface import ChannelTimerInterface
+from pomodorobot.core.clock import system_clock
+from pomodorobot.core.eventbus import bus
+from pomodorobot.core.index import TimerIndex
+from pomodorobot.dbmanager import db_manager
+from pomodorobot.tasks import supervisor
+from pomodorobot.timer import Action, State, TimerStateEvent
+from pomodorobot.tracing import tracer
+from pomodorobot.watchdog import watchdog
+from pomodorobot.interfaces import InterfaceRegistry
+from pomodorobot.runtime import TimerRuntime
 
 
 class PomodoroBot(commands.Bot):
@@ -26,9 +39,14 @@ class PomodoroBot(commands.Bot):
         super().__init__(command_prefix, formatter,
                          description, pm_help, **options)
 
-        # The timers currently running. There can be one per channel.
-        # (Indexed by the channel's ID)
-        self._interfaces = {}
+        # The clock timers run by. See `pomodorobot.core.clock`.
+        self.clock = options.get('clock') or system_clock
+
+        # The interfaces of the channels with timers (or that had them, or
+        # that have settings). There can be one per channel.
+        self.interfaces = InterfaceRegistry(clock=self.clock)
+        # The drivers making the timers run.
+        self.runtime = TimerRuntime(self)
 
         # The channels for each server that will be used to display certain
         # log info
@@ -40,8 +58,18 @@ class PomodoroBot(commands.Bot):
         #   directory: Where new members introduce themselves
         self.welcome_channels = {}
 
-        # The amount of timers running.
-        self.timers_running = 0
+        # The timers, indexed by state, kept up to date through timer state
+        # events.
+        self.timers = TimerIndex()
+        bus.subscribe(TimerStateEvent, self._on_timer_state)
+
+        # The minimum time, in seconds, between two presence updates
+        # (value is configurable).
+        self.presence_interval = 15
+        # The amount of timers the presence last showed, and when it did.
+        self._presence_shown = None
+        self._presence_at = None
+
         # The amount of time timers are allowed to have no subs for
         # (value is configurable).
         self.timer_inactivity_allowed = 30
@@ -49,6 +77,12 @@ class PomodoroBot(commands.Bot):
         # automatically un-subscribed (value is configurable).
         self.user_inactivity_allowed = 60
 
+        # Where timers run: 'local' (in this process' event loop) or
+        # 'process' (in the timer engine's process, see `engine`).
+        self.engine_mode = 'local'
+        # The client of the timer engine, if it has been started.
+        self.engine = None
+
         # The time after which most command responses get deleted
         self.ans_lifespan = 15
 
@@ -61,9 +95,121 @@ class PomodoroBot(commands.Bot):
 
         self.ans_lifespan = response_lifespan
 
+        # The shard this bot runs, and the amount of shards, or None if it
+        # runs on its own. See `pomodorobot.launcher`.
+        self.shard_id = options.get('shard_id')
+        self.shard_count = options.get('shard_count')
+        # The time, in seconds, between snapshots of this shard's timers.
+        self.snapshot_interval = 10
+
+        # The time, in seconds, the shutdown drain is allowed to take.
+        self.shutdown_deadline = 30
+        # The amount of channels torn down at once when shutting down, and the
+        # time each teardown waits after it's done, to stay within the
+        # rate limits.
+        self.shutdown_concurrency = 4
+        self.shutdown_interval = 0.25
+        # The file the timers' state is written to when shutting down.
+        self.state_file = "shutdown_state.yml"
+        # The time, in seconds, background tasks are given to end when
+        # shutting down.
+        self.tasks_shutdown_timeout = 5
+
+        # The background task groups that only ever run one task, and drop
+        # the others.
+        for name in ('snapshots', 'broadcast'):
+            supervisor.configure(name, limit=1, max_queued=0)
+        # The presence task can be about to end, having seen no change, when
+        # the amount of timers running changes: one more waits its turn to
+        # pick the change up.
+        supervisor.configure('presence', limit=1, max_queued=1)
+
+        # Whether the metrics are served over HTTP, and where.
+        self.metrics_serve = False
+        self.metrics_host = '127.0.0.1'
+        self.metrics_port = 9464
+        # The metrics server, once started.
+        self._metrics_server = None
+        # Whether the rate limit counter was set up.
+        self._counting_rate_limits = False
+
+        metrics.ACTIVE_TIMERS.set_function(
+            lambda: {state.name.lower(): self.timers.count(state)
+                     for state in State})
+        metrics.SUBSCRIBERS.set_function(
+            lambda: sum(len(i.subbed) for i in self.interfaces.values()))
+        metrics.QUEUE_DEPTH.set_function(self._queue_depths)
+        bus.on_handled = lambda listener, latency: \
+            metrics.BUS_LATENCY.observe(latency, listener=listener)
+        bus.on_dropped = lambda listener: \
+            metrics.BUS_DROPPED.inc(listener=listener)
+
+        # The extensions whose loading was deferred until first use, with the
+        # names of the commands standing in for them. See `defer_extension`.
+        self._deferred = {}
+        # The time (as given by `time.perf_counter`) at which the bot's
+        # process started, to log how long it took to be ready.
+        self.boot_time = None
+
         # So people can still see commands in help.
         self.formatter.show_check_failure = True
 
+    def defer_extension(self, name: str, command_names):
+        """ Registers an extension to be loaded the first time one of its
+            commands is used (or help is asked for), instead of right away.
+
+        :param name: The extension's module name.
+        :type name: str
+
+        :param command_names: The names (and aliases) of the extension's
+            top-level commands.
+        """
+
+        self._deferred[name] = list(command_names)
+
+        async def stand_in(ctx: commands.Context, *_):
+            self.load_deferred(name)
+            await self.process_commands(ctx.message)
+
+        for command_name in command_names:
+            self.add_command(commands.Command(command_name, stand_in,
+                                              pass_context=True, hidden=True))
+
+        help_command = self.commands.get('help')
+        if help_command is not None and \
+                self._load_all_deferred not in help_command.checks:
+            help_command.checks.append(self._load_all_deferred)
+
+    def load_deferred(self, name: str):
+        """ Loads an extension whose loading was deferred, replacing the
+            commands that stood in for it.
+
+        :param name: The extension's module name.
+        :type name: str
+        """
+
+        command_names = self._deferred.pop(name, None)
+        if command_names is None:
+            return
+
+        started = time.perf_counter()
+
+        for command_name in command_names:
+            self.remove_command(command_name)
+        self.load_extension(name)
+
+        lib.log("Loaded deferred extension {} in {:.3f}s."
+                .format(name, time.perf_counter() - started))
+
+    def _load_all_deferred(self, *_) -> bool:
+        """ Loads every deferred extension. Used as a check on the help command,
+            so it can list their commands.
+        """
+
+        for name in list(self._deferred.keys()):
+            self.load_deferred(name)
+        return True
+
     def get_interface(self, channel: discord.Channel, generate=True):
         """ Retrieves a channel interface. If none found for the channel, a new
             one is created with its default values (if generate is True).
@@ -78,11 +224,7 @@ class PomodoroBot(commands.Bot):
         :return: The interface belonging to the channel, new or old.
         """
 
-        if channel not in self._interfaces:
-            if not generate:
-                return None
-            self._interfaces[channel] = ChannelTimerInterface(channel)
-        return self._interfaces[channel]
+        return self.interfaces.get(channel, generate)
 
     def reload_config(self, cfg: Config):
         """ Reloads the configurable values within the bot.
@@ -109,9 +251,102 @@ class PomodoroBot(commands.Bot):
         self.user_inactivity_allowed = cfg.get_int(
             'timer.user_inactivity_allowed')
 
+        self.engine_mode = cfg.get_str('timer.engine')
+
+        self.presence_interval = cfg.get_int('bot.presence_interval')
+
+        self.snapshot_interval = cfg.get_int('sharding.snapshot_interval')
+
+        self.interfaces.max_idle = cfg.get_int('interfaces.max_idle')
+        self.interfaces.sweep_interval = cfg.get_int(
+            'interfaces.sweep_interval')
+
+        self.shutdown_deadline = cfg.get_int('shutdown.deadline')
+        self.shutdown_concurrency = cfg.get_int('shutdown.concurrency')
+        self.shutdown_interval = float(cfg.get_element('shutdown.interval'))
+        self.state_file = cfg.get_str('shutdown.state_file')
+
+        max_queued = cfg.get_int('tasks.max_queued')
+        supervisor.configure('delete', cfg.get_int('tasks.delete_concurrency'),
+                             max_queued)
+        supervisor.configure('notify', cfg.get_int('tasks.notify_concurrency'),
+                             max_queued)
+        self.tasks_shutdown_timeout = cfg.get_int('tasks.shutdown_timeout')
+
+        self.metrics_serve = cfg.get_boolean('metrics.serve')
+        self.metrics_host = cfg.get_str('metrics.host')
+        self.metrics_port = cfg.get_int('metrics.port')
+
+        watchdog.interval = float(cfg.get_element('metrics.lag_interval'))
+        watchdog.warn_threshold = float(
+            cfg.get_element('watchdog.warn_threshold'))
+        watchdog.stall_threshold = float(
+            cfg.get_element('watchdog.stall_threshold'))
+        watchdog.warn_log_interval = cfg.get_int('watchdog.warn_log_interval')
+
+        tracer.slow_threshold = float(
+            cfg.get_element('tracing.slow_threshold'))
+        tracer.slow_log_interval = cfg.get_int('tracing.slow_log_interval')
+
         for channel, timer in self.valid_timers().items():
             timer.step = cfg.get_int('timer.time_step')
 
+    async def process_commands(self, message):
+        """ Handles the command in a message, if any, tracing the time spent
+            in each stage of handling it. See `pomodorobot.tracing`.
+        """
+
+        with tracer.trace():
+            await super().process_commands(message)
+
+    def can_run(self, ctx: commands.Context) -> bool:
+        tracer.name(ctx.command.qualified_name)
+        return super().can_run(ctx)
+
+    async def _discord_call(self, route: str, coro):
+        """ Awaits a call to Discord's API, recording how long it took and
+            whether it failed.
+
+        :param route: The name the call is recorded under.
+        :param coro: The call's coroutine.
+
+        :return: What the call returned.
+        """
+
+        started = time.perf_counter()
+        try:
+            with tracer.span('send', route):
+                return await coro
+        except d_err.HTTPException as err:
+            metrics.DISCORD_ERRORS.inc(
+                route=route, status=getattr(err.response, 'status', '?'))
+            raise
+        finally:
+            metrics.DISCORD_LATENCY.observe(time.perf_counter() - started,
+                                            route=route)
+
+    async def send_message(self, destination, content=None, **kwargs):
+        return await self._discord_call(
+            'send_message',
+            super().send_message(destination, content, **kwargs))
+
+    async def edit_message(self, message, new_content=None, **kwargs):
+        return await self._discord_call(
+            'edit_message',
+            super().edit_message(message, new_content, **kwargs))
+
+    async def delete_message(self, message):
+        return await self._discord_call('delete_message',
+                                        super().delete_message(message))
+
+    async def pin_message(self, message):
+        return await self._discord_call('pin_message',
+                                        super().pin_message(message))
+
+    async def change_presence(self, **kwargs):
+        return await self._discord_call('change_presence',
+                                        super().change_presence(**kwargs))
+
     @asyncio.coroutine
     async def safe_send(self, dest, content: str, **kwargs):
         """ Sends a message and then deletes it after a certain time has passed.
@@ -127,12 +362,35 @@ class PomodoroBot(commands.Bot):
             content, tts=tts)
 
         if message and delete_after > 0:
-            @asyncio.coroutine
-            def delete():
-                yield from asyncio.sleep(delete_after)
-                yield from self.delete_message(message)
+            self.delete_later(message, delete_after)
+
+    async def _augmented_msg(self, coro, **kwargs):
+        # Deletes the messages sent with `say` and the like through
+        # `delete_later`, rather than discord.py's own untracked tasks.
+        message = await coro
+        delete_after = kwargs.get('delete_after')
+        if message and delete_after is not None:
+            self.delete_later(message, delete_after)
+        return message
 
-            asyncio.ensure_future(delete(), loop=self.loop)
+    def delete_later(self, message: discord.Message, delay):
+        """ Deletes a message after some time, as a background task of the
+            'delete' group (see `pomodorobot.tasks`).
+
+        :param message: The message to delete.
+        :type message: discord.Message
+
+        :param delay: The time to wait before deleting it, in seconds.
+        """
+
+        async def delete():
+            try:
+                await self.delete_message(message)
+            except d_err.NotFound:
+                # Deleted already
+                pass
+
+        supervisor.spawn('delete', delete(), delay=delay, loop=self.loop)
 
     def is_admin(self, member: discord.Member) -> bool:
         """ Checks if a member is the administrator of the bot or not.
@@ -168,7 +426,8 @@ class PomodoroBot(commands.Bot):
         :return: True if the channel is locked, false otherwise.
         """
 
-        return self.get_interface(channel).locked
+        interface = self.interfaces.peek(channel)
+        return interface is not None and interface.locked
 
     def spoof(self, member: discord.Member, channel: discord.Channel):
         """ Spoofs a channel ID if there's a set channel to spoof from
@@ -186,25 +445,73 @@ class PomodoroBot(commands.Bot):
             as channel_id
         """
 
-        if self.has_permission(member) and self.get_interface(channel).spoofed\
-                is not None:
-            return self._interfaces[channel].spoofed
+        interface = self.interfaces.peek(channel)
+        if interface is not None and interface.spoofed is not None and \
+                self.has_permission(member):
+            return interface.spoofed
         return channel
 
-    async def update_status(self):
-        """ Updates the status of the bot user to display the amount of
-            timers running, if any, or show the bot as idle if none are.
+    def update_status(self, force=False):
+        """ Asks for the status of the bot user to be updated to display the
+            amount of timers running, if any, or show the bot as idle if none
+            are. Updates are coalesced: at most one is sent every
+            `presence_interval` seconds, showing the latest amount.
+
+        :param force: Whether the status should be sent even if it didn't
+            change (e.g. after reconnecting).
+        :type force: bool
         """
 
-        if self.timers_running == 0:
-            await self.change_presence(game=None, status=Status.idle)
+        if force:
+            self._presence_shown = None
 
-        else:
-            game = discord.Game()
-            channels = lib.pluralize(self.timers_running, "channel", append="s")
-            game.name = ("on " + channels)
+        # A single task pushes the updates, one already running picks the
+        # latest amount up. One waiting its turn covers the changes the
+        # running one could have missed while ending.
+        supervisor.spawn('presence', self._push_status(), loop=self.loop)
 
-            await self.change_presence(game=game, status=Status.online)
+    async def _push_status(self):
+        await self.wait_until_ready()
+
+        while not self.is_closed:
+            if self._presence_at is not None:
+                wait = self._presence_at + self.presence_interval - \
+                    time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            running = self.timers.count(State.RUNNING)
+            if running == self._presence_shown:
+                return
+
+            self._presence_shown = running
+            self._presence_at = time.monotonic()
+
+            try:
+                if running == 0:
+                    await self.change_presence(game=None, status=Status.idle)
+                else:
+                    game = discord.Game()
+                    game.name = "on " + lib.pluralize(running, "channel",
+                                                      append="s")
+                    await self.change_presence(game=game,
+                                               status=Status.online)
+            except d_err.HTTPException as err:
+                lib.log("Could not update the status: {}".format(err),
+                        level=logging.WARN)
+
+    def _on_timer_state(self, e: TimerStateEvent):
+        """ Keeps the timer index up to date, and asks for the status to be
+            updated when the amount of timers running changes.
+
+        :param e: The timer's state change.
+        """
+
+        running = self.timers.count(State.RUNNING)
+        self.timers.update(e)
+
+        if self.timers.count(State.RUNNING) != running:
+            self.update_status()
 
     async def _generate_messages(self, channel: discord.Channel):
         """ Generates and pins the messages for the given channel.
@@ -240,7 +547,10 @@ class PomodoroBot(commands.Bot):
         :type channel: discord.Channel
         """
 
-        interface = self.get_interface(channel)
+        interface = self.get_interface(channel, generate=False)
+        if interface is None:
+            return
+
         try:
             if interface.time_message is not None:
                 await self.delete_message(interface.time_message)
@@ -254,15 +564,150 @@ class PomodoroBot(commands.Bot):
         interface.time_message = None
         interface.list_message = None
 
-    def valid_timers(self):
-        """ Gives a list of all instantiated timers and the channels they
-            belong to.
+    def valid_timers(self, *states):
+        """ Gives the timers that are set up, and the channels they belong to.
+
+        :param states: The states of the timers to give. If none are given,
+            gives all of them.
 
-        :return: The list of (channel, timer) pairs.
+        :return: A dictionary of timers, by channel.
         """
 
-        return dict((c, i.timer) for c, i in self._interfaces.items() if
-                    i.timer is not None)
+        if lib.is_logger_debug():
+            self.check_timers()
+
+        return dict((timer.get_channel(), timer)
+                    for timer in self.timers.timers(*states))
+
+    def check_timers(self) -> bool:
+        """ Checks the timer index against the timers the interfaces actually
+            have, logging any difference.
+
+        :return: True if the index is right, False otherwise.
+        """
+
+        consistent = True
+        for interface in self.interfaces.values():
+            timer = interface.timer
+            if timer is None or timer.get_state() is None:
+                continue
+
+            found = self.timers.find(interface.channel.id)
+            if found is None or found != (timer.get_state(), timer):
+                lib.log("Timer index out of date: has {} instead of {}."
+                        .format("nothing" if found is None else
+                                State.to_string(found[0]),
+                                State.to_string(timer.get_state())),
+                        channel_id=interface.channel.id, level=logging.WARN)
+                consistent = False
+
+        indexed = len(self.timers)
+        actual = sum(1 for interface in self.interfaces.values()
+                     if interface.timer is not None and
+                     interface.timer.get_state() is not None)
+        if indexed != actual:
+            lib.log("Timer index out of date: has {} timers instead of {}."
+                    .format(indexed, actual), level=logging.WARN)
+            consistent = False
+
+        return consistent
+
+    def is_sharded(self) -> bool:
+        """ Tells whether this bot is one of several shards.
+
+        :return: True if there is more than one shard, False otherwise.
+        """
+
+        return self.shard_count is not None and self.shard_count > 1
+
+    def start_snapshots(self):
+        """ Starts sharing this shard's timers with the other shards, if
+            it's sharded and it's not sharing them already.
+        """
+
+        if self.is_sharded() and supervisor.running('snapshots') == 0:
+            supervisor.spawn('snapshots', self._publish_snapshots(),
+                             loop=self.loop)
+
+    async def _publish_snapshots(self):
+        """ Periodically stores a snapshot of this shard's timers in the
+            shared database, so the other shards can list them. The writes
+            are made off the event loop, since the database may be locked
+            by another shard for a while. A failed write is logged, and the
+            next one tried on time.
+        """
+
+        shard = self.shard_id or 0
+        while not self.is_closed:
+            snapshots = [(c.id, c.server.id, c.mention, t.summary())
+                         for c, t in self.valid_timers().items()]
+            try:
+                await self.loop.run_in_executor(
+                    None, db_manager.set_timer_snapshots, shard, snapshots)
+            except Exception as err:
+                lib.log("Could not store the timer snapshots: {}"
+                        .format(err), level=logging.WARN)
+
+            await asyncio.sleep(self.snapshot_interval)
+
+    async def start_metrics(self):
+        """ Starts counting rate limits, watching the event loop (see
+            `pomodorobot.watchdog`), and serving the metrics if configured
+            to, unless they were started already. When sharded, each shard
+            serves its metrics on the configured port plus its ID.
+        """
+
+        if not self._counting_rate_limits:
+            self._counting_rate_limits = True
+            logging.getLogger('discord.http').addHandler(
+                metrics.RateLimitCounter())
+        watchdog.start(self.loop)
+
+        if self.metrics_serve and self._metrics_server is None:
+            # Each shard serves its own metrics, on the port after the
+            # previous shard's.
+            port = self.metrics_port + (self.shard_id or 0)
+            try:
+                self._metrics_server = await metrics.start_server(
+                    self.metrics_host, port)
+            except OSError as err:
+                lib.log("Could not serve the metrics on {}:{} ({})."
+                        .format(self.metrics_host, port, err),
+                        level=logging.ERROR)
+
+    def _queue_depths(self):
+        """ Gives the amount of items waiting in each of the bot's queues:
+            those of the event bus' coroutine listeners, and the timer
+            engine's events.
+
+        :return: A dictionary of the amounts, by queue name.
+        """
+
+        depths = {'bus:' + s.name: s.queued()
+                  for s in bus.subscriptions() if s.is_async}
+        if self.engine is not None:
+            depths['engine'] = self.engine.pending()
+        return depths
+
+    def object_counts(self):
+        """ Gives the amount of objects each of the bot's subsystems holds
+            on to, to tell which one grows.
+
+        :return: A dictionary of the amounts, by subsystem.
+        """
+
+        # Only needed when asked for, rather than at startup.
+        import pomodorobot.memory as memory
+
+        return {
+            'interfaces': len(self.interfaces),
+            'timers': len(self.timers),
+            'subscribers': sum(len(i.subbed)
+                               for i in self.interfaces.values()),
+            'bus subscriptions': len(bus.subscriptions()),
+            'pending tasks': sum(memory.pending_tasks(self.loop).values()),
+            'session records': db_manager.identity_map_size(),
+        }
 
     def mark_active(self, channel: discord.Channel, author: discord.Member,
                     time: datetime):
@@ -279,17 +724,182 @@ class PomodoroBot(commands.Bot):
             :type time: datetime
         """
 
-        interface = self.get_interface(channel, generate=False)
-        if interface is not None and author in interface.subbed:
-            interface.subbed[author]['last'] = time
+        interface = self.interfaces.peek(channel)
+        if interface is not None:
+            interface.ledger.touch(author, time)
 
     def unsub_all(self):
         """ Unsubscribes all members from all timers.
         """
-        for _, interface in self._interfaces.items():
+        for interface in self.interfaces.values():
             for sub in list(interface.subbed.keys()):
                 interface.remove_sub(sub)
 
+    async def drain(self, farewell=None):
+        """ Gets ready to shut down: stops every timer, tears its channel down
+            (a few channels at a time), saves every subscriber's session in a
+            single transaction and writes the timers' final state to
+            `state_file`.
+
+            The channels' teardown, the background tasks' end and the engine's
+            are given what's left of the shutdown deadline, and cut short once
+            it's reached. Stopping the timers, saving the sessions and writing
+            the state are local and always happen, even past the deadline.
+
+        :param farewell: The channel in which the shutdown was asked for,
+            which already got its goodbye.
+        :type farewell: discord.Channel
+
+        :return: The time each phase took, as a list of (name, seconds).
+        """
+
+        phases = []
+        started = phase_start = time.perf_counter()
+
+        def phase(name: str):
+            nonlocal phase_start
+            now = time.perf_counter()
+            phases.append((name, now - phase_start))
+            phase_start = now
+
+        def remaining():
+            return max(0.0, started + self.shutdown_deadline -
+                       time.perf_counter())
+
+        state = self._state_snapshot()
+
+        # Every timer is stopped before any channel is torn down, so the
+        # ones the deadline leaves out aren't left running.
+        active = self.valid_timers(State.RUNNING, State.PAUSED)
+        for channel, timer in active.items():
+            if self._uses_engine(timer):
+                self.engine.unload(channel.id)
+            timer.action = Action.NONE
+            timer.curr_time = 0
+            timer.set_period(-1)
+            timer.set_state(State.STOPPED)
+        phase('stop')
+
+        limit = asyncio.Semaphore(max(1, self.shutdown_concurrency))
+
+        async def teardown(channel: discord.Channel):
+            async with limit:
+                try:
+                    await self.safe_send(
+                        channel, "I'm sorry, I have to go. See you later!")
+                    await self.remove_messages(channel)
+                except d_err.HTTPException as err:
+                    lib.log("Could not tear the channel down: {}".format(err),
+                            channel_id=channel.id, level=logging.WARN)
+                finally:
+                    await asyncio.sleep(self.shutdown_interval)
+
+        channels = [teardown(channel) for channel in active.keys()
+                    if channel != farewell]
+        if channels:
+            try:
+                await asyncio.wait_for(asyncio.gather(*channels), remaining())
+            except asyncio.TimeoutError:
+                lib.log("Shutdown deadline reached, some channels were not"
+                        " torn down.", level=logging.WARN)
+        phase('teardown')
+
+        await supervisor.shutdown(min(self.tasks_shutdown_timeout,
+                                      remaining()))
+        phase('tasks')
+
+        with db_manager.batch():
+            self.unsub_all()
+            if self.is_sharded():
+                db_manager.clear_timer_snapshots(self.shard_id or 0)
+        journal.flush()
+        phase('database')
+
+        try:
+            with open(self.state_file, 'w', encoding='utf8') as file:
+                yaml.safe_dump(state, file, default_flow_style=False)
+        except OSError as err:
+            lib.log("Could not write the final state: {}".format(err),
+                    level=logging.WARN)
+        phase('state')
+
+        if self.engine is not None:
+            self.engine.stop(remaining())
+        phase('engine')
+
+        lib.log("Drained in {:.3f}s ({}).".format(
+            time.perf_counter() - started,
+            ", ".join("{}: {:.3f}s".format(name, duration)
+                      for name, duration in phases)))
+        return phases
+
+    def _state_snapshot(self):
+        """ Gives the state of every timer, as plain data.
+
+        :return: A list of dictionaries, one per timer.
+        """
+
+        state = []
+        for channel, timer in self.valid_timers().items():
+            interface = self.get_interface(channel)
+            state.append({
+                'channel_id': channel.id,
+                'server_id': channel.server.id
+                if channel.server is not None else None,
+                'state': State.to_string(timer.get_state()),
+                'periods': ",".join("{}:{}".format(
+                    period.name.replace(' ', '_'), period.time)
+                    for period in timer.periods),
+                'period': timer.get_period(),
+                'time': timer.curr_time,
+                'repeat': timer.repeat,
+                'countdown': timer.countdown,
+                'subscribed': [user.id for user in interface.subbed.keys()]
+            })
+        return state
+
+    def _uses_engine(self, timer=None) -> bool:
+        """ Tells whether timers are run by the timer engine's process,
+            starting it if it's configured but hasn't been started yet.
+
+        :param timer: The timer to tell about, if any. Timers whose time is
+            derived always run locally, since their time doesn't depend on
+            the loop keeping up.
+
+        :return: True if the engine is running timers, False if they run
+            locally.
+        """
+
+        if timer is not None and timer.derived:
+            return False
+
+        if self.engine is None:
+            # The engine keeps its own time, so it can't follow a clock other
+            # than the wall clock.
+            if self.engine_mode != 'process' or self.clock.speed != 1:
+                return False
+
+            self.engine = engine.EngineClient(self.loop)
+            self.engine.start()
+
+        return self.engine.alive
+
+    def sync_engine(self, channel: discord.Channel):
+        """ Lets the timer engine know that a running timer's periods,
+            looping setting or current period changed.
+
+        :param channel: The timer's channel.
+        :type channel: discord.Channel
+        """
+
+        interface = self.get_interface(channel, generate=False)
+        if interface is None or interface.timer is None:
+            return
+
+        if interface.timer.get_state() == State.RUNNING and \
+                self._uses_engine(interface.timer):
+            self.engine.run(channel.id, interface.timer)
+
     async def run_timer(self, channel: discord.Channel, start_idx=0):
         """ Makes a timer run.
 
@@ -310,40 +920,51 @@ class PomodoroBot(commands.Bot):
 
         await self.wait_until_ready()
 
-        self.timers_running += 1
-        await self.update_status()
 
-        while not self.is_closed:
-            iter_start = datetime.now()
-            start_micro = iter_start.second * 1000000 + iter_start.microsecond
-
-            if timer.get_state() == State.RUNNING and \
-                    timer.curr_time >= timer.periods[timer.get_period()]\
-                    .time * 60:
+        # The period change last received from the engine, as the old and new
+        # period indexes, until it's applied.
+        transition = None
 
-                say = "'{}' period over!" \
-                    .format(timer.periods[timer.get_period()].name)
+        while not self.is_closed:
+            iter_start = self.clock.monotonic()
+
+            if timer.get_state() == State.RUNNING and (
+                    transition is not None if self._uses_engine(timer) else
+                    timer.period_over()):
+                if transition is not None:
+                    old_idx, new_idx = transition
+                    transition = None
+                else:
+                    old_idx = timer.announced_period()
+                    new_idx = -1 if old_idx + 1 >= len(timer.periods) and \
+                        not timer.repeat else None
 
-                timer.curr_time = 0
+                say = "'{}' period over!".format(timer.periods[old_idx].name)
 
-                if timer.get_period() + 1 >= len(timer.periods) and \
-                        not timer.repeat:
+                if new_idx == -1:
                     say += "\nI have ran out of periods, and looping is off."
                     lib.log(say, channel_id=channel.id)
                     await self.safe_send(channel, say, tts=interface.tts)
 
                     break
 
-                timer.set_period((timer.get_period() + 1) % len(timer.periods))
+                if new_idx is None:
+                    await timer.next_period_async()
+                else:
+                    # The engine decided where the timer is, its next tick
+                    # brings the time within the period.
+                    timer.curr_time = 0
+                    await timer.set_period_async(new_idx)
 
                 if timer.action == Action.NONE:
+                    period = timer.periods[timer.announced_period()]
                     say += " '{}' period now starting ({})." \
-                        .format(timer.periods[timer.get_period()].name,
-                                lib.pluralize(
-                                    timer.periods[timer.get_period()].time,
-                                    "minute", append="s"))
+                        .format(period.name,
+                                lib.pluralize(period.time, "minute",
+                                              append="s"))
 
-                lib.log(say, channel_id=channel.id)
+                lib.log(say, channel_id=channel.id,
+                        server_id=timer.get_server_id(), event='timer_period')
                 try:
                     await self.safe_send(channel, say, tts=interface.tts)
 
@@ -356,26 +977,31 @@ class PomodoroBot(commands.Bot):
             if timer.action == Action.STOP:
                 timer.action = Action.NONE
 
-                lib.log("Timer has stopped.", channel_id=channel.id)
+                lib.log("Timer has stopped.", channel_id=channel.id,
+                        server_id=timer.get_server_id(), event='timer_stop')
                 await self.safe_send(channel, "Timer has stopped.")
 
                 break
 
             elif timer.action == Action.PAUSE:
                 timer.action = Action.NONE
-                timer.set_state(State.PAUSED)
+                await timer.set_state_async(State.PAUSED)
+
+                if self._uses_engine(timer):
+                    self.engine.unload(channel.id)
 
-                lib.log("Timer has paused.", channel_id=channel.id)
+                lib.log("Timer has paused.", channel_id=channel.id,
+                        server_id=timer.get_server_id(), event='timer_pause')
                 await self.safe_send(channel, "Timer has paused.")
 
             elif timer.action == Action.RUN:
                 timer.action = Action.NONE
 
                 prev_state = timer.get_state()
-                timer.set_state(State.RUNNING)
+                await timer.set_state_async(State.RUNNING)
 
                 if prev_state == State.STOPPED:
-                    timer.set_period(start_idx)
+                    await timer.set_period_async(start_idx)
                     say_action = "Starting"
                 else:
                     say_action = "Resuming"
@@ -383,7 +1009,11 @@ class PomodoroBot(commands.Bot):
                 if start_idx != 0:
                     say_action += " (from period n." + str(start_idx + 1) + ")"
 
-                lib.log(say_action, channel_id=channel.id)
+                if self._uses_engine(timer):
+                    self.engine.run(channel.id, timer)
+
+                lib.log(say_action, channel_id=channel.id,
+                        server_id=timer.get_server_id(), event='timer_run')
                 await self.safe_send(channel, say_action)
 
                 if interface.time_message is None:
@@ -407,15 +1037,33 @@ class PomodoroBot(commands.Bot):
                         channel_id=channel.id, level=logging.WARN)
 
             if timer.get_state() == State.RUNNING:
-                iter_end = datetime.now()
-                end_micro = iter_end.second * 1000000 + iter_end.microsecond
-
-                end_micro -= start_micro
-                end_micro %= 1000000.0
-                sleep_time = ((timer.step * 1000000.0) - end_micro)
+                if self._uses_engine(timer):
+                    event, a, b = await self.engine.next_event(channel.id)
+
+                    if event == engine.EV_PERIOD:
+                        # What was left of the period since the last tick.
+                        interface.add_sub_time(max(
+                            0, timer.periods[a].time * 60 - timer.curr_time))
+                        transition = (a, b)
+                        continue
+                    elif event == engine.EV_TICK:
+                        # Ticks merged while the loop was behind are credited
+                        # along with this one.
+                        credit = max(0, b - timer.curr_time)
+                        timer.curr_time = b
+                    else:
+                        # Lost the engine, carry on locally.
+                        continue
+                else:
+                    sleep_time = timer.step - \
+                        (self.clock.monotonic() - iter_start) % 1
 
-                await asyncio.sleep(sleep_time / 1000000.0)
-                timer.curr_time += timer.step
+                    slept = self.clock.monotonic()
+                    await self.clock.sleep(sleep_time)
+                    metrics.TICK_DRIFT.observe(max(0.0, self.clock.real(
+                        self.clock.monotonic() - slept - sleep_time)))
+                    timer.tick(timer.step)
+                    credit = timer.step
 
                 inactive = interface.check_inactivity(
                     self.timer_inactivity_allowed,
@@ -441,22 +1089,23 @@ class PomodoroBot(commands.Bot):
                                 .format(self.timer_inactivity_allowed)
                             await self.safe_send(channel, send,
                                                  delete_after=self.ans_lifespan)
-                interface.add_sub_time(timer.step)
+                interface.add_sub_time(credit)
             else:
                 break
 
-        if timer.get_state() != State.PAUSED:
+        if self._uses_engine(timer):
+            self.engine.unload(channel.id)
+
+        # A timer without a state was forcibly reset while running.
+        if timer.get_state() not in (State.PAUSED, None):
             timer.curr_time = 0
-            timer.set_period(-1)
-            timer.set_state(State.STOPPED)
+            await timer.set_period_async(-1)
+            await timer.set_state_async(State.STOPPED)
 
             if len(timer.periods) == 0:
-                timer.set_state(None)
+                await timer.set_state_async(None)
                 interface.timer = None
                 await self.safe_send(channel, "Timer has been reset.",
                                      delete_after=self.bot.ans_lifespan)
 
             await self.remove_messages(channel)
-
-        self.timers_running -= 1
-        await self.update_status()
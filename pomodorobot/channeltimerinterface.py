@@ -1,5 +1,8 @@
 import discord
 
+from pomodorobot.core.accounting import Ledger, SubscriptionEvent
+from pomodorobot.core.clock import system_clock
+from pomodorobot.core.eventbus import bus
 from pomodorobot.dbmanager import db_manager
 
 from datetime import datetime, timedelta
@@ -10,15 +13,17 @@ class ChannelTimerInterface:
         use of.
     """
 
-    def __init__(self, channel: discord.Channel):
+    def __init__(self, channel: discord.Channel, clock=None):
         # The channel this interface is linked to.
         self._channel = channel
+        # The clock the timer and the inactivity checks go by.
+        self.clock = system_clock if clock is None else clock
 
         # The timer this interface wraps.
         self.timer = None
 
-        # The list of people subscribed to this timer.
-        self.subbed = {}
+        # The accounts of the people subscribed to this timer.
+        self.ledger = Ledger()
 
         # Whether this timer is locked or not.
         self.locked = False
@@ -37,17 +42,46 @@ class ChannelTimerInterface:
         # The timer has been inactive (no subs) for
         self._inactivity = None
 
+    @property
+    def channel(self) -> discord.Channel:
+        """ The channel this interface is linked to.
+        """
+        return self._channel
+
+    @property
+    def subbed(self):
+        """ The people subscribed to this timer, with their accounts. See
+            `pomodorobot.core.accounting.Ledger`.
+        """
+        return self.ledger.entries
+
+    @property
+    def subs_version(self) -> int:
+        """ Increases every time someone subscribes or un-subscribes, so cached
+            renders of the subscribers can tell when they are outdated.
+        """
+        return self.ledger.version
+
     def get_server_name(self) -> str:
         return self._channel.server.name
 
+    def get_server_id(self) -> str:
+        server = self._channel.server
+        return None if server is None else server.id
+
     def get_channel_name(self) -> str:
         return self._channel.name
 
+    def get_channel_id(self) -> str:
+        return self._channel.id
+
     def add_sub(self, user, time, refresh=False):
         """ Adds a user to the subscribed list, with a timestamp.
 
         :param user: The user to add to the list.
-        :param time: The time at which the user subscribed at.
+        :param time: The time at which the user subscribed at, on the
+            interface's clock. The attendance stored is the UTC wall clock
+            time, whatever the clock.
         :param refresh: Whether the user should be
             un-subscribed and re-subscribed if he's already subscribed.
         """
@@ -56,12 +90,13 @@ class ChannelTimerInterface:
                 return None
             self.remove_sub(user)
 
-        self.subbed[user] = {}
-        self.subbed[user]['start'] = time
-        self.subbed[user]['last'] = time
-        self.subbed[user]['time'] = 0
+        self.ledger.open(user, time)
 
-        db_manager.set_user_attendance(user, time)
+        # The clock may be simulated, and the registry gives attendance in
+        # UTC: only the ledger and inactivity checks go by the clock.
+        db_manager.set_user_attendance(user, datetime.utcnow())
+
+        bus.publish(SubscriptionEvent(self, user, True, time))
 
     def remove_sub(self, user):
         """ Removes a user from the subscribed list, with a timestamp.
@@ -71,12 +106,13 @@ class ChannelTimerInterface:
         :return: 0 if the timer is active, -1 if it's inactive, -2 if it was
             stopped due to inactivity or -3 if there's no timer
         """
-        from pomodorobot.timer import State  # Just for my IDE to be happy...
+        from pomodorobot.core.timer import State
         if user not in self.subbed:
             return
 
-        db_manager.set_user_last_session(user, self.subbed[user]['time'])
-        del self.subbed[user]
+        db_manager.set_user_last_session(user, self.ledger.close(user))
+
+        bus.publish(SubscriptionEvent(self, user, False, self.clock.now()))
 
         if self.timer is None:
             return -3
@@ -94,15 +130,15 @@ class ChannelTimerInterface:
 
         :param time: The time to add to people's counters
         """
-        for user, records in self.subbed.items():
-            records['time'] += time
+        self.ledger.credit(time)
 
     def restart_inactivity(self):
         """ Checks whether a timer has entered inactivity (no subs)
 
         :return: True if inactive, False otherwise
         """
-        self._inactivity = datetime.now() if len(self.subbed) == 0 else None
+        self._inactivity = self.clock.now() if len(self.subbed) == 0 \
+            else None
 
         return self._inactivity is not None
 
@@ -118,7 +154,8 @@ class ChannelTimerInterface:
         if self._inactivity is None:
             return self.check_inactive_subs(user_time)
 
-        if self._inactivity + timedelta(minutes=timer_time) <= datetime.now():
+        if self._inactivity + timedelta(minutes=timer_time) <= \
+                self.clock.now():
             # timer has been inactive for `timer_time` minutes
             self.timer.stop()
             print('success')
@@ -132,18 +169,11 @@ class ChannelTimerInterface:
         :return: A list of users that have been forcibly un-subscribed due to
             inactivity (can be empty).
         """
-        unsubbed = []
-        allowed_time = datetime.now() - timedelta(minutes=time)
-
-        for sub, times in self.subbed.items():
-            # print(sub.name + ": " + str(last_activity) + "\n" +
-            #       str(allowed_time))
-            if times['last'] <= allowed_time:
-                unsubbed.append(sub)
+        unsubbed = self.ledger.inactive(time, self.clock.now())
         for sub in unsubbed:
             self.remove_sub(sub)
 
         if len(self.subbed) == 0:
-            self._inactivity = datetime.now()
+            self._inactivity = self.clock.now()
 
         return unsubbed
@@ -1,7 +1,9 @@
 import yaml
 import logging
 
-import pomodorobot.lib as lib
+import pomodorobot.core.logs as logs
+
+from pomodorobot.core.text import to_boolean
 
 
 class Config:
@@ -182,7 +184,7 @@ class Config:
         boolean = self.get_element(path)
         try:
             return None if boolean is None else\
-                lib.to_boolean(boolean)
+                to_boolean(boolean)
         except TypeError:
             raise TypeError(("Configuration value {} could not be parsed to " +
                             "`boolean`").format(path))
@@ -217,5 +219,5 @@ def get_config():
     if _instance.is_set():
         return _instance
     else:
-        lib.log("Configuration instance was asked for before it was set up.",
-                level=logging.ERROR)
+        logs.log("Configuration instance was asked for before it was set up.",
+                 level=logging.ERROR)
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+
+class SubscriptionEvent:
+    """ Represents a user subscribing to, or un-subscribing from, a channel's
+        timer.
+    """
+
+    def __init__(self, interface, user, subscribed: bool, time):
+        self.interface = interface
+        self.user = user
+
+        # True if the user subscribed, False if they un-subscribed.
+        self.subscribed = subscribed
+        # The time at which the subscription changed.
+        self.time = time
+
+
+class Ledger:
+    """ Keeps the accounts of the users subscribed to a timer: when they
+        subscribed, when they were last active, and how much timer time they
+        have been credited with.
+    """
+
+    def __init__(self):
+        # The accounts of the subscribed users. Each one holds the 'start'
+        # and 'last' (activity) times, and the credited 'time', in seconds.
+        self.entries = {}
+        # Increases every time someone subscribes or un-subscribes, so cached
+        # renders of the subscribers can tell when they are outdated.
+        self.version = 0
+
+    def __contains__(self, user):
+        return user in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def open(self, user, time: datetime):
+        """ Opens an account for a user.
+
+        :param user: The user subscribing.
+        :param time: The time at which they subscribed.
+        """
+
+        self.entries[user] = {'start': time, 'last': time, 'time': 0}
+        self.version += 1
+
+    def close(self, user):
+        """ Closes a user's account.
+
+        :param user: The user un-subscribing.
+
+        :return: The time they were credited with, in seconds, or None if they
+            had no account.
+        """
+
+        entry = self.entries.pop(user, None)
+        if entry is None:
+            return None
+
+        self.version += 1
+        return entry['time']
+
+    def touch(self, user, time: datetime):
+        """ Records activity from a user, if they have an account.
+
+        :param user: The active user.
+        :param time: The time of the activity.
+        """
+
+        if user in self.entries:
+            self.entries[user]['last'] = time
+
+    def credit(self, time):
+        """ Credits every account with some timer time.
+
+        :param time: The time to credit, in seconds.
+        """
+
+        for entry in self.entries.values():
+            entry['time'] += time
+
+    def inactive(self, allowed: int, now=None):
+        """ Finds the users that haven't been active lately.
+
+        :param allowed: The time users are allowed to be inactive for, in
+            minutes.
+        :type allowed: int
+
+        :param now: The current time. Defaults to `datetime.now()`.
+
+        :return: The list of inactive users.
+        """
+
+        since = (datetime.now() if now is None else now) - \
+            timedelta(minutes=allowed)
+
+        return [user for user, entry in self.entries.items()
+                if entry['last'] <= since]
@@ -0,0 +1,88 @@
+import time
+import asyncio
+from datetime import datetime, timedelta
+
+
+class Clock:
+    """ Tells the time and waits for it to pass. Timers, their interfaces and
+        the bot's timer loop all go through one, so they can be made to run
+        on something other than the wall clock (see `SimulatedClock`).
+    """
+
+    # How many times faster than the wall clock this clock goes.
+    speed = 1.0
+
+    def monotonic(self) -> float:
+        """ Gives the current instant, in seconds, for measuring durations.
+        """
+        return time.monotonic()
+
+    def now(self) -> datetime:
+        """ Gives the current date and time.
+        """
+        return datetime.now()
+
+    async def sleep(self, seconds):
+        """ Waits for some time to pass on this clock.
+
+        :param seconds: The time to wait for, in seconds.
+        """
+        await asyncio.sleep(seconds)
+
+    def real(self, seconds) -> float:
+        """ Gives the wall clock time some time on this clock takes.
+
+        :param seconds: The time on this clock, in seconds.
+
+        :return: The wall clock time, in seconds.
+        """
+        return seconds / self.speed
+
+
+class SystemClock(Clock):
+    """ The wall clock.
+    """
+    pass
+
+
+class SimulatedClock(Clock):
+    """ A clock going some times faster than the wall clock, so long sessions
+        can be gone through in a fraction of the time: at a speed of 1000, an
+        8-hour day takes under 29 seconds. Sleeps are shortened accordingly,
+        so everything waiting on the clock keeps the same pace relative to
+        it.
+
+        Time can also be moved forward at once with `advance`.
+    """
+
+    def __init__(self, speed=1000.0, start=None):
+        self.speed = float(speed)
+
+        # The date and time the clock started at.
+        self._start = datetime.now() if start is None else start
+        # The wall clock instant the clock started at, and the time it's been
+        # moved forward by.
+        self._origin = time.monotonic()
+        self._skipped = 0.0
+
+    def monotonic(self) -> float:
+        return (time.monotonic() - self._origin) * self.speed + self._skipped
+
+    def now(self) -> datetime:
+        return self._start + timedelta(seconds=self.monotonic())
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(max(0, seconds) / self.speed)
+
+    def advance(self, seconds):
+        """ Moves the clock forward at once. Sleeps going on are not cut
+            short, they end when they would have.
+
+        :param seconds: The time to move forward by, in seconds.
+        """
+
+        self._skipped += seconds
+
+
+# The clock used unless another one is given.
+system_clock = SystemClock()
@@ -0,0 +1,293 @@
+import time
+import asyncio
+import inspect
+import logging
+import weakref
+from enum import Enum
+
+import pomodorobot.core.logs as logs
+
+
+class Overflow(Enum):
+    """ Represents what happens to new events when a listener's queue is full.
+    """
+
+    # The new event is dropped.
+    DROP_NEWEST = 1
+    # The oldest queued event is dropped to make room for the new one.
+    DROP_OLDEST = 2
+    # The event waits for room in the queue, and `EventBus.publish_async`
+    # waits along with it. `EventBus.publish` can't wait, so it drops the event
+    # instead (and logs a warning).
+    BLOCK = 3
+
+
+class Subscription:
+    """ Represents a listener subscribed to a type of event.
+
+        Methods are only referenced weakly, so subscribing a cog's method
+        doesn't keep the cog alive after it's unloaded. Other listeners
+        (functions, lambdas, closures) are held until unsubscribed.
+        Plain listeners are called as soon as the event is published, while
+        coroutine listeners get the events through a bounded queue and run
+        on their own, off the publisher's path.
+    """
+
+    def __init__(self, event_type, listener, queue_size=100,
+                 overflow=Overflow.DROP_OLDEST, bus=None):
+        # The type of events this subscription is for (subclasses included).
+        self.event_type = event_type
+        # A readable name for the listener.
+        self.name = getattr(listener, '__qualname__', repr(listener))
+
+        if inspect.ismethod(listener):
+            self._ref = weakref.WeakMethod(listener)
+        else:
+            self._ref = lambda: listener
+        # The bus the subscription belongs to, told about every event handled
+        # or dropped.
+        self._bus = bus
+
+        # Whether the listener is a coroutine function, and so needs a queue.
+        self.is_async = asyncio.iscoroutinefunction(listener)
+        # The maximum amount of events waiting for the listener.
+        self.queue_size = queue_size
+        # What to do when the queue is full.
+        self.overflow = overflow
+
+        self._queue = None
+        self._worker = None
+
+        # The amount of events the listener has handled.
+        self.handled = 0
+        # The amount of events dropped because the queue was full.
+        self.dropped = 0
+        # The total and the highest time (in seconds) the listener has taken
+        # to handle an event, counted from when it was published.
+        self.total_latency = 0
+        self.max_latency = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._ref() is not None
+
+    def listener(self):
+        """ Gives the listener, or None if it has been garbage collected.
+        """
+
+        return self._ref()
+
+    def queued(self) -> int:
+        """ Gives the amount of events waiting for the listener.
+        """
+
+        return 0 if self._queue is None else self._queue.qsize()
+
+    def deliver(self, e):
+        """ Hands an event to the listener, either calling it right away or
+            queueing the event, depending on the kind of listener.
+
+        :param e: The event to hand over.
+        """
+
+        published = time.perf_counter()
+
+        if not self.is_async:
+            listener = self._ref()
+            if listener is not None:
+                listener(e)
+                self._record(published)
+            return
+
+        queue = self._ensure_queue()
+        if queue.full():
+            if self.overflow == Overflow.DROP_OLDEST:
+                queue.get_nowait()
+                self._drop()
+            else:
+                if self.overflow == Overflow.BLOCK and self.dropped == 0:
+                    logs.log("The queue of {} is full, and events published "
+                             "without waiting are dropped. Publish them with "
+                             "`publish_async` to wait for room."
+                             .format(self.name), level=logging.WARN)
+                self._drop()
+                return
+
+        queue.put_nowait((e, published))
+
+    async def deliver_async(self, e):
+        """ Hands an event to the listener, waiting for room in its queue if
+            the subscription blocks on overflow.
+
+        :param e: The event to hand over.
+        """
+
+        if self.is_async and self.overflow == Overflow.BLOCK:
+            await self._ensure_queue().put((e, time.perf_counter()))
+        else:
+            self.deliver(e)
+
+    def cancel(self):
+        """ Stops the worker running the listener, dropping any queued events.
+        """
+
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._queue = None
+
+    def _ensure_queue(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._work())
+        return self._queue
+
+    async def _work(self):
+        while True:
+            e, published = await self._queue.get()
+
+            listener = self._ref()
+            if listener is None:
+                return
+
+            try:
+                await listener(e)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logs.log("Listener {} failed to handle {}."
+                         .format(self.name, type(e).__name__),
+                         level=logging.ERROR)
+                logging.getLogger().exception(" ")
+            finally:
+                del listener
+
+            self._record(published)
+
+    def _record(self, published):
+        latency = time.perf_counter() - published
+
+        self.handled += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+        if self._bus is not None and self._bus.on_handled is not None:
+            self._bus.on_handled(self.name, latency)
+
+    def _drop(self):
+        self.dropped += 1
+
+        if self._bus is not None and self._bus.on_dropped is not None:
+            self._bus.on_dropped(self.name)
+
+
+class EventBus:
+    """ Delivers events to the listeners subscribed to their type.
+    """
+
+    def __init__(self):
+        # The subscriptions, indexed by the type of event they are for.
+        self._subscriptions = {}
+
+        # A function called with a listener's name and the time (in seconds,
+        # counted from when the event was published) it took to handle an
+        # event, every time one is handled.
+        self.on_handled = None
+        # A function called with a listener's name every time an event for it
+        # is dropped because its queue is full.
+        self.on_dropped = None
+
+    def subscribe(self, event_type, listener, queue_size=100,
+                  overflow=Overflow.DROP_OLDEST) -> Subscription:
+        """ Subscribes a listener to a type of event, and all of its subtypes.
+            See `Subscription` for how listeners are called.
+
+        :param event_type: The type of event to listen for.
+        :type event_type: type
+
+        :param listener: The function or method reacting to the events. It
+            must take the event as its only argument. Methods are referenced
+            weakly, other functions are held until unsubscribed.
+
+        :param queue_size: The maximum amount of events that can be waiting
+            for a coroutine listener.
+        :type queue_size: int
+
+        :param overflow: What to do when a coroutine listener's queue is full.
+        :type overflow: Overflow
+
+        :return: The new subscription.
+        """
+
+        subscription = Subscription(event_type, listener, queue_size, overflow,
+                                    self)
+        self._subscriptions.setdefault(event_type, []).append(subscription)
+
+        return subscription
+
+    def unsubscribe(self, listener, event_type=None):
+        """ Removes a listener's subscriptions.
+
+        :param listener: The listener to remove.
+
+        :param event_type: The type of event to remove the listener from, or
+            None to remove it from every type.
+        :type event_type: type
+        """
+
+        types = list(self._subscriptions.keys()) if event_type is None \
+            else [event_type]
+
+        for e_type in types:
+            for subscription in list(self._subscriptions.get(e_type, [])):
+                if subscription.listener() == listener:
+                    self._remove(subscription)
+
+    def publish(self, e):
+        """ Publishes an event to the listeners subscribed to its type.
+
+        :param e: The event to publish.
+        """
+
+        for subscription in self._matching(e):
+            subscription.deliver(e)
+
+    async def publish_async(self, e):
+        """ Publishes an event, waiting for room in the queues of the listeners
+            that block on overflow.
+
+        :param e: The event to publish.
+        """
+
+        for subscription in self._matching(e):
+            await subscription.deliver_async(e)
+
+    def subscriptions(self):
+        """ Gives all the live subscriptions.
+
+        :return: The list of subscriptions.
+        """
+
+        return [s for subs in self._subscriptions.values() for s in subs
+                if s.alive]
+
+    def _matching(self, e):
+        matching = []
+        for e_type in type(e).__mro__:
+            for subscription in list(self._subscriptions.get(e_type, [])):
+                if subscription.alive:
+                    matching.append(subscription)
+                else:
+                    self._remove(subscription)
+        return matching
+
+    def _remove(self, subscription):
+        subscription.cancel()
+
+        subs = self._subscriptions.get(subscription.event_type, [])
+        if subscription in subs:
+            subs.remove(subscription)
+
+
+bus = EventBus()
@@ -0,0 +1,119 @@
+from pomodorobot.core.timer import State
+
+
+class TimerIndex:
+    """ An index of timers by state, kept up to date through their state
+        events, so timers in a given state can be counted in constant time
+        and gone through without looking at the rest.
+
+        Set up timers are the stopped ones; timers without a state (reset, or
+        whose setup failed) are not indexed.
+
+        It also keeps the timers of each server in the order they were set
+        up, so they can be listed a page at a time.
+    """
+
+    def __init__(self):
+        # The indexed timers, by channel ID, for each state.
+        self._by_state = {state: {} for state in State}
+        # The indexed timers, by channel ID.
+        self._timers = {}
+        # The channel IDs of the indexed timers, in the order they were set
+        # up, by server ID. The None entry holds all of them.
+        self._order = {None: []}
+
+    def __len__(self):
+        return sum(len(timers) for timers in self._by_state.values())
+
+    def update(self, e):
+        """ Moves a timer to the entry of its new state.
+
+        :param e: The timer's state change.
+        :type e: pomodorobot.core.timer.TimerStateEvent
+        """
+
+        channel_id = e.timer.get_channel_id()
+
+        if e.old_state is not None:
+            self._by_state[e.old_state].pop(channel_id, None)
+        if e.new_state is not None:
+            self._by_state[e.new_state][channel_id] = e.timer
+
+        if e.old_state is None and e.new_state is not None and \
+                channel_id not in self._timers:
+            self._timers[channel_id] = e.timer
+            for key in (None, e.timer.get_server_id()):
+                self._order.setdefault(key, []).append(channel_id)
+
+        elif e.new_state is None and channel_id in self._timers:
+            del self._timers[channel_id]
+            for key in (None, e.timer.get_server_id()):
+                order = self._order.get(key)
+                if order is not None and channel_id in order:
+                    order.remove(channel_id)
+                    if not order and key is not None:
+                        del self._order[key]
+
+    def count(self, state: State) -> int:
+        """ Gives the amount of timers in a state.
+
+        :param state: The state.
+        :type state: State
+
+        :return: The amount of timers.
+        """
+
+        return len(self._by_state[state])
+
+    def timers(self, *states):
+        """ Gives the timers in some states.
+
+        :param states: The states. If none are given, gives every timer.
+
+        :return: A list of timers.
+        """
+
+        if not states:
+            states = self._by_state.keys()
+
+        return [timer for state in states
+                for timer in self._by_state[state].values()]
+
+    def count_in(self, server_id=None) -> int:
+        """ Gives the amount of timers in a server.
+
+        :param server_id: The server's ID, or None for every server.
+
+        :return: The amount of timers.
+        """
+
+        return len(self._order.get(server_id, ()))
+
+    def page(self, server_id=None, start=0, size=10):
+        """ Gives a slice of the timers of a server, in the order they were
+            set up.
+
+        :param server_id: The server's ID, or None for every server.
+        :param start: The position of the first timer to give.
+        :param size: The maximum amount of timers to give.
+
+        :return: A list of timers.
+        """
+
+        order = self._order.get(server_id, ())
+        return [self._timers[channel_id]
+                for channel_id in order[start:start + size]]
+
+    def find(self, channel_id):
+        """ Gives the indexed timer of a channel.
+
+        :param channel_id: The channel's ID.
+
+        :return: A (state, timer) pair, or None if the channel has no
+            indexed timer.
+        """
+
+        for state, timers in self._by_state.items():
+            if channel_id in timers:
+                return state, timers[channel_id]
+        return None
@@ -0,0 +1,277 @@
+import os
+import sys
+import gzip
+import copy
+import json
+import queue
+import shutil
+import logging
+import logging.handlers
+
+
+class LibLogger:
+    """ Represents a logger wrapper
+        with a couple extra checks to add flexibility.
+    """
+
+    def __init__(self):
+        # The logger itself.
+        self.logger = logging.getLogger()
+
+        # Whether the logger is ready to be used or not, with the setup
+        # correctly in place.
+        self.ready = False
+        # Whether the logger is in debug mode (meaning its level is set to
+        # logging.DEBUG) or not (meaning the level is at logging.INFO).
+        self.debug = False
+        # The listener writing out the queued records, on its own thread.
+        self.listener = None
+
+
+_logger = LibLogger()
+
+# The channel shown for messages that don't come from a channel.
+GLOBAL = "Global".center(18, '=')
+
+
+class _ContextFilter(logging.Filter):
+    """ Gives every record the channel, server and event fields, so records
+        from other libraries' loggers can be formatted like the bot's.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for field, default in (('channel', GLOBAL), ('server', None),
+                               ('event', None)):
+            if not hasattr(record, field):
+                setattr(record, field, default)
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """ Formats records as text, one line per line of the message, each one
+        prefixed with the time, level and channel.
+    """
+
+    def __init__(self):
+        super().__init__(fmt='[{asctime}][{levelname:^7}] [{channel}] {line}',
+                         datefmt='%m/%d | %H:%M:%S', style='{')
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        record.asctime = self.formatTime(record, self.datefmt)
+
+        lines = []
+        for line in message.split('\n'):
+            record.line = line
+            lines.append(self.formatMessage(record))
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            lines.append(record.exc_text)
+
+        return '\n'.join(lines)
+
+
+class JsonFormatter(logging.Formatter):
+    """ Formats records as JSON objects, one per line, with the time, level,
+        channel, server and event of each message.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'channel': None if record.channel == GLOBAL else record.channel,
+            'server': record.server,
+            'event': record.event,
+            'message': record.getMessage()
+        }
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """ Queues records with their message merged with its arguments, like
+        the default handler, but keeps the exception's text apart rather
+        than merging it into the message, so the formatters can place it.
+    """
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        # Formats the exceptions of the records queued.
+        self.exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+
+        # The traceback is formatted right away, while it's still around.
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.exc_formatter.formatException(
+                    record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+def _gzip_name(name: str) -> str:
+    return name + '.gz'
+
+
+def _gzip_rotate(source: str, dest: str):
+    """ Compresses a rotated log file.
+    """
+
+    with open(source, 'rb') as file_in, gzip.open(dest, 'wb') as file_out:
+        shutil.copyfileobj(file_in, file_out)
+    os.remove(source)
+
+
+def init_logger(filename='pomodorobot.log', json_lines=False,
+                max_bytes=5 * 1024 * 1024, backup_count=5, echo=True):
+    """ Instantiates and sets up the logger, if it's not already set up.
+
+        Records are only put in a queue by the thread logging them; they're
+        formatted and written by a background thread, so logging never
+        blocks the event loop on I/O.
+
+    :param filename: The file to write the log to.
+    :type filename: str
+
+    :param json_lines: Whether the file should hold JSON objects, one per
+        line, instead of text.
+    :type json_lines: bool
+
+    :param max_bytes: The size, in bytes, from which the file is rotated.
+        The rotated files are compressed.
+    :type max_bytes: int
+
+    :param backup_count: The amount of rotated files kept.
+    :type backup_count: int
+
+    :param echo: Whether the log should also be written to stdout.
+    :type echo: bool
+    """
+
+    if _logger.ready:
+        return
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        filename=filename, encoding='utf8', maxBytes=max_bytes,
+        backupCount=backup_count)
+    file_handler.namer = _gzip_name
+    file_handler.rotator = _gzip_rotate
+    # Each run starts on a new file, the previous one is kept rotated.
+    if os.path.exists(filename) and os.path.getsize(filename) > 0:
+        file_handler.doRollover()
+
+    file_handler.setFormatter(JsonFormatter() if json_lines
+                              else TextFormatter())
+    handlers = [file_handler]
+
+    if echo:
+        term_handler = logging.StreamHandler(sys.stdout)
+        term_handler.setFormatter(TextFormatter())
+        handlers.append(term_handler)
+
+    queue_handler = _QueueHandler(queue.Queue(-1))
+    queue_handler.addFilter(_ContextFilter())
+
+    _logger.listener = logging.handlers.QueueListener(
+        queue_handler.queue, *handlers, respect_handler_level=True)
+    _logger.listener.start()
+
+    _logger.logger.addHandler(queue_handler)
+    _logger.logger.setLevel(logging.INFO)
+
+    _logger.ready = True
+
+
+def stop_logger():
+    """ Writes out the records still queued and stops the logging thread.
+    """
+
+    if _logger.listener is not None:
+        _logger.listener.stop()
+        _logger.listener = None
+
+
+def log(message, channel_id=GLOBAL, level=logging.INFO, server_id=None,
+        event=None):
+    """ Logs a message with a given format, specifying the channel originating
+        the message, or if its a global message.
+
+    :param message: The message to log, or a function giving it, so messages
+        that are costly to build are only built if they are going to be
+        logged.
+    :type message: str or callable
+
+    :param channel_id: The ID of the channel in which the message was generated,
+        or None if it's a global message (defaults to None).
+    :type channel_id: str
+
+    :param level: The logging level. Defaults to logging.INFO
+
+    :param server_id: The ID of the server in which the message was
+        generated, if any.
+    :type server_id: str
+
+    :param event: A short name for what's being logged (e.g. 'timer_start'),
+        for structured logs.
+    :type event: str
+    """
+
+    if not _logger.ready:
+        init_logger()
+
+    if not _logger.logger.isEnabledFor(level):
+        return
+    if callable(message):
+        message = message()
+
+    _logger.logger.log(level, message, extra={
+        'channel': GLOBAL if channel_id is None else channel_id,
+        'server': server_id, 'event': event})
+
+
+def log_exception(exception: BaseException):
+    """ Logs the stacktrace of an exception.
+
+    :param exception: The exception to log.
+    """
+
+    if not _logger.ready:
+        init_logger()
+
+    _logger.logger.exception(" ", exc_info=exception)
+
+
+def is_logger_debug():
+    """ Tells if the logger is currently on debug mode or not.
+
+    :return: True if the logger is on debug mode, False otherwise.
+    """
+
+    return _logger.debug
+
+
+def debug(val: bool):
+    """ Turns the logger's debug mode on or off
+
+    :param val: Whether to turn the logger's debug mode on or off.
+    :type val: bool
+    """
+    _logger.debug = val
+    _logger.logger.setLevel(logging.DEBUG if _logger.debug else logging.INFO)
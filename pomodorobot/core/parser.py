@@ -0,0 +1,85 @@
+import re
+
+
+class Period:
+    """ Represents a Pomodoro Timer period.
+        It has a name and a duration, in minutes.
+    """
+
+    def __init__(self, idx: int, name: str, time: float):
+        self.id = idx
+        self.name = name
+        self.time = int(time) if time.is_integer() else time
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and\
+            self.id == other.id and \
+            self.name == other.name and self.time == other.time
+
+
+def parse_format(periods_format: str):
+    """ Parses a string into the corresponding periods.
+
+    :param periods_format:  The string containing the periods and
+        their names, in a format similar to that of a dictionary.
+        Ex.: PeriodA:10,PeriodB:5,PeriodC:15
+             This will create 3 periods of 10, 5 and 15 minutes each.
+
+        It also accepts segments with the format (nxName1:t1,Name2:t2),
+        which creates n iterations of Name1:t1,Name2:t2 periods (Where
+        Name1 and Name2 are the period names and t1, t2 the respective
+        times).
+        Ex.: (3xPeriodA:10,PeriodB:5),PeriodC:15
+            This will create 7 periods of times 10,5,10,5,10,5 and 15 each.
+    :type periods_format: str
+    """
+    if periods_format is None or ':' not in periods_format:
+        return None
+
+    periods = []
+    if ',' not in periods_format:
+        try:
+            attempt = periods_format.split(':')
+            periods.append(Period(len(periods), attempt[0],
+                                  float(attempt[1])))
+
+            return periods
+        except ValueError:
+            return None
+
+    sections = re.sub(r",(?=[^()]*\))", ';', periods_format).split(',')
+
+    for section in sections:
+        if section.startswith('(') and section.endswith(')'):
+
+            section = section.replace('(', '').replace(')', '')
+            splits = section.split('x')
+
+            sub_sections = []
+
+            for s in splits[1].strip().split(';'):
+                sub_sections.append(s.split(':'))
+                if len(sub_sections[len(sub_sections) - 1]) != 2:
+                    return None
+
+            for i in range(0, int(splits[0]) * len(sub_sections)):
+                idx = i % len(sub_sections)
+
+                time = float(sub_sections[idx][1])
+                if time == 0:
+                    continue
+                periods.append(Period(len(periods),
+                               sub_sections[idx][0].replace('_', ' '),
+                               time))
+        else:
+            splits_b = section.split(':')
+            if len(splits_b) != 2:
+                return None
+
+            time = float(splits_b[1])
+            if time == 0:
+                continue
+            periods.append(Period(len(periods),
+                                  splits_b[0].replace('_', ' '),
+                                  time))
+    return periods
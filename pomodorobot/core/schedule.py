@@ -0,0 +1,129 @@
+from bisect import bisect_right
+
+
+class ScheduleIndex:
+    """ A cumulative-duration index over a timer's periods.
+
+        It answers "which period are we in after T seconds" through a binary
+        search, and "when does period k start" in constant time, without
+        having to step through the period list.
+    """
+
+    def __init__(self, periods=None):
+        # The second, counted from the start of the first period, at which
+        # each period starts. It has one extra entry at the end, holding the
+        # total duration of the schedule.
+        self._starts = [0]
+
+        if periods is not None:
+            self.rebuild(periods)
+
+    def __len__(self):
+        return len(self._starts) - 1
+
+    def rebuild(self, periods):
+        """ Rebuilds the index from a list of periods. Must be called every time
+            periods are added or removed.
+
+        :param periods: The periods to index, in order.
+        :type periods: list of pomodorobot.timer.Period
+        """
+
+        self.rebuild_durations(period.time * 60 for period in periods)
+
+    def rebuild_durations(self, durations):
+        """ Rebuilds the index from the periods' durations.
+
+        :param durations: The duration of each period, in seconds, in order.
+        """
+
+        starts = [0]
+        for duration in durations:
+            starts.append(starts[-1] + duration)
+
+        self._starts = starts
+
+    def total(self):
+        """ Gives the duration of a full pass through the schedule.
+
+        :return: The duration, in seconds.
+        """
+
+        return self._starts[-1]
+
+    def start_of(self, idx: int):
+        """ Gives the time at which a period starts, counted from the start of
+            the first period.
+
+        :param idx: The index of the period, from 0 to n - 1.
+        :type idx: int
+
+        :return: The period's start time, in seconds.
+        """
+
+        return self._starts[idx]
+
+    def duration_of(self, idx: int):
+        """ Gives the duration of a period.
+
+        :param idx: The index of the period, from 0 to n - 1.
+        :type idx: int
+
+        :return: The period's duration, in seconds.
+        """
+
+        return self._starts[idx + 1] - self._starts[idx]
+
+    def locate(self, elapsed, repeat=False):
+        """ Finds the period in which the timer is after a certain amount of
+            time has passed since the start of the first period.
+
+        :param elapsed: The total elapsed time, in seconds.
+        :param repeat: Whether the schedule loops back to the first period
+            after going through the last one.
+        :type repeat: bool
+
+        :return: A (period index, offset within the period) pair, or None if
+            the schedule is empty or has already run out of periods.
+        """
+
+        total = self.total()
+        if len(self) == 0 or total <= 0 or elapsed < 0:
+            return None
+
+        if elapsed >= total:
+            if not repeat:
+                return None
+            elapsed %= total
+
+        idx = bisect_right(self._starts, elapsed) - 1
+        return idx, elapsed - self._starts[idx]
+
+    def time_until(self, idx: int, current: int, offset=0, repeat=False):
+        """ Gives the time left until a period starts, from a given position
+            in the schedule.
+
+        :param idx: The index of the period to reach.
+        :type idx: int
+
+        :param current: The index of the period the timer is in.
+        :type current: int
+
+        :param offset: The time elapsed within the current period, in seconds.
+
+        :param repeat: Whether the schedule loops back to the first period
+            after going through the last one.
+        :type repeat: bool
+
+        :return: The time left, in seconds, or None if the period will not be
+            reached again (i.e. it's behind and looping is off).
+        """
+
+        position = self._starts[current] + offset
+        target = self._starts[idx]
+
+        if target >= position:
+            return target - position
+        if not repeat:
+            return None
+        return self.total() - position + target
@@ -0,0 +1,76 @@
+def get_name(member, nick=False) -> str:
+    """ Gives the name of a member (or user).
+
+    :param member: The member, or anything with a name and a nick.
+
+    :param nick: Whether the member's nick should be given instead of their
+        name, if they have one.
+    :type nick: bool
+
+    :return: The name.
+    """
+
+    return member.nick if nick and member.nick is not None else member.name
+
+
+def to_boolean(value) -> bool:
+    """Parses a string to boolean. Only meant to be used for command arguments.
+
+    :param value: The string to evaluate.
+    :return: The parsed value.
+    :raise: TypeError: If the value cannot be parsed.
+
+    .. note::
+        The valid values are not just 'True' or 'False'.
+        It can be either 'true', 'on', 'yes' or 'y' for True
+        or 'false', 'off', 'no' or 'n' for False
+        and is not case-sensitive (so something like TruE is valid).
+    """
+
+    if isinstance(value, bool):
+        return value
+
+    value = str(value).lower()
+
+    if value in ['1', 'true', 'on', 'yes', 'y']:
+        return True
+    elif value in ['0', 'false', 'off', 'no', 'n']:
+        return False
+    else:
+        raise TypeError("Could not parse {} to boolean".format(value))
+
+
+def pluralize(amount, s_name: str, append="", p_name=""):
+    """ Pluralizes a string given the amount related to it.
+        For example, if I have n minute(s), this will return either
+        'n minute' or 'n minutes', depending if n=1 or not.
+
+        Note that only one of append or p_name can be valid.
+
+    :param amount: The amount being evaluated
+    :type amount: numeric (int, float, etc.)
+
+    :param s_name: The singular name of the concept.
+    :type s_name: str
+
+    :param append: If the concept is a regular plural, this indicates the
+        pluralization of the singular name (ex: 's' or 'es').
+    :type append: str
+
+    :param p_name: If the concept is an irregular plural, this indicates the
+        plural name of the concept, which overrides the singular name.
+    :type p_name: str
+
+    :return: The value and the concept name merged in a string, or None if both
+        an append value and a plural name were given, or neither.
+    """
+
+    if append != "" and p_name != "":
+        return None
+    if append == "" and p_name == "":
+        return None
+
+    if append != "":
+        return str(amount) + " " + (s_name if amount == 1 else s_name + append)
+    if p_name != "":
+        return str(amount) + " " + (s_name if amount == 1 else p_name)
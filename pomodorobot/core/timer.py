@@ -0,0 +1,955 @@
+from enum import Enum
+
+from pomodorobot.core.clock import system_clock
+from pomodorobot.core.parser import parse_format
+from pomodorobot.core.schedule import ScheduleIndex
+from pomodorobot.core.text import get_name, pluralize
+from pomodorobot.core.eventbus import bus
+
+
+class State(Enum):
+    """ Represents the states in which a pomdoro timer can be.
+    """
+
+    STOPPED = -1
+    RUNNING = 1
+    PAUSED = 2
+
+    @staticmethod
+    def to_string(state):
+        if state == State.RUNNING:
+            return "RUNNING"
+        elif state == State.PAUSED:
+            return "PAUSED"
+        elif state == State.STOPPED:
+            return "STOPPED"
+        return None
+
+
+class Action(Enum):
+    """ Represents the actions that a pomodoro timer can do.
+    """
+
+    NONE = 0
+    RUN = 1
+    PAUSE = 2
+    STOP = 3
+
+
+class TimerEvent:
+    """ Represents a timer-related event.
+        Events are delivered through `pomodorobot.core.eventbus.bus`, to the
+        listeners subscribed to their type.
+    """
+
+    def __init__(self, timer):
+        self.timer = timer
+
+    def dispatch(self):
+        """ Dispatches the event, thus making the listeners react to it.
+        """
+
+        self.timer.invalidate_render(self)
+
+        bus.publish(self)
+
+    async def dispatch_async(self):
+        """ Dispatches the event, waiting for room in the queues of the
+            listeners that block on overflow (see
+            `pomodorobot.core.eventbus.Overflow.BLOCK`), so a backlog of
+            events slows the timer's loop down instead of being dropped.
+        """
+
+        self.timer.invalidate_render(self)
+
+        await bus.publish_async(self)
+
+    @classmethod
+    def add_listener(cls, listener):
+        """ Subscribes a listener to this type of event (and its subtypes).
+            Listeners should only take 1 argument (aside from self if it's a
+            method). See `pomodorobot.core.eventbus.EventBus.subscribe`.
+
+        :param listener: The listener function.
+        :type listener: function
+        """
+        bus.subscribe(cls, listener)
+
+
+class TimerStateEvent(TimerEvent):
+    """ A timer event that represents a change on its state.
+        It holds the state from which it's changing and the one it has changed
+        to.
+    """
+
+    def __init__(self, timer, old_state, new_state):
+        super().__init__(timer)
+
+        self.old_state = old_state
+        self.new_state = new_state
+
+
+class TimerPeriodEvent(TimerEvent):
+    """ A timer event that represents a change on its period.
+        It has a reference to the old period as well as the new one.
+    """
+
+    def __init__(self, timer, old_period, new_period):
+        super().__init__(timer)
+
+        self.old_period = old_period
+        self.new_period = new_period
+
+
+class TimerModifiedEvent(TimerEvent):
+    """ A timer event that represents a modification of said timer.
+        It is triggered when a user adds or removes a period or periods
+    """
+
+    def __init__(self, timer, action, final_period):
+        super().__init__(timer)
+
+        self.final_period = final_period
+        self.action = action
+
+
+class Timer:
+    """ A pomodoro timer's model: its periods, state, position and settings,
+        and the way it's displayed. It knows nothing about where it runs, see
+        `pomodorobot.timer.PomodoroTimer` for the bot's timers.
+    """
+
+    parse_format = staticmethod(parse_format)
+
+    def __init__(self, step=2, derived=False, clock=None):
+
+        # The time, in seconds, the timer advances with each tick.
+        self.step = step
+
+        # The different periods the timer has been setup with.
+        self.periods = []
+        # The cumulative-duration index over the periods. It must be rebuilt
+        # every time periods are added or removed.
+        self.schedule = ScheduleIndex()
+
+        # Whether the time is derived on demand from timestamps (True) or
+        # accumulated by the bot's timer loop on every tick (False).
+        self.derived = derived
+        # The clock derived times are computed from.
+        self._clock = system_clock if clock is None else clock
+
+        # The instant at which the timer started running, or None if it's
+        # stopped. Only used when the time is derived.
+        self._started_at = None
+        # The instant at which the timer got paused, or None if it's not.
+        self._paused_at = None
+        # The time the timer has spent paused since it started.
+        self._paused_total = 0
+        # The time elapsed since the start of the first period, counting
+        # every pass through the schedule, minus the time the timer has been
+        # running for. Only used when the time is derived.
+        self._elapsed_base = 0
+        # The elapsed time (counted as above) at which the period last
+        # announced began. Only used when the time is derived.
+        self._announced_at = 0
+
+        # The period the timer is currently at. When the time is derived,
+        # the period last announced by the bot's timer loop, which the timer
+        # may be past already (see `get_period`).
+        self._current_period = -1
+        # The current time within the period. See `curr_time`.
+        self._curr_time = 0
+
+        # The current timer's status. This should not be edited directly,
+        # as it is intended that with each change, an event is triggered.
+        # See `get_state` and `set_state`
+        self._state = None
+        self.set_state(State.STOPPED)
+        # The action the timer should react to on the next iteration of the loop
+        self.action = Action.NONE
+
+        # Whether the period list should loop or not.
+        self.repeat = True
+        # Whether the timer should count from 0 and show the "elapsed" time,
+        # or count back from the period's time and show the remaining time.
+        self.countdown = True
+
+        # The cached pieces of text used to render the timer. They are
+        # dropped when the timer is modified. See `invalidate_render`.
+        self._render = {}
+
+    def setup(self, periods_format: str, on_repeat: bool, reverse: bool):
+        """ Sets the pomodoro timer up with its periods, periods' names and
+            extra options
+
+        :param periods_format: The string to get the periods from. See
+            `parse_format` for an in-depth explanation.
+        :type periods_format: str
+
+        :param on_repeat: Whether the timer should go back to period 0 after
+            going through the complete list (True) or not (False).
+        :type on_repeat: bool
+
+        :param reverse: Whether the timer should show remaining (True) or
+            elapsed (False) time.
+        :type reverse: bool
+
+        :return: Returns a string with the periods'
+            times, separated by commas, if successful. Else, returns None.
+            If the result is None, this timer will be useless until the method
+            is ran successfully
+        """
+
+        self.repeat = on_repeat
+        self.countdown = reverse
+
+        self.periods = parse_format(periods_format)
+        if self.periods is not None:
+            self.schedule.rebuild(self.periods)
+        self._render.clear()
+
+        return ", ".join(str(period.time) for period in self.periods) if \
+            self.periods is not None else None
+
+    def add_periods(self, index, periods_info):
+        """ Adds a set of periods, created by parsing the given periods_info, at
+            the given index.
+
+        :param index: The index to add the periods at.
+        :param periods_info: The info used to create the new periods
+        :return: the amount of periods added
+        """
+
+        new_periods = parse_format(periods_info)
+
+        if new_periods is None:
+            return 0
+
+        index = len(self.periods) if index == 'n' else int(index)
+        position = self._derived_position()
+
+        self.periods[index: (len(new_periods) - 1)] = new_periods
+        self.schedule.rebuild(self.periods)
+
+        if index <= self._current_period:
+            self._current_period += len(new_periods)
+
+        if position is not None:
+            idx, offset = position
+            self._anchor(idx + len(new_periods) if index <= idx else idx,
+                         offset)
+
+        TimerModifiedEvent(self, "adding " + (
+            "period" if len(new_periods) == 1 else "periods"), None) \
+            .dispatch()
+
+        return len(new_periods)
+
+    def remove_periods(self, index, amount):
+        """ Removes a given amount of periods, from a given index.
+            If instead of removing the periods, the timer should be reset,
+            the method will do nothing but return False.
+
+        :param index: The index of the first period to remove (0 to n).
+        :param amount: The amount of periods to remove
+        :return: True if the periods were successfully removed, False otherwise,
+            e.g.: The amount of periods being removed is the same or higher than
+                the amount of periods available (use reset instead).
+        """
+
+        if index == 0 and amount >= len(self.periods):
+            return False
+
+        regulate = index <= self._current_period
+        position = self._derived_position()
+
+        del self.periods[index:(index + amount)]
+        self.schedule.rebuild(self.periods)
+
+        final_period = None
+        if regulate:
+            if index + (amount - 1) < self._current_period:
+                # current period is not deleted
+                self._current_period -= amount
+            else:
+                # current period gets deleted
+                self._current_period = min(index, len(self.periods) - 1)
+                self.curr_time = 0
+                final_period = self.periods[self._current_period]
+
+        if position is not None:
+            idx, offset = position
+            if index + (amount - 1) < idx:
+                idx -= amount
+            elif index <= idx:
+                idx, offset = min(index, len(self.periods) - 1), 0
+            self._anchor(idx, offset)
+
+        TimerModifiedEvent(self, "removing " + (
+            "period" if amount == 1 else "periods"), final_period).dispatch()
+
+        return True
+
+    def toggle_countdown(self, toggle=None):
+        """ Toggles the timer's countdown setting on or off.
+
+        :param toggle: True to turn it on, False to turn it off, None to toggle.
+        """
+        if toggle is None:
+            toggle = not self.countdown
+        if self.countdown == toggle:
+            return
+
+        self.countdown = toggle
+        TimerModifiedEvent(self, "toggling countdown" + (
+            "on" if self.countdown else "off"), None).dispatch()
+
+    def toggle_looping(self, toggle=None):
+        """ Toggles the timer's looping setting on or off.
+
+        :param toggle: True to turn it on, False to turn it off, None to toggle.
+        """
+        if toggle is None:
+            toggle = not self.repeat
+        if self.repeat == toggle:
+            return
+
+        self.repeat = toggle
+        TimerModifiedEvent(self, "toggling looping" + (
+            "on" if self.repeat else "off"), None).dispatch()
+
+    @property
+    def curr_time(self):
+        """ The time elapsed within the current period, in seconds.
+            When the time is derived, it is computed on demand (see
+            `get_period`), and setting it moves the timer within the period
+            it's in.
+        """
+
+        if self.derived:
+            position = self._derived_position()
+            return 0 if position is None else position[1]
+        return self._curr_time
+
+    @curr_time.setter
+    def curr_time(self, value):
+        if self.derived:
+            shift = value - self.curr_time
+            self._elapsed_base += shift
+            self._announced_at += shift
+        else:
+            self._curr_time = value
+
+    def tick(self, step):
+        """ Makes the time advance within the current period. Does nothing if
+            the time is derived, as it already advances on its own.
+
+        :param step: The time to advance, in seconds.
+        """
+
+        if not self.derived:
+            self._curr_time += step
+
+    def _active_time(self):
+        """ Gives the time the timer has been running for, not counting the
+            time it has spent paused.
+
+        :return: The time, in seconds, or 0 if it's not running.
+        """
+
+        if self._started_at is None:
+            return 0
+
+        until = self._clock.monotonic() if self._paused_at is None \
+            else self._paused_at
+        return until - self._started_at - self._paused_total
+
+    def _track_state(self, new_state):
+        """ Keeps the timestamps the time is derived from up to date with a
+            change of state.
+
+        :param new_state: The state the timer is changing to.
+        :type new_state: State
+        """
+
+        now = self._clock.monotonic()
+
+        if new_state == State.RUNNING:
+            if self._started_at is None:
+                # Keep whatever time was set while stopped, e.g. by `goto`.
+                self._started_at = now
+            if self._paused_at is not None:
+                self._paused_total += now - self._paused_at
+                self._paused_at = None
+
+        elif new_state == State.PAUSED:
+            if self._paused_at is None:
+                self._paused_at = now
+
+        else:
+            self._started_at = None
+            self._paused_at = None
+            self._paused_total = 0
+            self._elapsed_base = 0
+            self._announced_at = 0
+
+    def _derived_position(self):
+        """ Gives the period the timer is in and the time within it, as
+            derived from the time it has been running for.
+
+        :return: A (period index, time within the period) pair, or None if
+            the time isn't derived or the timer is not in any period.
+        """
+
+        if not self.derived or \
+                not 0 <= self._current_period < len(self.periods):
+            return None
+
+        located = self.locate(self.elapsed())
+        if located is None:
+            # Out of periods, the last one is over.
+            last = len(self.periods) - 1
+            return last, self.schedule.duration_of(last)
+        return located
+
+    def _anchor(self, idx: int, offset):
+        """ Places a derived timer at a position of its schedule, keeping
+            the period last announced.
+
+        :param idx: The index of the period to place the timer in.
+        :param offset: The time within the period, in seconds.
+        """
+
+        self._elapsed_base = self.schedule.start_of(idx) + offset - \
+            self._active_time()
+
+        # The period last announced is either this one, one behind it, or
+        # one in the previous pass through the schedule.
+        self._announced_at = self.schedule.start_of(self._current_period)
+        if self._current_period > idx:
+            self._announced_at -= self.schedule.total()
+
+    def _position(self):
+        """ Gives the period and the time within it that should be displayed.
+            When the time is derived, this is computed on demand, and may be
+            ahead of the period last announced by the bot's timer loop.
+
+        :return: A (period index, time within the period) pair.
+        """
+
+        position = self._derived_position()
+        if position is None:
+            return self._current_period, self.curr_time
+        return position
+
+    def start(self) -> bool:
+        """ Starts the timer.
+
+        :return: True if successful, False if it was already running.
+        """
+
+        if self._state == State.RUNNING:
+            return False
+
+        self.action = Action.RUN
+        return True
+
+    def pause(self) -> bool:
+        """ Pauses the timer, if it's running. Keeps all settings and
+            current period and elapsed (or remaining) time.
+
+        :return: True if the timer was running and got paused, False otherwise
+            (No need to pause then).
+        """
+
+        if self._state == State.RUNNING:
+            self.action = Action.PAUSE
+            return True
+        return False
+
+    def resume(self) -> bool:
+        """ Resumes the timer, if it was actually paused. Complains if not.
+
+        :return: True the timer was actually paused and got resumed
+            successfully, False if it was running or stopped.
+        """
+
+        if self._state == State.PAUSED:
+            self.start()
+            return True
+        return False
+
+    def stop(self) -> bool:
+        """ Attempts to stop the timer.
+
+        :return: True if the timer was running and got stopped successfully,
+            False if the timer was paused or about to be (Timer actually
+            gets stopped, cancelling the pause state/action).
+
+        """
+
+        if self._state == State.RUNNING:
+            self.action = Action.STOP
+            return True
+
+        elif self._state == State.PAUSED or self.action == Action.PAUSE:
+            self.action = Action.NONE
+            self.set_state(State.STOPPED)
+
+            self.curr_time = 0
+            self._current_period = -1
+
+            return False
+
+    def goto(self, idx: int, reset=True):
+        """ Skips to the n-th period, assuming the periods are counted 1 -> n
+            (Thus it actually jumps to [idx-1]).
+
+        :param idx: The index of the period to jump to.
+        :param reset: Whether the current time should be reset to 0 or not.
+        :return: If successful, returns the name of the new current period.
+            If not, returns None.
+        """
+
+        if 0 < idx <= len(self.periods):
+            self.set_period(idx - 1)
+            if reset:
+                self.curr_time = 0
+            return self.periods[self._current_period].name
+        return None
+
+    def elapsed(self):
+        """ Gives the time elapsed since the start of the first period,
+            within the current pass through the schedule (or, when the time
+            is derived, counting every pass).
+
+        :return: The elapsed time, in seconds, or None if the timer is not in
+            any period.
+        """
+
+        if not 0 <= self._current_period < len(self.periods):
+            return None
+        if self.derived:
+            return self._elapsed_base + self._active_time()
+        return self.schedule.start_of(self._current_period) + self.curr_time
+
+    def period_over(self) -> bool:
+        """ Tells whether the period last announced is over, meaning the
+            timer should move on to the next one (see `next_period_async`).
+
+        :return: True if the period is over, False if it isn't or the timer
+            is not in any period.
+        """
+
+        if not 0 <= self._current_period < len(self.periods):
+            return False
+
+        duration = self.schedule.duration_of(self._current_period)
+        if self.derived:
+            return self.elapsed() - self._announced_at >= duration
+        return self._curr_time >= duration
+
+    def locate(self, elapsed):
+        """ Finds the period the timer would be in after a certain amount of
+            time has passed since the start of the first period, taking
+            looping into account.
+
+        :param elapsed: The total elapsed time, in seconds.
+
+        :return: A (period index, offset within the period) pair, or None if
+            the timer would have already run out of periods.
+        """
+
+        return self.schedule.locate(elapsed, self.repeat)
+
+    def time_until(self, idx: int):
+        """ Gives the time left until the timer reaches a certain period,
+            going around the list if looping is on.
+
+        :param idx: The index of the period, from 0 to n - 1.
+        :type idx: int
+
+        :return: The time left, in seconds, or None if the period won't be
+            reached (it's behind the current one and looping is off, or the
+            timer is not in any period).
+        """
+
+        if not (0 <= idx < len(self.periods) and
+                0 <= self._current_period < len(self.periods)):
+            return None
+
+        current, offset = self._position()
+        return self.schedule.time_until(idx, current, offset, self.repeat)
+
+    def is_set(self) -> bool:
+        """ Tells whether the timer is already set up or not.
+
+        :return: True if the timer is set and ready to go, False otherwise.
+        """
+
+        return len(self.periods) > 0
+
+    def status(self) -> str:
+        """ Tells whether the timer is stopped, running or paused, as well as
+            the next timer's action.
+
+        :return: A string stating the current status, whether it's correctly set
+            up or not, and the next action it's going to take.
+        """
+
+        status = "Currently " + State.to_string(self._state).lower()
+
+        if len(self.periods) == 0:
+            status += " and not properly set up."
+        else:
+            status += "."
+
+        if not self.action == Action.NONE:
+            status += " Will soon "
+            if self.action == Action.RUN:
+                status += "start running."
+            elif self.action == Action.PAUSE:
+                status += "pause."
+            elif self.action == Action.STOP:
+                status += "stop."
+
+        return status
+
+    def time(self, extended=False) -> str:
+        """ Generates a string containing the timer's current period and time.
+
+        :param extended: Whether it should display extra information (True)
+            or keep it simple (False).
+        :return: The string with the current period and the remaining or elapsed
+            time (Depending on the value of _countdown, see Timer.setup)
+        """
+
+        if self._state == State.STOPPED:
+            return "Currently not running."
+
+        idx, curr_time = self._position()
+        period = self.periods[idx]
+
+        time = "**On " + period.name + " period** "
+
+        if extended:
+            time += "(Duration: " + pluralize(
+                period.time, "minute", append='s') + ")"
+
+        if self.countdown:
+            time += "\nRemaining:\t"
+            m, s = divmod((period.time * 60) - curr_time, 60)
+        else:
+            time += "\nElapsed:\t"
+            m, s = divmod(curr_time, 60)
+
+        h, m = divmod(m, 60)
+
+        time += "%02d:%02d:%02d" % (h, m, s)
+        del h, m, s
+
+        if self._state == State.PAUSED:
+            time += "\t**(PAUSED)**"
+
+        return time
+
+    def list_periods(self, compact=False):
+        """ Generates a list of the periods as a string, flagging the
+            current one.
+        :return: The list of periods, specifying which one is the current one.
+        """
+
+        if compact:
+            if 'compact' not in self._render:
+                self._render['compact'] = ', '.join(str(period.time)
+                                                    for period in self.periods)
+            return self._render['compact']
+
+        current = self.get_period()
+        cached = self._render.get('list')
+        if cached is not None and cached[0] == current:
+            return cached[1]
+
+        if 'lines' not in self._render:
+            self._render['lines'] = [
+                "\n`{}` {}: {}".format(str(i + 1), period.name,
+                                       pluralize(period.time,
+                                                     "minute", append='s'))
+                for i, period in enumerate(self.periods)]
+        lines = self._render['lines']
+
+        p_list = "**Period list (Loop is {}):**".format("ON" if self.repeat
+                                                        else "OFF")
+        if 0 <= current < len(lines):
+            p_list += "".join(lines[:current + 1]) + \
+                "\t-> _You are here!_" + \
+                "".join(lines[current + 1:])
+        else:
+            p_list += "".join(lines)
+
+        self._render['list'] = (current, p_list)
+        return p_list
+
+    def show_status(self) -> str:
+        """ Show the timer's status, including the setup, time, and users
+            subscribed.
+
+        :return: The status of the timer.
+        """
+
+        time = self.time()
+        subs_version = self.get_subs_version()
+
+        cached = self._render.get('status')
+        if cached is not None and cached[0] == (time, subs_version):
+            return cached[1]
+
+        if 'setup' not in self._render:
+            self._render['setup'] = (
+                "```\n  Setup       || " + self.list_periods(True) +
+                "\n\t Looping  : " + ("On" if self.repeat else "Off") +
+                "\n\t Countdown: " + ("On" if self.countdown else "Off"))
+        status = self._render['setup']
+
+        # Current status
+        status += "\n  Status      || "
+        status += "\n\t\t\t\t ".join(l for l in time.split('\n'))
+
+        # Users subscribed
+        subscribed = self.get_users_subscribed()
+        status += "\n  Subscribed  || "
+        status += ", ".join(get_name(m, True) for m in subscribed)
+        status += "." if len(subscribed) > 0 else ""
+
+        status += "\n```"
+        self._render['status'] = ((time, subs_version), status)
+        return status
+
+    def summary(self) -> str:
+        """ Sums the timer up in a single line: its state, its current period
+            and time (if it's in one), and how many users are subscribed.
+
+        :return: The summary.
+        """
+
+        running = self._state in (State.RUNNING, State.PAUSED) and \
+            0 <= self._current_period < len(self.periods)
+
+        idx, left = -1, 0
+        if running:
+            idx, curr_time = self._position()
+            left = int(max(0, self.periods[idx].time * 60 - curr_time))
+
+        key = (self._state, idx, left // 60, self.get_subs_version())
+        cached = self._render.get('summary')
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        summary = (State.to_string(self._state) or "Not set up").capitalize()
+        if running:
+            summary += " · {} ({} left)".format(
+                self.periods[idx].name,
+                pluralize(left // 60, "minute", append='s')
+                if left >= 60 else "under a minute")
+
+        subscribed = len(self.get_users_subscribed())
+        if subscribed > 0:
+            summary += " · {} subscribed".format(subscribed)
+
+        self._render['summary'] = (key, summary)
+        return summary
+
+    def invalidate_render(self, e):
+        """ Drops the cached text that an event makes outdated.
+            Modifications drop everything, while period changes only drop the
+            assembled texts, since the lines of each period stay the same.
+
+        :param e: The event the timer went through.
+        :type e: TimerEvent
+        """
+
+        if isinstance(e, TimerModifiedEvent):
+            self._render.clear()
+        elif isinstance(e, TimerPeriodEvent):
+            self._render.pop('list', None)
+            self._render.pop('status', None)
+
+    def get_period(self, natural=False):
+        """ Gives the period index of the period the timer is currently in.
+            When the time is derived, it's computed on demand, and may be
+            ahead of the period last announced (see `announced_period`).
+
+        :param natural: Whether the given index should be counted from 1 to 'n'
+            (True) or from 0 to 'n' (False).
+        :type natural: bool
+
+        :return: The index.
+        """
+
+        position = self._derived_position()
+        idx = self._current_period if position is None else position[0]
+        return idx + (1 if natural else 0)
+
+    def announced_period(self, natural=False):
+        """ Gives the index of the period the bot's timer loop last moved the
+            timer to, and announced. It's the same as `get_period` unless
+            the time is derived.
+
+        :param natural: Whether the given index should be counted from 1 to 'n'
+            (True) or from 0 to 'n' (False).
+        :type natural: bool
+
+        :return: The index.
+        """
+
+        return self._current_period + (1 if natural else 0)
+
+    def get_state(self):
+        """ Gives the state the timer is currently in.
+
+        :return: The state. See `State`.
+        """
+        return self._state
+
+    def set_period(self, idx: int):
+        """ Sets the current period to the index specified.
+            It also triggers a TimerPeriodEvent.
+
+        :param idx: The new current period index.
+        :type idx: int. Must be 0 <= idx < len(periods) or -1.
+        """
+
+        e = self._change_period(idx)
+        if e is not None:
+            e.dispatch()
+
+    async def set_period_async(self, idx: int):
+        """ Sets the current period to the index specified, waiting for the
+            listeners of the TimerPeriodEvent it triggers to have room for
+            it. See `TimerEvent.dispatch_async`.
+
+        :param idx: The new current period index.
+        :type idx: int. Must be 0 <= idx < len(periods) or -1.
+        """
+
+        e = self._change_period(idx)
+        if e is not None:
+            await e.dispatch_async()
+
+    async def next_period_async(self):
+        """ Moves on to the period after the one last announced, once it's
+            over (see `period_over`), going back to the first one after the
+            last. It triggers a TimerPeriodEvent, waiting for its listeners
+            to have room for it (see `TimerEvent.dispatch_async`).
+
+            When the time is derived, the timer is already past the period,
+            so only the period announced changes.
+        """
+
+        if not 0 <= self._current_period < len(self.periods):
+            return
+
+        duration = self.schedule.duration_of(self._current_period)
+        old_period = self.periods[self._current_period]
+
+        if self.derived:
+            self._announced_at += duration
+        else:
+            self._curr_time -= duration
+        self._current_period = (self._current_period + 1) % len(self.periods)
+
+        await TimerPeriodEvent(self, old_period,
+                               self.periods[self._current_period])\
+            .dispatch_async()
+
+    def set_state(self, new_state: State):
+        """ Sets the timer to a certain state.
+            Also triggers a TimerStateEvent
+
+        :param new_state: The state to set the timer to.
+        :type new_state: State
+        """
+
+        e = self._change_state(new_state)
+        if e is not None:
+            e.dispatch()
+
+    async def set_state_async(self, new_state: State):
+        """ Sets the timer to a certain state, waiting for the listeners of
+            the TimerStateEvent it triggers to have room for it. See
+            `TimerEvent.dispatch_async`.
+
+        :param new_state: The state to set the timer to.
+        :type new_state: State
+        """
+
+        e = self._change_state(new_state)
+        if e is not None:
+            await e.dispatch_async()
+
+    def _change_period(self, idx: int):
+        """ Sets the current period, without dispatching the event.
+
+        :return: The TimerPeriodEvent to dispatch, or None if the index is
+            out of range.
+        """
+
+        if not (idx == -1 or 0 <= idx < len(self.periods)):
+            return None
+
+        old_period = self.periods[self._current_period] if \
+            0 <= self._current_period < len(self.periods) else None
+        new_period = self.periods[idx] if \
+            0 <= idx < len(self.periods) else None
+
+        # A derived timer keeps its time within the period it's in.
+        offset = self.curr_time
+        self._current_period = idx
+        if self.derived and idx != -1:
+            self._anchor(idx, offset)
+
+        return TimerPeriodEvent(self, old_period, new_period)
+
+    def _change_state(self, new_state: State):
+        """ Sets the state, without dispatching the event.
+
+        :return: The TimerStateEvent to dispatch, or None if the state didn't
+            change.
+        """
+
+        if self._state == new_state:
+            return None
+
+        e = TimerStateEvent(self, self._state, new_state)
+        self._track_state(new_state)
+        self._state = new_state
+        return e
+
+    def get_channel_id(self):
+        """ Gets the ID of the channel in which this timer is running.
+
+        :return: The channel's ID, or None if it's not running in one.
+        """
+        return None
+
+    def get_server_id(self):
+        """ Gets the ID of the server in which this timer is running.
+
+        :return: The server's ID, or None if it's not running in one.
+        """
+        return None
+
+    def get_users_subscribed(self):
+        """ Gets the users subscribed to this timer.
+
+        :return: A collection of the users.
+        """
+        return {}
+
+    def get_subs_version(self) -> int:
+        """ Gets a number that changes every time someone subscribes to or
+            un-subscribes from this timer.
+
+        :return: The number.
+        """
+        return 0
@@ -1,18 +1,95 @@
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime
+from sqlalchemy import create_engine, event, Column, Integer, String, \
+    DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from discord.user import User
 
 import pomodorobot.lib as lib
+import pomodorobot.metrics as metrics
+
+from pomodorobot.tracing import tracer
 
 DB_DEBUG = False
+DB_URL = 'sqlite:///test.db'
 
-engine = create_engine('sqlite:///test.db', echo=DB_DEBUG, encoding='utf-8')
 SqlBase = declarative_base()
 
+# The engine and the session factory. Both are created, and the tables
+# checked, the first time the database is used (see `get_engine`).
+_engine = None
+SqlSession = sessionmaker()
+
+
+def get_engine():
+    """ Gives the database engine, creating it and the tables it lacks if it's
+        the first time the database is used.
+
+    :return: The engine.
+    """
+
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    started = time.perf_counter()
+
+    _engine = create_engine(DB_URL, echo=DB_DEBUG, encoding='utf-8')
+    event.listen(_engine, 'connect', _set_sqlite_pragmas)
+    event.listen(_engine, 'before_cursor_execute', _before_execute)
+    event.listen(_engine, 'after_cursor_execute', _after_execute)
+
+    SqlBase.metadata.create_all(_engine)
+    SqlSession.configure(bind=_engine)
+
+    lib.log("Database initialized in {:.3f}s."
+            .format(time.perf_counter() - started))
+    return _engine
+
+
+def dispose():
+    """ Closes the engine's pooled connections, if it has been created. Must be
+        called by processes that may have inherited them (see
+        `pomodorobot.launcher`).
+    """
+
+    if _engine is not None:
+        _engine.dispose()
+
+
+def _set_sqlite_pragmas(dbapi_connection, _):
+    """ Puts SQLite in write-ahead-log mode, so several bot processes (see
+        `pomodorobot.launcher`) can share the database, with readers never
+        blocking the writer.
+    """
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def _before_execute(conn, cursor, statement, parameters, context, *_):
+    # Kept on the statement's own context, which goes away with it even if
+    # the statement fails and `_after_execute` never runs.
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, *_):
+    """ Records the time a statement took in the current command's trace.
+    """
+
+    started = getattr(context, '_query_start', None)
+    if started is None:
+        return
+    tracer.record('db', statement.split(None, 1)[0],
+                  time.perf_counter() - started)
+
 
 class TimerUser(SqlBase):
     __tablename__ = 'timer_users'
@@ -38,8 +115,28 @@ class TimerUser(SqlBase):
                     self.last_seen, self.last_session, self.total_recorded)
 
 
-SqlBase.metadata.create_all(engine)
-SqlSession = sessionmaker(bind=engine)
+class TimerSnapshot(SqlBase):
+    __tablename__ = 'timer_snapshots'
+
+    # The database ID
+    id = Column(Integer, primary_key=True)
+    # The shard running the timer
+    shard = Column(Integer, index=True)
+    # The discord ID of the timer's channel
+    channel_id = Column(String, index=True, unique=True)
+    # The discord ID of the timer's server
+    server_id = Column(String, index=True)
+    # The channel's mention, stored so other shards can show it
+    mention = Column(String)
+    # The timer's status line, as given by `PomodoroTimer.summary`
+    status = Column(String)
+
+    # When the snapshot was taken
+    updated = Column(DateTime)
+
+    def __repr__(self):
+        return "pomodorobot.dbmanager.TimerSnapshot: [{}]\n<{}/{}>\n\t{}"\
+            .format(self.id, self.shard, self.channel_id, self.updated)
 
 
 class SqlManager:
@@ -47,7 +144,61 @@ class SqlManager:
     """
 
     def __init__(self):
-        self._sql_session = SqlSession()
+        self._session = None
+        # How many `batch` blocks are open. While any is, commits are held
+        # back until the outermost one ends.
+        self._batching = 0
+
+    @property
+    def _sql_session(self):
+        """ The manager's session, opened (along with the database) the first
+            time it's needed.
+        """
+
+        if self._session is None:
+            get_engine()
+            self._session = SqlSession()
+        return self._session
+
+    def identity_map_size(self) -> int:
+        """ Gives the amount of records the session holds on to.
+        """
+
+        return 0 if self._session is None else len(self._session.identity_map)
+
+    @contextmanager
+    def batch(self):
+        """ Groups every write made within it in a single transaction, which
+            is committed at the end (or rolled back, if an exception is
+            raised).
+        """
+
+        self._batching += 1
+        try:
+            yield self
+        except Exception:
+            self._batching -= 1
+            if self._batching == 0:
+                self._sql_session.rollback()
+            raise
+        else:
+            self._batching -= 1
+            if self._batching == 0:
+                with metrics.DB_COMMIT.time(), tracer.span('db', 'COMMIT'):
+                    self._sql_session.commit()
+
+    def _commit(self):
+        if self._batching > 0:
+            self._sql_session.flush()
+            return
+
+        try:
+            with metrics.DB_COMMIT.time(), tracer.span('db', 'COMMIT'):
+                self._sql_session.commit()
+        except Exception:
+            # Leaves the session usable by the next writes.
+            self._sql_session.rollback()
+            raise
 
     def get_record(self, user: User):
         record = self._sql_session.query(TimerUser)\
@@ -57,7 +208,7 @@ class SqlManager:
                     " registry will be created.".format(str(user)))
             record = TimerUser(discord_id=user.id, name=str(user))
             self._sql_session.add(record)
-            self._sql_session.commit()
+            self._commit()
 
         return record
 
@@ -94,7 +245,7 @@ class SqlManager:
         record.last_seen = attendance
 
         self._sql_session.add(record)
-        self._sql_session.commit()
+        self._commit()
 
     def set_user_last_session(self, user: User, session: int):
         record = self.get_record(user)
@@ -105,14 +256,79 @@ class SqlManager:
             record.total_recorded = session
 
         self._sql_session.add(record)
-        self._sql_session.commit()
+        self._commit()
 
     def set_user_total(self, user: User, total: int):
         record = self.get_record(user)
         record.last_session = total
 
         self._sql_session.add(record)
-        self._sql_session.commit()
+        self._commit()
+
+    def set_timer_snapshots(self, shard: int, snapshots):
+        """ Replaces the timer snapshots of a shard.
+
+            It uses a session of its own, rather than the manager's, so it
+            can be run off the event loop (e.g. through `run_in_executor`)
+            while the database is locked by another shard.
+
+        :param shard: The ID of the shard the timers belong to.
+        :type shard: int
+
+        :param snapshots: The new snapshots, as tuples of
+            (channel ID, server ID, channel mention, status).
+        """
+        get_engine()
+        session = SqlSession()
+        try:
+            session.query(TimerSnapshot).filter_by(shard=shard).delete()
+
+            now = datetime.utcnow()
+            for channel_id, server_id, mention, status in snapshots:
+                session.add(TimerSnapshot(
+                    shard=shard, channel_id=channel_id, server_id=server_id,
+                    mention=mention, status=status, updated=now))
+
+            with metrics.DB_COMMIT.time():
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_timer_snapshots(self, exclude_shard=None, server_id=None,
+                            offset=0, limit=None):
+        """ Gives the timer snapshots, ordered by shard.
+
+        :param exclude_shard: If given, leaves out the snapshots of this shard.
+        :param server_id: If given, only gives the snapshots of this server.
+        :param offset: The amount of snapshots to skip.
+        :param limit: If given, the maximum amount of snapshots to give.
+
+        :return: The list of snapshots.
+        """
+        query = self._snapshots_query(exclude_shard, server_id)\
+            .order_by(TimerSnapshot.shard, TimerSnapshot.id).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query.all()
+
+    def count_timer_snapshots(self, exclude_shard=None, server_id=None):
+        return self._snapshots_query(exclude_shard, server_id).count()
+
+    def _snapshots_query(self, exclude_shard, server_id):
+        query = self._sql_session.query(TimerSnapshot)
+        if exclude_shard is not None:
+            query = query.filter(TimerSnapshot.shard != exclude_shard)
+        if server_id is not None:
+            query = query.filter(TimerSnapshot.server_id == server_id)
+        return query
+
+    def clear_timer_snapshots(self, shard: int):
+        self._sql_session.query(TimerSnapshot).filter_by(shard=shard).delete()
+        self._commit()
 
 
 db_manager = SqlManager()
@@ -0,0 +1,315 @@
+import time
+import array
+import signal
+import struct
+import asyncio
+import logging
+import multiprocessing
+
+import pomodorobot.core.logs as logs
+
+from pomodorobot.core.schedule import ScheduleIndex
+
+# Every message starts with its operation, the ID of the channel whose timer
+# it's about, and the generation of that timer (increased by every OP_RUN, so
+# messages about a timer's previous run can be told apart and ignored).
+HEADER = struct.Struct('<BQI')
+
+# Messages to the engine.
+# Runs a timer: looping, step, period index and time within the period,
+# followed by the duration of each period (as doubles, in seconds).
+OP_RUN = 1
+RUN = struct.Struct('<?did')
+# Stops running a timer. No payload.
+OP_UNLOAD = 2
+# Stops the engine. No payload.
+OP_QUIT = 3
+
+# Messages from the engine.
+# A step went by: period index and time within the period.
+EV_TICK = 101
+TICK = struct.Struct('<id')
+# The timer moved on to the next period: old and new period indexes. The new
+# index is -1 if the timer ran out of periods, in which case it's unloaded.
+EV_PERIOD = 102
+PERIOD = struct.Struct('<ii')
+# The engine stopped working. Never sent, only given to those waiting.
+EV_LOST = 199
+
+
+class EngineTimer:
+    """ The engine's side of a timer: its schedule, and the instants from which
+        its position in the schedule is derived.
+    """
+
+    def __init__(self, generation, durations, repeat, step):
+        self.generation = generation
+
+        self.schedule = ScheduleIndex()
+        self.schedule.rebuild_durations(durations)
+        self.repeat = repeat
+        self.step = step
+
+        # The period last announced, and how many times the schedule has been
+        # gone through.
+        self.period = -1
+        self.cycle = 0
+
+        # The instant at which the timer was `_anchored` seconds into the
+        # schedule.
+        self._anchor = None
+        self._anchored = 0
+
+        # The instant at which the next tick is due.
+        self.next_tick = None
+
+    def run(self, idx: int, offset, now):
+        self.period = idx
+        self.cycle = 0
+
+        self._anchor = now
+        self._anchored = self.schedule.start_of(idx) + offset
+
+        self.next_tick = now + self.step
+
+    def advance(self, now):
+        """ Moves the timer up to the given instant.
+
+        :return: The list of (event, a, b) messages to send, in order.
+        """
+
+        total = self.schedule.total()
+        elapsed = self._anchored + (now - self._anchor)
+
+        located = self.schedule.locate(elapsed, self.repeat)
+        target = (-1, 0) if located is None else \
+            (located[0], int(elapsed // total))
+
+        events = []
+        while (self.period, self.cycle) != target and self.period != -1:
+            old = self.period
+            self.period += 1
+            if self.period >= len(self.schedule):
+                self.period = 0 if self.repeat else -1
+                self.cycle += 1
+            events.append((EV_PERIOD, old, self.period))
+
+        if self.period == -1:
+            self.next_tick = None
+            return events
+
+        events.append((EV_TICK, self.period, located[1]))
+        while self.next_tick <= now:
+            self.next_tick += self.step
+
+        return events
+
+
+def serve(conn):
+    """ Runs the engine, taking orders from and sending events through a
+        connection until told to quit or until the connection is closed.
+
+    :param conn: The engine's end of the pipe.
+    :type conn: multiprocessing.connection.Connection
+    """
+
+    # Interruptions are handled by the bot's process.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    timers = {}
+    while True:
+        due = [t.next_tick for t in timers.values() if t.next_tick is not None]
+        timeout = None if not due else max(0, min(due) - time.monotonic())
+
+        if conn.poll(timeout):
+            try:
+                data = conn.recv_bytes()
+            except EOFError:
+                return
+
+            op, channel, generation = HEADER.unpack_from(data)
+            if op == OP_QUIT:
+                return
+            elif op == OP_UNLOAD:
+                timers.pop(channel, None)
+            elif op == OP_RUN:
+                repeat, step, idx, offset = RUN.unpack_from(data, HEADER.size)
+                durations = array.array('d')
+                durations.frombytes(data[HEADER.size + RUN.size:])
+
+                timer = EngineTimer(generation, durations, repeat, step)
+                timer.run(idx, offset, time.monotonic())
+                timers[channel] = timer
+
+        now = time.monotonic()
+        for channel, timer in list(timers.items()):
+            if timer.next_tick is None or timer.next_tick > now:
+                continue
+
+            for event, a, b in timer.advance(now):
+                payload = (TICK if event == EV_TICK else PERIOD).pack(a, b)
+                conn.send_bytes(HEADER.pack(event, channel, timer.generation) +
+                                payload)
+
+            if timer.period == -1:
+                del timers[channel]
+
+
+class EngineClient:
+    """ Runs the timer engine in its own process and talks to it through a
+        pipe, so timers keep their pace no matter how busy the bot's event
+        loop is.
+
+        The engine keeps each timer's schedule and clock, and decides when
+        each period ends, which one comes next and when the timer runs out of
+        them. It sends back a tick for every step and an event for every
+        period change, which the bot's timer loop waits on instead of sleeping
+        and applies as they come. Announcing the changes, keeping the journal
+        and tracking inactivity are still up to the bot, as its loop gets to
+        them.
+    """
+
+    def __init__(self, loop=None):
+        self.loop = asyncio.get_event_loop() if loop is None else loop
+
+        # Whether the engine is up and running.
+        self.alive = False
+
+        self._conn = None
+        self._process = None
+
+        # The current generation of each timer, and the events received for
+        # it, by channel ID.
+        self._generations = {}
+        self._queues = {}
+
+    def start(self):
+        """ Starts the engine process.
+        """
+
+        conn, engine_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=serve, args=(engine_conn,), name="timer-engine",
+            daemon=True)
+        self._process.start()
+        engine_conn.close()
+
+        self._conn = conn
+        self.loop.add_reader(conn.fileno(), self._receive)
+        self.alive = True
+
+        logs.log("Started the timer engine (pid {}).".format(self._process.pid))
+
+    def stop(self, timeout=5):
+        """ Stops the engine process.
+
+        :param timeout: The time, in seconds, to wait for the process to end.
+        """
+
+        if not self.alive:
+            return
+
+        self._send(OP_QUIT, 0, 0)
+        self._close()
+        self._process.join(max(0, timeout))
+
+    def run(self, channel_id: str, timer):
+        """ Makes the engine run a timer from its current period and time,
+            replacing any previous run of it.
+
+        :param channel_id: The ID of the timer's channel.
+        :param timer: The timer to run.
+        :type timer: pomodorobot.timer.PomodoroTimer
+        """
+
+        channel = int(channel_id)
+        generation = self._generations.get(channel, 0) + 1
+        self._generations[channel] = generation
+
+        queue = self._queue(channel)
+        while not queue.empty():
+            queue.get_nowait()
+
+        durations = array.array('d', (p.time * 60 for p in timer.periods))
+        self._send(OP_RUN, channel, generation,
+                   RUN.pack(timer.repeat, timer.step, timer.get_period(),
+                            timer.curr_time) + durations.tobytes())
+
+    def unload(self, channel_id: str):
+        """ Makes the engine stop running a timer.
+
+        :param channel_id: The ID of the timer's channel.
+        """
+
+        channel = int(channel_id)
+        self._generations[channel] = self._generations.get(channel, 0) + 1
+        self._queues.pop(channel, None)
+
+        self._send(OP_UNLOAD, channel, self._generations[channel])
+
+    async def next_event(self, channel_id: str):
+        """ Waits for the engine's next event about a timer. Ticks that queued
+            up while nobody was waiting are merged into the latest one.
+
+        :param channel_id: The ID of the timer's channel.
+
+        :return: An (event, a, b) tuple. See the EV_* constants.
+        """
+
+        queue = self._queue(int(channel_id))
+        event = await queue.get()
+        while event[0] == EV_TICK and not queue.empty():
+            event = queue.get_nowait()
+        return event
+
+    def pending(self) -> int:
+        """ Gives the amount of events received and not yet waited for.
+
+        :return: The amount of events, for every timer.
+        """
+
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def _queue(self, channel: int) -> asyncio.Queue:
+        if channel not in self._queues:
+            self._queues[channel] = asyncio.Queue()
+        return self._queues[channel]
+
+    def _send(self, op, channel, generation, payload=b''):
+        if not self.alive:
+            return
+        try:
+            self._conn.send_bytes(HEADER.pack(op, channel, generation) +
+                                  payload)
+        except (OSError, EOFError):
+            self._lost()
+
+    def _receive(self):
+        try:
+            while self._conn.poll():
+                data = self._conn.recv_bytes()
+                event, channel, generation = HEADER.unpack_from(data)
+                if generation != self._generations.get(channel):
+                    continue
+
+                a, b = (TICK if event == EV_TICK else PERIOD)\
+                    .unpack_from(data, HEADER.size)
+                self._queue(channel).put_nowait((event, a, b))
+        except (OSError, EOFError):
+            self._lost()
+
+    def _lost(self):
+        logs.log("Lost the timer engine, timers will run locally.",
+                 level=logging.ERROR)
+        self._close()
+
+        for queue in self._queues.values():
+            queue.put_nowait((EV_LOST, 0, 0))
+
+    def _close(self):
+        self.alive = False
+        try:
+            self.loop.remove_reader(self._conn.fileno())
+        except (OSError, ValueError):
+            pass
+        self._conn.close()
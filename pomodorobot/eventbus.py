@@ -0,0 +1,4 @@
+# The event bus lives in `pomodorobot.core`, and is kept available from here
+# for the bot's code.
+from pomodorobot.core.eventbus import Overflow, Subscription, EventBus, \
+    bus
@@ -1,13 +1,19 @@
-from datetime import datetime
+import os
+import time
 
+import discord
 from discord.ext import commands
 
 import pomodorobot.lib as lib
 import pomodorobot.config as config
+import pomodorobot.memory as memory
+import pomodorobot.metrics as metrics
+import pomodorobot.profiling as profiling
 import pomodorobot.ext.checks as checks
 
 from pomodorobot.bot import PomodoroBot
 from pomodorobot.timer import State
+from pomodorobot.watchdog import watchdog
 
 
 class Admin:
@@ -87,7 +93,7 @@ class Admin:
         interface = self.bot.get_interface(server.get_channel(channel_id),
                                            False)
         author_name = lib.get_author_name(ctx, True)
-        member_name = lib.get_name(user, True)
+        member_name = user_id if user is None else lib.get_name(user, True)
         if interface is None:
             lib.log("{} tried to subscribe {} to {}, "
                     "but the channel was not found or had no interface"
@@ -113,7 +119,7 @@ class Admin:
                                             ), channel_id=channel_id)
                 return
 
-            interface.add_sub(user, datetime.now())
+            interface.add_sub(user, self.bot.clock.now())
             lib.log("{} forcefully subscribed {} to {}."
                     .format(author_name, member_name, "this channel" if
                             channel_id is None else "channel with id=" +
@@ -148,7 +154,7 @@ class Admin:
         interface = self.bot.get_interface(server.get_channel(channel_id),
                                            False)
         author_name = lib.get_author_name(ctx, True)
-        member_name = lib.get_name(user, True)
+        member_name = user_id if user is None else lib.get_name(user, True)
         if interface is None:
             lib.log("{} tried to unsubscribe {} from {}, "
                     "but the channel was not found or had no interface"
@@ -202,6 +208,7 @@ class Admin:
             return
 
         spoofed_channel = lib.get_server(ctx).get_channel(spoofed_id)
+        interface = self.bot.get_interface(channel, generate=False)
 
         if spoofed_id is not None:
             self.bot.get_interface(channel).spoofed = spoofed_channel
@@ -209,8 +216,8 @@ class Admin:
             send = "Now acting in channel " + spoofed_channel.name
             log = "Now acting as if in " + spoofed_channel.name
 
-        elif self.bot.get_interface(channel).spoofed is not None:
-            self.bot.get_interface(channel).spoofed = None
+        elif interface is not None and interface.spoofed is not None:
+            interface.spoofed = None
 
             send = "Now acting in current channel"
             log = "Spoofing now off"
@@ -235,11 +242,269 @@ class Admin:
             lib.debug(True)
             level = "debug"
             state = "on"
+            self.bot.check_timers()
 
         lib.log("Switching to {}-level logging".format(level))
         await self.bot.say("Debug mode {}.".format(state),
                            delete_after=self.bot.ans_lifespan)
 
+    @admin_cmd.command(name="stats")
+    async def admin_stats(self):
+        """ Shows a summary of the bot's metrics.
+        """
+
+        def times(histogram, key=()):
+            summary = histogram.summary(key)
+            if summary is None:
+                return "no data"
+            return "avg {:.0f}ms, p95 {:.0f}ms, max {:.0f}ms ({})".format(
+                summary['mean'] * 1000, summary['p95'] * 1000,
+                summary['max'] * 1000, summary['count'])
+
+        embed = discord.Embed(title="Stats")
+
+        embed.add_field(
+            name="Timers", inline=False,
+            value="{}, {} subscribed.\nTick drift: {}".format(
+                ", ".join("{} {}".format(count, state)
+                          for (state,), count in
+                          metrics.ACTIVE_TIMERS.samples_by_key().items()),
+                lib.pluralize(metrics.SUBSCRIBERS.value(), "user",
+                              append='s'),
+                times(metrics.TICK_DRIFT)))
+
+        stalls = metrics.LOOP_STALLS.summary()
+        embed.add_field(
+            name="Event loop lag", inline=False,
+            value="{}\nStalls: {}".format(
+                times(metrics.LOOP_LAG), "none" if stalls is None else
+                "{}, longest {:.1f}s, last at {} ({:.1f}s)".format(
+                    stalls['count'], stalls['max'],
+                    time.strftime('%H:%M:%S',
+                                  time.localtime(watchdog.last_stall[0])),
+                    watchdog.last_stall[1])))
+
+        routes = sorted(metrics.DISCORD_LATENCY.keys())
+        embed.add_field(
+            name="Discord ({} rate limited, {} failed)".format(
+                int(metrics.RATE_LIMITED.total()),
+                int(metrics.DISCORD_ERRORS.total())),
+            inline=False,
+            value="\n".join("{}: {}".format(route, times(
+                metrics.DISCORD_LATENCY, (route,))) for (route,) in routes)
+            if routes else "no data")
+
+        embed.add_field(name="Database commits", inline=False,
+                        value=times(metrics.DB_COMMIT))
+
+        depths = metrics.QUEUE_DEPTH.samples_by_key()
+        interfaces = self.bot.interfaces.stats()
+        embed.add_field(
+            name="Queues and interfaces", inline=False,
+            value="Queued: {} (deepest {}).\nInterfaces: {size} held, "
+                  "{peak} at most, {created} created, {evicted} evicted, "
+                  "{misses} missed lookups.".format(
+                      sum(depths.values()),
+                      max(depths.values()) if depths else 0, **interfaces))
+
+        tasks = metrics.TASKS.samples_by_key()
+        embed.add_field(
+            name="Background tasks ({} failed, {} dropped)".format(
+                int(metrics.TASK_ERRORS.total()),
+                int(metrics.TASKS_DROPPED.total())),
+            inline=False,
+            value="\n".join("{}: {} running, {} queued, {} delayed".format(
+                group, tasks.get((group, 'running'), 0),
+                tasks.get((group, 'queued'), 0),
+                tasks.get((group, 'delayed'), 0))
+                for group in sorted(set(group for group, _ in tasks)))
+            or "none")
+
+        await self.bot.say(embed=embed, delete_after=self.bot.ans_lifespan * 3)
+
+    @admin_cmd.command(name="latency")
+    async def admin_latency(self, count=10):
+        """ Shows how long the slowest commands take, and where the time goes.
+
+        :param count: The amount of commands to show. Defaults to 10.
+        :type count: int
+        """
+
+        summaries = [(command, metrics.COMMAND_LATENCY.summary((command,)))
+                     for (command,) in metrics.COMMAND_LATENCY.keys()]
+        summaries.sort(key=lambda item: item[1]['p95'], reverse=True)
+
+        lines = []
+        for command, summary in summaries[:max(1, count)]:
+            stages = []
+            for stage in ('checks', 'db', 'send', 'handler'):
+                stage_summary = metrics.COMMAND_STAGES.summary(
+                    (command, stage))
+                if stage_summary is not None:
+                    stages.append("{} {:.0f}".format(
+                        stage, stage_summary['mean'] * 1000))
+
+            lines.append("**{}** ({}): p50 {:.0f}ms, p95 {:.0f}ms, p99 {:.0f}ms"
+                         "\n\tavg ms: {}"
+                         .format(command, summary['count'],
+                                 summary['p50'] * 1000, summary['p95'] * 1000,
+                                 summary['p99'] * 1000, ", ".join(stages)))
+
+        embed = discord.Embed(
+            title="Command latency",
+            description="\n".join(lines) if lines else
+            "No commands handled yet.")
+
+        await self.bot.say(embed=embed, delete_after=self.bot.ans_lifespan * 3)
+
+    @admin_cmd.command(name="drivers")
+    async def admin_drivers(self, count=20):
+        """ Lists the drivers making the timers run, and the running timers
+            that have none.
+
+        :param count: The amount of drivers to list. Defaults to 20.
+        :type count: int
+        """
+
+        drivers = sorted(self.bot.runtime.drivers(),
+                         key=lambda driver: driver.started)
+
+        lines = []
+        for driver in drivers[:max(1, count)]:
+            interface = self.bot.get_interface(driver.channel, False)
+            timer = None if interface is None else interface.timer
+            lines.append("{} ({}): {}, since {:%H:%M:%S}, {}".format(
+                driver.channel.name, driver.channel.server.name,
+                "no timer" if timer is None or timer.get_state() is None
+                else timer.get_state().name.lower(), driver.started,
+                lib.pluralize(driver.runs, "run", append='s')))
+        if len(drivers) > count:
+            lines.append("...and {} more.".format(len(drivers) - count))
+
+        undriven = [channel for channel in
+                    self.bot.valid_timers(State.RUNNING)
+                    if not self.bot.runtime.is_driven(channel)]
+        if undriven:
+            lines.append("\nRunning without a driver: {}".format(
+                ", ".join(channel.name for channel in undriven)))
+
+        embed = discord.Embed(
+            title="Timer drivers ({})".format(len(drivers)),
+            description="\n".join(lines) if lines else "No timers running.")
+
+        await self.bot.say(embed=embed, delete_after=self.bot.ans_lifespan * 3)
+
+    @admin_cmd.command(name="profile")
+    @commands.check(checks.is_admin)
+    async def admin_profile(self, seconds: int):
+        """ Profiles the bot for some seconds, and shows the functions that
+            took the most time. The full profile is written to a file.
+            This command is administrator-only.
+
+        :param seconds: The time to profile for.
+        :type seconds: int
+        """
+
+        cfg = config.get_config()
+        max_seconds = cfg.get_int('profiling.max_seconds')
+        if not 0 < seconds <= max_seconds:
+            await self.bot.say("Profiles can last between 1 and {} seconds."
+                               .format(max_seconds),
+                               delete_after=self.bot.ans_lifespan)
+            return
+
+        if profiling.is_capturing():
+            await self.bot.say("A profile is already being captured.",
+                               delete_after=self.bot.ans_lifespan)
+            return
+
+        await self.bot.say("Profiling for {}...".format(
+            lib.pluralize(seconds, "second", append='s')),
+            delete_after=self.bot.ans_lifespan)
+
+        try:
+            path, hottest = await profiling.capture(
+                seconds, cfg.get_str('profiling.directory'))
+        except profiling.ProfilerBusy:
+            await self.bot.say("Another profiler is running, try again later.",
+                               delete_after=self.bot.ans_lifespan)
+            return
+
+        lines = ["{:>8.1f}ms {:>8.1f}ms {:>7}  {}".format(
+            own * 1000, cumulative * 1000, calls, function[-60:])
+            for function, calls, own, cumulative in hottest]
+
+        await self.bot.say("Profile written to `{}`. Hottest functions:\n"
+                           "```\n{:>10} {:>10} {:>7}  {}\n{}\n```"
+                           .format(path, "own", "total", "calls", "function",
+                                   "\n".join(lines)),
+                           delete_after=self.bot.ans_lifespan * 4)
+
+    @admin_cmd.command(name="memory")
+    @commands.check(checks.is_admin)
+    async def admin_memory(self, action: str = None):
+        """ Shows the amount of objects each part of the bot holds on to,
+            and what allocated the most memory since the last call. The first
+            call starts tracing the allocations, which slows the bot down:
+            `!admin memory stop` stops it. This command is
+            administrator-only.
+
+        :param action: 'stop' to stop tracing the allocations.
+        :type action: str
+        """
+
+        if action is not None:
+            if action.lower() != 'stop':
+                await self.bot.say("Use `!admin memory` or "
+                                   "`!admin memory stop`.",
+                                   delete_after=self.bot.ans_lifespan)
+            elif memory.is_tracing():
+                memory.stop()
+                await self.bot.say("Stopped tracing memory allocations.",
+                                   delete_after=self.bot.ans_lifespan)
+            else:
+                await self.bot.say("Memory allocations aren't being traced.",
+                                   delete_after=self.bot.ans_lifespan)
+            return
+
+        embed = discord.Embed(title="Memory")
+
+        embed.add_field(name="Objects", inline=False, value="\n".join(
+            "{}: {}".format(name, count)
+            for name, count in self.bot.object_counts().items()))
+
+        tasks = sorted(memory.pending_tasks(self.bot.loop).items(),
+                       key=lambda item: item[1], reverse=True)
+        embed.add_field(name="Pending tasks", inline=False, value="\n".join(
+            "{}: {}".format(name[-60:], count) for name, count in tasks[:5])
+            if tasks else "none")
+
+        if not memory.is_tracing():
+            memory.start(config.get_config().get_int('memory.frames'))
+            embed.add_field(
+                name="Allocations", inline=False,
+                value="Started tracing. Call again later to see what grew, "
+                      "and `!admin memory stop` when done.")
+        else:
+            cfg = config.get_config()
+            path, compared, traced, peak, stats = memory.snapshot(
+                cfg.get_str('memory.directory'), cfg.get_int('memory.top'))
+
+            lines = ["{}{:.1f} KiB  {}:{}".format(
+                '+' if compared and stat.size_diff >= 0 else '',
+                (stat.size_diff if compared else stat.size) / 1024,
+                os.path.basename(stat.traceback[0].filename),
+                stat.traceback[0].lineno) for stat in stats[:5]]
+            embed.add_field(
+                name="Allocations ({})".format(
+                    "since the last call" if compared else "held"),
+                inline=False,
+                value="Traced {:.1f} KiB, peak {:.1f} KiB. Full list in `{}`."
+                      "\n{}".format(traced / 1024, peak / 1024, path,
+                                     "\n".join(lines)))
+
+        await self.bot.say(embed=embed, delete_after=self.bot.ans_lifespan * 4)
+
     @admin_cmd.command(name="shutdown", pass_context=True)
     @commands.check(checks.is_admin)
     async def admin_shutdown(self, ctx: commands.Context):
@@ -249,17 +514,7 @@ class Admin:
         lib.log("Shutting down...")
         await self.bot.say("Hope I did well, bye!")
 
-        for channel, timer in self.bot.valid_timers().items():
-            if timer.get_state() != State.STOPPED:
-                timer.stop()
-                if lib.get_channel(ctx) != channel:
-                    await self.bot.safe_send(
-                        channel,
-                        "I'm sorry, I have to go. See you later!"
-                    )
-
-                    await self.bot.remove_messages(channel)
-        self.bot.unsub_all()
+        await self.bot.drain(lib.get_channel(ctx))
 
         await self.bot.logout()
 
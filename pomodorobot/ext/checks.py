@@ -3,8 +3,10 @@ from discord.ext import commands
 import pomodorobot.config as config
 from pomodorobot import lib
 from pomodorobot.bot import PomodoroBot
+from pomodorobot.tracing import tracer
 
 
+@tracer.check
 def has_permission(ctx: commands.Context) -> bool:
     """ Checks if a user is an administrator or if has the role
         that grants elevated permissions.
@@ -23,6 +25,7 @@ def has_permission(ctx: commands.Context) -> bool:
     raise commands.CheckFailure(message="no permissions")
 
 
+@tracer.check
 def is_admin(ctx: commands.Context) -> bool:
     """ Checks if the author of the command is the administrator / owner
         of the bot.
@@ -41,6 +44,7 @@ def is_admin(ctx: commands.Context) -> bool:
     raise commands.CheckFailure(message="not admin")
 
 
+@tracer.check
 def channel_has_timer(ctx: commands.Context) -> bool:
     """ Checks if a channel has a valid timer set.
 
@@ -55,12 +59,14 @@ def channel_has_timer(ctx: commands.Context) -> bool:
     if isinstance(ctx.bot, PomodoroBot):
         channel = ctx.bot.spoof(ctx.message.author, lib.get_channel(ctx))
 
-        if ctx.bot.get_interface(channel).timer is not None:
+        interface = ctx.bot.get_interface(channel, generate=False)
+        if interface is not None and interface.timer is not None:
             return True
 
     raise commands.CheckFailure(message="timer not found")
 
 
+@tracer.check
 def unlocked_or_allowed(ctx: commands.Context) -> bool:
     """ Checks if a timer is unlocked, or if the author of the command
         has permissions to execute such command on a locked timer.
@@ -80,6 +86,7 @@ def unlocked_or_allowed(ctx: commands.Context) -> bool:
     return True
 
 
+@tracer.check
 def whitelisted(ctx: commands.Context) -> bool:
     """ Checks if a channel is allowed to have a timer on it.
 
@@ -1,7 +1,7 @@
+import time
+import asyncio
 import discord
 import logging
-import asyncio
-from datetime import datetime
 
 from discord.ext import commands
 
@@ -9,16 +9,34 @@ import pomodorobot.lib as lib
 import pomodorobot.config as config
 
 from pomodorobot.bot import PomodoroBot
+from pomodorobot.core.eventbus import Overflow, bus
+from pomodorobot.tasks import supervisor
 from pomodorobot.timer import TimerEvent, TimerStateEvent, TimerPeriodEvent,\
     TimerModifiedEvent, State
 
+# The amount of timer events that can wait for their subscribers to be
+# notified. Past it, the timers' loops wait for room (events published from
+# elsewhere are dropped, with a warning).
+NOTIFY_QUEUE_SIZE = 1000
+
 
 class Events:
 
     def __init__(self, bot: PomodoroBot):
         self.bot = bot
 
-        TimerEvent.add_listener(self.timer_listener)
+        # The time (as given by `time.monotonic`) at which each server last got
+        # the startup message, by server ID.
+        self._announced = {}
+
+        # Subscribers must get every notification: the timers' loops wait
+        # for room rather than have the events dropped.
+        for event_type, listener in (
+                (TimerStateEvent, self.on_timer_state),
+                (TimerPeriodEvent, self.on_timer_period),
+                (TimerModifiedEvent, self.on_timer_modified)):
+            bus.subscribe(event_type, listener, queue_size=NOTIFY_QUEUE_SIZE,
+                          overflow=Overflow.BLOCK)
 
     async def on_command_error(self, error, ctx: commands.Context):
 
@@ -81,71 +99,161 @@ class Events:
         lib.log("\t" + self.bot.user.id)
         lib.log("")
 
-        await self.bot.update_status()
+        if self.bot.boot_time is not None:
+            lib.log("Ready {:.3f}s after starting."
+                    .format(time.perf_counter() - self.bot.boot_time))
+            self.bot.boot_time = None
+
+        self.bot.update_status(force=True)
+        self.bot.start_snapshots()
+        await self.bot.start_metrics()
+
+        if supervisor.running('broadcast') == 0:
+            supervisor.spawn('broadcast', self._broadcast_startup(),
+                             loop=self.bot.loop)
+
+    async def _broadcast_startup(self):
+        """ Sends the startup message to the servers, in the background.
+            Only a few messages are in flight at a time, each followed by a
+            pause, so the broadcast leaves most of the rate limits to the
+            timers. Servers set to be skipped in the config are left out, and
+            so are the ones that got the message shortly before (e.g. when
+            reconnecting).
+        """
 
-        message = "**[{}]** {}"\
-            .format(config.get_config().get_str('version'),
-                    config.get_config().get_str('startup_msg'))
-        for server in self.bot.servers:
-            await self.bot.send_message(server, message)
+        cfg = config.get_config()
+        if not cfg.get_boolean('startup_broadcast.enabled'):
+            return
 
-    def timer_listener(self, e: TimerEvent):
-        """ Listens to any timer-related events.
+        message = "**[{}]** {}".format(cfg.get_str('version'),
+                                       cfg.get_str('startup_msg'))
+
+        skipped = set(str(server_id) for server_id in
+                      cfg.get_list('startup_broadcast.skip_servers'))
+        cooldown = cfg.get_int('startup_broadcast.cooldown')
+        interval = float(cfg.get_element('startup_broadcast.interval'))
+        limit = asyncio.Semaphore(
+            max(1, cfg.get_int('startup_broadcast.concurrency')))
+
+        now = time.monotonic()
+        servers = [server for server in list(self.bot.servers)
+                   if server.id not in skipped and
+                   (server.id not in self._announced or
+                    now - self._announced[server.id] >= cooldown)]
+        if not servers:
+            return
 
-        :param e: The timers' events to listen for. Can be either
-            TimerPeriodEvent or TimerStateEvent.
+        async def announce(server) -> bool:
+            async with limit:
+                if self.bot.is_closed:
+                    return False
+
+                self._announced[server.id] = time.monotonic()
+                try:
+                    await self.bot.send_message(server, message)
+                    return True
+                except discord.HTTPException as err:
+                    lib.log("Could not send the startup message to {}: {}"
+                            .format(server.name, err), level=logging.WARN)
+                    return False
+                finally:
+                    await asyncio.sleep(interval)
+
+        started = time.perf_counter()
+        sent = await asyncio.gather(*[announce(server) for server in servers])
+
+        lib.log("Sent the startup message to {} of {} in {:.1f}s."
+                .format(sent.count(True),
+                        lib.pluralize(len(servers), "server", append='s'),
+                        time.perf_counter() - started))
+
+    async def on_timer_state(self, e: TimerStateEvent):
+        """ Lets subscribers know that their timer started, paused, stopped,
+            or was set up or reset.
+
+        :param e: The timer's state change.
         """
 
-        msg = "{} | **{}** || "\
-            .format(e.timer.get_server_name(), e.timer.get_channel_name())
+        msg = self._header(e) + "The timer has "
 
-        if isinstance(e, TimerStateEvent):
-            msg += "The timer has "
+        if e.new_state == State.RUNNING:
+            msg += "resumed!" if e.old_state == State.PAUSED else "started!"
+        elif e.new_state == State.PAUSED:
+            msg += "paused."
+        elif e.new_state == State.STOPPED:
+            msg += "been set up." if e.old_state is None else "stopped."
+        else:
+            msg += "been reset."
 
-            if e.new_state == State.RUNNING:
-                msg += "resumed!" if e.old_state == State.PAUSED else "started!"
-            elif e.new_state == State.PAUSED:
-                msg += "paused."
-            elif e.new_state == State.STOPPED:
-                msg += "been set up." if e.old_state is None else "stopped."
-            else:
-                msg += "been reset."
+        self._notify_subscribers(e, msg)
 
-        elif isinstance(e, TimerPeriodEvent):
-            msg += "Timer updated:\t\t "
+    async def on_timer_period(self, e: TimerPeriodEvent):
+        """ Lets subscribers know that their timer's period changed.
+
+        :param e: The timer's period change.
+        """
 
-            if e.old_period == e.new_period:
-                msg += "**{}** period has been restarted! [_{}_]".format(
+        msg = self._header(e) + "Timer updated:\t\t "
+
+        if e.old_period == e.new_period:
+            msg += "**{}** period has been restarted! [_{}_]".format(
+                e.new_period.name,
+                lib.pluralize(e.new_period.time, "minute", append="s"))
+
+        else:
+            if e.old_period is not None:
+                msg += "**{}** period over!".format(e.old_period.name)
+            if e.new_period is not None:
+                if e.old_period is not None:
+                    msg += " "
+                msg += "**{}** period now starting [_{}_]".format(
                     e.new_period.name,
                     lib.pluralize(e.new_period.time, "minute", append="s"))
 
-            else:
-                if e.old_period is not None:
-                    msg += "**{}** period over!".format(e.old_period.name)
-                if e.new_period is not None:
-                    if e.old_period is not None:
-                        msg += " "
-                    msg += "**{}** period now starting [_{}_]".format(
-                        e.new_period.name,
-                        lib.pluralize(e.new_period.time, "minute", append="s"))
-
-        elif isinstance(e, TimerModifiedEvent):
-            msg += "Timer modified by {} periods!"\
-                .format(e.action)
-            if e.final_period is not None:
-                msg += " Now at {} [_{}_]"\
-                    .format(e.final_period.name,
-                            lib.pluralize(e.final_period.time,
-                                          "minute", append="s"))
-        else:
+        self._notify_subscribers(e, msg)
+
+    async def on_timer_modified(self, e: TimerModifiedEvent):
+        """ Lets subscribers know that their timer's periods or settings were
+            modified.
+
+        :param e: The timer's modification.
+        """
+
+        msg = self._header(e) + "Timer modified by {} periods!"\
+            .format(e.action)
+        if e.final_period is not None:
+            msg += " Now at {} [_{}_]"\
+                .format(e.final_period.name,
+                        lib.pluralize(e.final_period.time,
+                                      "minute", append="s"))
+
+        self._notify_subscribers(e, msg)
+
+    @staticmethod
+    def _header(e: TimerEvent) -> str:
+        return "{} | **{}** || "\
+            .format(e.timer.get_server_name(), e.timer.get_channel_name())
+
+    def _notify_subscribers(self, e: TimerEvent, msg: str):
+        """ Sends a message to the subscribers of the timer an event is for,
+            as a background task of the 'notify' group (see
+            `pomodorobot.tasks`).
+        """
+
+        members = list(e.timer.get_users_subscribed())
+        if not members:
             return
 
-        @asyncio.coroutine
-        def reaction():
-            for member in e.timer.get_users_subscribed():
-                yield from self.bot.safe_send(member, msg)
+        async def notify():
+            for member in members:
+                try:
+                    await self.bot.safe_send(member, msg)
+                except discord.HTTPException as err:
+                    lib.log("Could not notify {}: {}".format(member, err),
+                            channel_id=e.timer.get_channel_id(),
+                            level=logging.WARN)
 
-        self.bot.loop.create_task(reaction())
+        supervisor.spawn('notify', notify(), loop=self.bot.loop)
 
     async def on_member_join(self, member):
         server = member.server
@@ -210,7 +318,7 @@ class Events:
         author = message.author
         if author.bot:
             return
-        self.bot.mark_active(message.channel, author, datetime.now())
+        self.bot.mark_active(message.channel, author, self.bot.clock.now())
 
     async def on_message_delete(self, message):
         if message.server is None or\
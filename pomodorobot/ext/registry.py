@@ -1,3 +1,5 @@
+import logging
+
 from discord.ext import commands
 
 import pomodorobot.ext.checks as checks
@@ -117,15 +119,17 @@ class Registry:
     async def leaderboard(self, ctx: commands.Context):
         """ Shows the highest recorded times
         """
-        result = '\n' \
-            .join("{} - {}".format(record.name.split('#')[0],
-                                   "None found." if
-                                   record.total_recorded is None else
-                                   printable_time(record.total_recorded))
-                  for record in db_manager.get_leaderboard())
-
-        lib.log("{} queried for the leaderboard. Result: {}"
-                .format(lib.get_author_name(ctx, True), result))
+        lines = ["{} - {}".format(record.name.split('#')[0],
+                                  "None found." if
+                                  record.total_recorded is None else
+                                  printable_time(record.total_recorded))
+                 for record in db_manager.get_leaderboard()]
+        result = '\n'.join(lines)
+
+        lib.log("{} queried for the leaderboard ({} entries)."
+                .format(lib.get_author_name(ctx, True), len(lines)),
+                event='leaderboard')
+        lib.log(lambda: "Leaderboard:\n" + result, level=logging.DEBUG)
 
         await self.bot.say("```\n{}\n```".format(result),
                            delete_after=self.bot.ans_lifespan * 3)
@@ -1,7 +1,6 @@
 import yaml
-from datetime import datetime
 import logging
-import discord.errors
+import discord
 
 from discord.ext import commands
 
@@ -10,9 +9,12 @@ import pomodorobot.config as config
 import pomodorobot.lib as lib
 
 from pomodorobot.bot import PomodoroBot
+from pomodorobot.dbmanager import db_manager
 from pomodorobot.timer import PomodoroTimer, State
 
 SAFE_DEFAULT_FMT = "(2xStudy/Work:32,Break:8),Study/Work:32,Long_Break:15"
+# The amount of timers listed per page by the timers command.
+TIMERS_PER_PAGE = 10
 
 
 class TimerCommands:
@@ -112,6 +114,7 @@ class TimerCommands:
                             "ON" if countdown else "OFF")
                 send = log
             else:
+                interface.timer.set_state(None)
                 interface.timer = None
                 log = ("Could not set the periods correctly, "
                        "command 'setup' failed.")
@@ -162,6 +165,7 @@ class TimerCommands:
                 delete_after=self.bot.ans_lifespan)
             return
 
+        self.bot.sync_engine(channel)
         period_str = 'period' if amount == 1 else 'periods'
 
         if interface.timer.get_state() != State.STOPPED:
@@ -195,6 +199,7 @@ class TimerCommands:
             return
 
         if timer.remove_periods(index - 1, amount):
+            self.bot.sync_engine(channel)
             period_str = 'period' if amount == 1 else 'periods'
 
             if timer.get_state() != State.STOPPED:
@@ -229,6 +234,7 @@ class TimerCommands:
         if timer.repeat == toggle:
             return  # No need to edit it if it's the same.
         timer.toggle_looping(toggle)
+        self.bot.sync_engine(channel)
 
         await self.bot.edit_message(interface.list_message,
                                     timer.list_periods())
@@ -275,7 +281,7 @@ class TimerCommands:
 
         interface = self.bot.get_interface(channel)
         if author not in interface.subbed:
-            interface.add_sub(author, datetime.utcnow())
+            interface.add_sub(author, self.bot.clock.now())
 
             interface.restart_inactivity()
 
@@ -342,24 +348,15 @@ class TimerCommands:
         channel = self.bot.spoof(ctx.message.author, lib.get_channel(ctx))
 
         interface = self.bot.get_interface(channel)
-        timer = interface.timer
-        if timer.start():
-            if not 0 < period_idx <= len(timer.periods):
-                period_idx = 1
-
-            try:
-                if interface.restart_inactivity():
-                    await self.bot.say("Timer has no subs. Will stop after"
-                                       " {} minutes unless someone subscribes!"
-                                       .format(self.bot
-                                               .timer_inactivity_allowed),
-                                       delete_after=self.bot.ans_lifespan)
-
-                await self.bot.run_timer(channel, period_idx - 1)
-            except discord.errors.HTTPException:
-                await self.bot.say("@here\n"
-                                   "Connection interrupted, please resume! (1)")
-                timer.pause()
+        if not 0 < period_idx <= len(interface.timer.periods):
+            period_idx = 1
+
+        if self.bot.runtime.start(channel, period_idx - 1):
+            if interface.restart_inactivity():
+                await self.bot.say("Timer has no subs. Will stop after"
+                                   " {} minutes unless someone subscribes!"
+                                   .format(self.bot.timer_inactivity_allowed),
+                                   delete_after=self.bot.ans_lifespan)
         else:
             lib.log(lib.get_author_name(ctx) +
                     " tried to start a timer that was already running.",
@@ -376,9 +373,7 @@ class TimerCommands:
 
         channel = self.bot.spoof(ctx.message.author, lib.get_channel(ctx))
 
-        if self.bot.get_interface(channel).timer.resume():
-            await self.bot.run_timer(channel)
-        else:
+        if not self.bot.runtime.resume(channel):
             lib.log("Unable to resume timer, stopped or already running.",
                     channel_id=channel.id)
             await self.bot.say("**grumble grumble.** The timer is " +
@@ -398,7 +393,7 @@ class TimerCommands:
 
         interface = self.bot.get_interface(channel)
         if len(interface.subbed) == 0:
-            if interface.timer.stop():
+            if self.bot.runtime.stop(channel):
                 send = "No subs detected, timer will instead stop soon."
                 await self.bot.say(send, delete_after=interface.timer.step)
             else:
@@ -408,7 +403,7 @@ class TimerCommands:
                 await self.bot.say(send, tts=interface.tts)
             log = ("Attempted to pause the timer, but due to the lack of subs, "
                    "it will be stopped instead")
-        elif interface.timer.pause():
+        elif self.bot.runtime.pause(channel):
             log = "Timer will be paused soon."
             await self.bot.say(log, delete_after=interface.timer.step)
 
@@ -430,7 +425,7 @@ class TimerCommands:
         channel = self.bot.spoof(ctx.message.author, lib.get_channel(ctx))
 
         interface = self.bot.get_interface(channel)
-        if interface.timer.stop():
+        if self.bot.runtime.stop(channel):
             send = "Timer will stop soon."
             await self.bot.say(send, delete_after=interface.timer.step)
 
@@ -467,6 +462,7 @@ class TimerCommands:
                 raise commands.BadArgument
 
         label = interface.timer.goto(idx)
+        self.bot.sync_engine(channel)
 
         if label is not None:
             log = send = "Moved to period number {!s} ({})".format(idx, label)
@@ -523,12 +519,9 @@ class TimerCommands:
         channel = self.bot.spoof(ctx.message.author, lib.get_channel(ctx))
 
         interface = self.bot.get_interface(channel)
-        if interface.timer.get_state() == State.RUNNING:
-            self.bot.timers_running -= 1
-            await self.bot.update_status()
-
         await self.bot.remove_messages(channel)
 
+        interface.timer.set_state(None)
         interface.timer = None
 
         lib.log("Successfully forced a reset on this channel's timer.",
@@ -603,20 +596,69 @@ class TimerCommands:
                            delete_after=self.bot.ans_lifespan)
 
     @commands.command(name="timers", pass_context=True)
-    async def timers_list(self):
-        """ Shows a list of all active timers.
+    async def timers_list(self, ctx: commands.Context, page='1', scope=None):
+        """ Shows a page of the timers set up in this server, one per line.
+
+        :param page: The page to show, starting from 1, or 'all' to show the
+            timers in every server, followed by the page.
+        :type page: str
+
+        :param scope: 'all' to show the timers in every server.
         """
 
-        t_list = ""
-        for channel, timer in self.bot.valid_timers().items():
-            # Channel name
-            t_list += channel.mention + ":\n" + timer.show_status() + "\n"
+        # Either `timers [page] [all]` or `timers all [page]`
+        if page.lower() == 'all':
+            page, scope = scope or '1', 'all'
+        elif scope is not None:
+            scope = scope.lower()
 
-        if t_list != "":
-            await self.bot.say(t_list, delete_after=self.bot.ans_lifespan * 3)
-        else:
+        try:
+            page = int(page)
+        except ValueError:
+            await self.bot.say("The page must be a number.",
+                               delete_after=self.bot.ans_lifespan)
+            return
+
+        server_id = lib.get_server_id(ctx) if scope != 'all' else None
+        shard = self.bot.shard_id or 0
+
+        local = self.bot.timers.count_in(server_id)
+        remote = db_manager.count_timer_snapshots(shard, server_id) \
+            if self.bot.is_sharded() else 0
+
+        if local + remote == 0:
             await self.bot.say("No timers set up.",
                                delete_after=self.bot.ans_lifespan)
+            return
+
+        pages = (local + remote - 1) // TIMERS_PER_PAGE + 1
+        page = min(max(1, page), pages)
+        start = (page - 1) * TIMERS_PER_PAGE
+
+        lines = ["{} — {}".format(timer.get_channel().mention,
+                                  timer.summary())
+                 for timer in self.bot.timers.page(server_id, start,
+                                                   TIMERS_PER_PAGE)]
+
+        if remote > 0 and len(lines) < TIMERS_PER_PAGE:
+            # Timers running on the other shards
+            lines += ["{} — {}".format(snapshot.mention, snapshot.status)
+                      for snapshot in db_manager.get_timer_snapshots(
+                          shard, server_id, max(0, start - local),
+                          TIMERS_PER_PAGE - len(lines))]
+
+        embed = discord.Embed(
+            title="Timers {}({}/{})".format(
+                "in every server " if server_id is None else "", page, pages),
+            description="\n".join(lines))
+        embed.set_footer(text="{} set up. Use {}timers [all] [page] to see "
+                              "more, or {}timer status for the details."
+                         .format(lib.pluralize(local + remote, "timer",
+                                               append='s'),
+                                 self.bot.command_prefix,
+                                 self.bot.command_prefix))
+
+        await self.bot.say(embed=embed, delete_after=self.bot.ans_lifespan * 3)
 
     async def _translate_keyword(self, keyword: str, server_id: str,
                                  channel_id: str):
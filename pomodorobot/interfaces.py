@@ -0,0 +1,164 @@
+import logging
+
+import pomodorobot.lib as lib
+
+from pomodorobot.channeltimerinterface import ChannelTimerInterface
+from pomodorobot.core.clock import system_clock
+
+
+class InterfaceRegistry:
+    """ Holds the timer interface of each channel, keyed by the channel's ID.
+
+        Interfaces are only created when asked for with the intention of
+        using them; looking one up just to read it doesn't create it. Those
+        left with nothing worth keeping (no timer, subscribers, messages or
+        settings) are evicted once they have been idle for a while.
+    """
+
+    def __init__(self, max_idle=600, sweep_interval=60, clock=None):
+        # The time, in seconds, an interface with nothing worth keeping is
+        # kept for since it was last used.
+        self.max_idle = max_idle
+        # The minimum time, in seconds, between two sweeps for idle
+        # interfaces.
+        self.sweep_interval = sweep_interval
+        # The clock idle times are measured with, and given to the
+        # interfaces.
+        self.clock = system_clock if clock is None else clock
+
+        self._interfaces = {}
+        # The time (as given by the clock's `monotonic`) at which each
+        # interface was last asked for, by channel ID.
+        self._used = {}
+        self._last_sweep = self.clock.monotonic()
+
+        # The amount of interfaces created, evicted, and of read-only lookups
+        # that found none.
+        self.created = 0
+        self.evicted = 0
+        self.misses = 0
+        # The largest amount of interfaces held at once.
+        self.peak = 0
+
+    def __len__(self):
+        return len(self._interfaces)
+
+    def __contains__(self, channel):
+        return channel is not None and channel.id in self._interfaces
+
+    def get(self, channel, generate=True):
+        """ Gives the interface of a channel, creating it if needed.
+
+        :param channel: The channel.
+        :type channel: discord.Channel
+
+        :param generate: Whether the interface should be created if it
+            doesn't exist yet.
+        :type generate: bool
+
+        :return: The interface, or None if there's none and it should not be
+            created (or no channel was given).
+        """
+
+        if channel is None:
+            return None
+
+        now = self.clock.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep(now)
+
+        interface = self._interfaces.get(channel.id)
+        if interface is None:
+            if not generate:
+                self.misses += 1
+                return None
+
+            interface = ChannelTimerInterface(channel, self.clock)
+            self._interfaces[channel.id] = interface
+            self.created += 1
+            self.peak = max(self.peak, len(self._interfaces))
+
+        self._used[channel.id] = now
+        return interface
+
+    def peek(self, channel):
+        """ Gives the interface of a channel without creating it, nor counting
+            as a use of it.
+
+        :param channel: The channel.
+        :type channel: discord.Channel
+
+        :return: The interface, or None if there's none.
+        """
+
+        if channel is None:
+            return None
+        return self._interfaces.get(channel.id)
+
+    def values(self):
+        """ Gives the interfaces held.
+
+        :return: A list of the interfaces.
+        """
+
+        return list(self._interfaces.values())
+
+    def sweep(self, now=None):
+        """ Evicts the interfaces that have nothing worth keeping and have
+            been idle for longer than allowed.
+
+        :param now: The current time, as given by the clock's `monotonic`.
+
+        :return: The amount of interfaces evicted.
+        """
+
+        now = self.clock.monotonic() if now is None else now
+        self._last_sweep = now
+
+        idle = [channel_id for channel_id, interface
+                in self._interfaces.items()
+                if now - self._used.get(channel_id, now) >= self.max_idle and
+                is_disposable(interface)]
+
+        for channel_id in idle:
+            del self._interfaces[channel_id]
+            self._used.pop(channel_id, None)
+
+        if idle:
+            self.evicted += len(idle)
+            lib.log(lambda: "Evicted {} idle, {} left.".format(
+                lib.pluralize(len(idle), "interface", append='s'),
+                len(self._interfaces)), level=logging.DEBUG)
+
+        return len(idle)
+
+    def stats(self):
+        """ Gives the registry's metrics.
+
+        :return: A dictionary with the current size, the peak size, and the
+            amount of interfaces created and evicted and lookups missed.
+        """
+
+        return {
+            'size': len(self._interfaces),
+            'peak': self.peak,
+            'created': self.created,
+            'evicted': self.evicted,
+            'misses': self.misses
+        }
+
+
+def is_disposable(interface: ChannelTimerInterface) -> bool:
+    """ Tells whether an interface holds nothing that would be lost by
+        dropping it: no timer, subscribers, messages or settings.
+
+    :param interface: The interface to check.
+    :type interface: ChannelTimerInterface
+
+    :return: True if it can be dropped, False otherwise.
+    """
+
+    return interface.timer is None and len(interface.subbed) == 0 and \
+        not interface.locked and interface.spoofed is None and \
+        not interface.tts and interface.time_message is None and \
+        interface.list_message is None
@@ -0,0 +1,395 @@
+import os
+import mmap
+import time
+import struct
+import asyncio
+from collections import namedtuple
+
+from pomodorobot.core.eventbus import bus
+from pomodorobot.core.accounting import SubscriptionEvent
+from pomodorobot.core.timer import TimerEvent, TimerStateEvent, \
+    TimerPeriodEvent, TimerModifiedEvent
+
+# The layout of a record: time (seconds since the epoch), kind, two fields
+# whose meaning depends on the kind, channel ID and user ID. 32 bytes wide.
+RECORD = struct.Struct('<dB3xhhQQ')
+
+# The kinds of records. 0 is never written, it marks unused space.
+KIND_STATE = 1
+KIND_PERIOD = 2
+KIND_MODIFIED = 3
+KIND_SUB = 4
+KIND_UNSUB = 5
+
+# The codes of the modifications recorded by KIND_MODIFIED records.
+MODIFICATIONS = ['adding', 'removing', 'toggling countdown', 'toggling looping']
+
+SEGMENT_FMT = "segment-{:08d}.bin"
+
+JournalRecord = namedtuple('JournalRecord',
+                           ['time', 'kind', 'a', 'b', 'channel_id', 'user_id'])
+JournalRecord.__doc__ = """ A journal record.
+
+    For KIND_STATE, `a` and `b` hold the old and new `State` values (0 if
+    None). For KIND_PERIOD, the old and new period IDs (-1 if None). For
+    KIND_MODIFIED, the modification's index in MODIFICATIONS plus one (0 if
+    unknown) and the final period's ID (-1 if None). Subscription records
+    don't use them.
+"""
+
+
+class Journal:
+    """ An append-only journal of timer and subscription events.
+
+        Events are stored as fixed-width binary records, in segment files of
+        a fixed amount of records each. The segment being written to is
+        memory-mapped, and records are copied into it in batches.
+    """
+
+    def __init__(self, directory: str, segment_records=65536, batch_size=64,
+                 flush_interval=1.0):
+        # The directory holding the segment files.
+        self.directory = directory
+        # The amount of records a segment file can hold.
+        self.segment_records = segment_records
+        # The amount of pending records that triggers a write.
+        self.batch_size = batch_size
+        # The time (in seconds) after which pending records get written, even
+        # if there are not enough to fill a batch.
+        self.flush_interval = flush_interval
+
+        self._pending = bytearray()
+        self._pending_count = 0
+        self._last_write = time.monotonic()
+        # The call writing the pending records once the flush interval is
+        # over, when scheduled.
+        self._scheduled = None
+
+        self._segment = -1
+        self._file = None
+        self._map = None
+        self._position = 0
+
+    def open(self):
+        """ Opens the last segment in the directory (or creates the first one)
+            and places the write position after its last record.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        existing = segments(self.directory)
+        self._open_segment(existing[-1][0] if existing else 0)
+
+    def schedule_writes(self, loop=None):
+        """ Makes the pending records get written every `flush_interval`
+            seconds, so records don't wait for a later one to be written
+            when events are scarce.
+
+        :param loop: The event loop to schedule the writes on. Defaults to
+            the current one.
+        """
+
+        if self._scheduled is not None:
+            return
+
+        loop = asyncio.get_event_loop() if loop is None else loop
+
+        def scheduled_write():
+            self.write()
+            self._scheduled = loop.call_later(self.flush_interval,
+                                              scheduled_write)
+
+        self._scheduled = loop.call_later(self.flush_interval,
+                                          scheduled_write)
+
+    def close(self):
+        """ Writes any pending records, stops the scheduled writes and
+            closes the current segment.
+        """
+
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+
+        if self._map is None:
+            return
+
+        self.flush()
+        self._map.close()
+        self._file.close()
+
+        self._map = None
+        self._file = None
+
+    def append(self, kind: int, a=0, b=0, channel_id=0, user_id=0,
+               timestamp=None):
+        """ Adds a record to the journal. It is written along with the rest of
+            its batch.
+
+        :param kind: The kind of record. See the KIND_* constants.
+        :param a: The first kind-dependent field.
+        :param b: The second kind-dependent field.
+        :param channel_id: The ID of the channel the record is about.
+        :param user_id: The ID of the user the record is about.
+        :param timestamp: The time of the record, in seconds since the epoch.
+            Defaults to now.
+        """
+
+        self._pending += RECORD.pack(
+            time.time() if timestamp is None else timestamp, kind, a, b,
+            _as_id(channel_id), _as_id(user_id))
+        self._pending_count += 1
+
+        if self._pending_count >= self.batch_size or \
+                time.monotonic() - self._last_write >= self.flush_interval:
+            self.write()
+
+    def write(self):
+        """ Copies the pending records into the memory-mapped segment, moving
+            on to a new segment whenever the current one is full.
+        """
+
+        self._last_write = time.monotonic()
+        if self._map is None or self._pending_count == 0:
+            return
+
+        data = memoryview(self._pending)
+        while len(data) > 0:
+            if self._position >= len(self._map):
+                self._seal()
+
+            chunk = data[:len(self._map) - self._position]
+            self._map[self._position:self._position + len(chunk)] = chunk
+            self._position += len(chunk)
+            data = data[len(chunk):]
+
+        data.release()
+        self._pending = bytearray()
+        self._pending_count = 0
+
+    def flush(self):
+        """ Writes the pending records and makes sure the segment's contents
+            reach the disk.
+        """
+
+        self.write()
+        if self._map is not None:
+            self._map.flush()
+
+    def record(self, e):
+        """ Records a timer or subscription event. Meant to be subscribed to
+            the event bus.
+
+        :param e: The event to record.
+        """
+
+        if isinstance(e, SubscriptionEvent):
+            self.append(KIND_SUB if e.subscribed else KIND_UNSUB,
+                        channel_id=e.interface.get_channel_id(),
+                        user_id=e.user.id)
+            return
+
+        channel_id = e.timer.get_channel_id()
+        if isinstance(e, TimerStateEvent):
+            self.append(KIND_STATE, _state_value(e.old_state),
+                        _state_value(e.new_state), channel_id)
+        elif isinstance(e, TimerPeriodEvent):
+            self.append(KIND_PERIOD, _period_id(e.old_period),
+                        _period_id(e.new_period), channel_id)
+        elif isinstance(e, TimerModifiedEvent):
+            code = 0
+            for i, modification in enumerate(MODIFICATIONS):
+                if e.action.startswith(modification):
+                    code = i + 1
+                    break
+            self.append(KIND_MODIFIED, code, _period_id(e.final_period),
+                        channel_id)
+
+    def _open_segment(self, number: int):
+        self._segment = number
+
+        path = os.path.join(self.directory, SEGMENT_FMT.format(number))
+        size = self.segment_records * RECORD.size
+
+        if not os.path.exists(path):
+            open(path, 'wb').close()
+
+        self._file = open(path, 'r+b')
+        if os.path.getsize(path) < size:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+        self._position = _used_records(self._map) * RECORD.size
+
+    def _seal(self):
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+        self._open_segment(self._segment + 1)
+
+
+def segments(directory: str):
+    """ Lists the segment files in a journal directory, in order.
+
+    :param directory: The journal directory.
+    :type directory: str
+
+    :return: A list of (segment number, path) pairs.
+    """
+
+    if not os.path.isdir(directory):
+        return []
+
+    found = []
+    for name in os.listdir(directory):
+        if name.startswith('segment-') and name.endswith('.bin'):
+            try:
+                found.append((int(name[8:-4]),
+                              os.path.join(directory, name)))
+            except ValueError:
+                continue
+
+    return sorted(found)
+
+
+def read(directory: str, since=None, until=None, kinds=None):
+    """ Reads the records in a journal, in the order they were written.
+
+    :param directory: The journal directory.
+    :type directory: str
+
+    :param since: If given, skips records older than this time (in seconds
+        since the epoch).
+
+    :param until: If given, stops at the first record newer than this time.
+
+    :param kinds: If given, only gives records of these kinds.
+    :type kinds: set of int
+
+    :return: A generator of JournalRecord.
+    """
+
+    for _, path in segments(directory):
+        with open(path, 'rb') as file:
+            if os.path.getsize(path) == 0:
+                continue
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                used = _used_records(mm)
+                if used == 0:
+                    continue
+
+                last = RECORD.unpack_from(mm, (used - 1) * RECORD.size)
+                if since is not None and last[0] < since:
+                    continue
+
+                view = memoryview(mm)[:used * RECORD.size]
+                try:
+                    for fields in RECORD.iter_unpack(view):
+                        if since is not None and fields[0] < since:
+                            continue
+                        if until is not None and fields[0] > until:
+                            return
+                        if kinds is None or fields[1] in kinds:
+                            yield JournalRecord(*fields)
+                finally:
+                    view.release()
+
+
+def replay(directory: str, handler, since=None, until=None, kinds=None):
+    """ Feeds the records in a journal to a handler, in order.
+        See `read` for the filters.
+
+    :param directory: The journal directory.
+    :param handler: A function that takes a JournalRecord.
+
+    :return: The amount of records replayed.
+    """
+
+    count = 0
+    for record in read(directory, since, until, kinds):
+        handler(record)
+        count += 1
+    return count
+
+
+def _used_records(mm) -> int:
+    """ Finds how many records have been written to a segment. Since they are
+        written in order, the first unused one can be found through a binary
+        search on their kind.
+    """
+
+    low, high = 0, len(mm) // RECORD.size
+    while low < high:
+        mid = (low + high) // 2
+        if mm[mid * RECORD.size + 8] != 0:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+def _as_id(value) -> int:
+    try:
+        return int(value) if value is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def _state_value(state) -> int:
+    return 0 if state is None else state.value
+
+
+def _period_id(period) -> int:
+    return -1 if period is None else period.id
+
+
+_instance = None
+
+
+def start(directory: str, segment_records=65536, loop=None):
+    """ Opens the journal and starts recording timer and subscription events.
+        Pending records are written at least every `flush_interval` seconds.
+
+    :param directory: The directory to keep the segment files in.
+    :type directory: str
+
+    :param segment_records: The amount of records per segment file.
+    :type segment_records: int
+
+    :param loop: The event loop the writes are scheduled on. Defaults to the
+        current one.
+    """
+
+    global _instance
+    if _instance is not None:
+        return
+
+    _instance = Journal(directory, segment_records)
+    _instance.open()
+    _instance.schedule_writes(loop)
+
+    bus.subscribe(TimerEvent, _instance.record)
+    bus.subscribe(SubscriptionEvent, _instance.record)
+
+
+def flush():
+    """ Writes any pending records to the journal, if it's recording.
+    """
+
+    if _instance is not None:
+        _instance.flush()
+
+
+def stop():
+    """ Stops recording events and closes the journal.
+    """
+
+    global _instance
+    if _instance is None:
+        return
+
+    bus.unsubscribe(_instance.record)
+    _instance.close()
+    _instance = None
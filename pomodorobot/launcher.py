@@ -0,0 +1,120 @@
+import time
+import logging
+import multiprocessing
+
+import pomodorobot.core.logs as logs
+
+from pomodorobot.core.text import pluralize
+
+
+class Supervisor:
+    """ Runs a bot process per shard, restarting the ones that fail.
+
+        Each worker is started with its shard's ID and the amount of shards.
+        Workers that exit cleanly (e.g. through the shutdown command) are not
+        restarted. The ones that crash are restarted after a delay that
+        doubles with each consecutive failure.
+    """
+
+    def __init__(self, target, shard_count: int, restart_delay=5,
+                 max_restart_delay=300, stable_after=60):
+        # The function run by each worker, taking (shard_id, shard_count).
+        self.target = target
+        # The amount of shards, and thus of worker processes.
+        self.shard_count = shard_count
+
+        # The time, in seconds, to wait before restarting a failed worker.
+        self.restart_delay = restart_delay
+        # The maximum time to wait before restarting a failed worker.
+        self.max_restart_delay = max_restart_delay
+        # The time a worker needs to stay up for its failures to be forgotten.
+        self.stable_after = stable_after
+
+        # The running workers, as (process, start time) by shard ID.
+        self._workers = {}
+        # The time at which each failed worker should be restarted.
+        self._restarts = {}
+        # The current restart delay of each shard.
+        self._delays = {}
+
+    def run(self):
+        """ Starts all the workers and keeps watch over them until all of them
+            have exited cleanly, or until interrupted.
+        """
+
+        for shard in range(self.shard_count):
+            self._start(shard)
+
+        try:
+            while self._workers or self._restarts:
+                time.sleep(1)
+                self._check()
+        except KeyboardInterrupt:
+            logs.log("Interrupted, stopping all shards.")
+        finally:
+            self.stop()
+
+    def stop(self):
+        """ Terminates all the workers still running.
+        """
+
+        self._restarts.clear()
+
+        for shard, (process, _) in self._workers.items():
+            if process.is_alive():
+                process.terminate()
+        for shard, (process, _) in self._workers.items():
+            process.join(10)
+
+        self._workers.clear()
+
+    def _start(self, shard: int):
+        process = multiprocessing.Process(
+            target=self.target, args=(shard, self.shard_count),
+            name="shard-{}".format(shard))
+        process.start()
+
+        self._workers[shard] = (process, time.monotonic())
+        logs.log("Started shard {} (pid {}).".format(shard, process.pid))
+
+    def _check(self):
+        now = time.monotonic()
+
+        for shard, (process, started) in list(self._workers.items()):
+            if process.is_alive():
+                continue
+
+            del self._workers[shard]
+            if process.exitcode == 0:
+                logs.log("Shard {} exited.".format(shard))
+                continue
+
+            delay = self.restart_delay \
+                if now - started >= self.stable_after or \
+                shard not in self._delays \
+                else min(self._delays[shard] * 2, self.max_restart_delay)
+            self._delays[shard] = delay
+            self._restarts[shard] = now + delay
+
+            logs.log("Shard {} failed with exit code {}, restarting in {}."
+                     .format(shard, process.exitcode,
+                             pluralize(delay, "second", append="s")),
+                     level=logging.WARN)
+
+        for shard, at in list(self._restarts.items()):
+            if at <= now:
+                del self._restarts[shard]
+                self._start(shard)
+
+
+def run(target, shard_count: int):
+    """ Runs a worker process per shard under a supervisor.
+
+    :param target: The function run by each worker, taking the shard's ID and
+        the amount of shards.
+
+    :param shard_count: The amount of shards.
+    :type shard_count: int
+    """
+
+    Supervisor(target, shard_count).run()
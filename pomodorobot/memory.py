@@ -0,0 +1,118 @@
+import os
+import time
+import asyncio
+import linecache
+import tracemalloc
+
+import pomodorobot.core.logs as logs
+
+# The snapshot taken by the last call to `snapshot`, to compare the next one
+# against.
+_previous = None
+
+# The allocations not worth reporting: tracemalloc's own (including the
+# source lines read to write the snapshots), and the imports'.
+_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            tracemalloc.Filter(False, '<unknown>'))
+
+
+def is_tracing() -> bool:
+    """ Tells whether memory allocations are being traced.
+    """
+
+    return tracemalloc.is_tracing()
+
+
+def start(frames=1):
+    """ Starts tracing memory allocations. Tracing slows the bot down and
+        takes memory of its own, so it should be stopped once done with.
+
+    :param frames: The amount of frames kept for each allocation's traceback.
+    """
+
+    global _previous
+    _previous = None
+    tracemalloc.start(frames)
+    logs.log("Started tracing memory allocations.")
+
+
+def stop():
+    """ Stops tracing memory allocations, and forgets the last snapshot.
+    """
+
+    global _previous
+    _previous = None
+    tracemalloc.stop()
+    logs.log("Stopped tracing memory allocations.")
+
+
+def snapshot(directory='memory', top=25):
+    """ Takes a snapshot of the memory allocations, compares it against the
+        last one taken, if any, and writes the allocation sites that grew the
+        most (or, for the first snapshot, that hold the most memory) to a
+        file. Allocations must be being traced (see `start`).
+
+    :param directory: The directory to write the file to.
+    :param top: The amount of allocation sites to write.
+
+    :return: The path of the file written, whether the snapshot was compared
+        against a previous one, the memory traced and its peak, in bytes, and
+        the list of `tracemalloc.Statistic` (or `StatisticDiff`) written.
+    """
+
+    global _previous
+    current = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    if _previous is None:
+        stats = current.statistics('lineno')
+    else:
+        stats = current.compare_to(_previous, 'lineno')
+    compared = _previous is not None
+    _previous = current
+    stats = stats[:top]
+
+    traced, peak = tracemalloc.get_traced_memory()
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "memory-{}.txt"
+                        .format(time.strftime('%Y%m%d-%H%M%S')))
+    with open(path, 'w') as file:
+        file.write("Traced: {:.1f} KiB (peak {:.1f} KiB). {}\n\n".format(
+            traced / 1024, peak / 1024,
+            "Compared against the previous snapshot." if compared else
+            "First snapshot, nothing to compare against."))
+        for stat in stats:
+            file.write("{}\n".format(stat))
+            for line in stat.traceback.format()[1:]:
+                file.write("  {}\n".format(line.strip()))
+
+    logs.log("Wrote the memory snapshot to {}.".format(path))
+    return path, compared, traced, peak, stats
+
+
+def pending_tasks(loop=None):
+    """ Counts the tasks that aren't done yet, by the name of the coroutine
+        they run.
+
+    :param loop: The event loop the tasks run on. Defaults to the current
+        one.
+
+    :return: A dictionary of the amounts, by coroutine name.
+    """
+
+    try:
+        tasks = asyncio.all_tasks(loop)
+    except AttributeError:
+        # Before Python 3.7
+        tasks = asyncio.Task.all_tasks(loop)
+
+    counts = {}
+    for task in tasks:
+        if task.done():
+            continue
+        coro = task.get_coro() if hasattr(task, 'get_coro') else task._coro
+        name = getattr(coro, '__qualname__', None) or str(coro)
+        counts[name] = counts.get(name, 0) + 1
+    return counts
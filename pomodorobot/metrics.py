@@ -0,0 +1,429 @@
+import math
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+
+import pomodorobot.core.logs as logs
+
+# The default histogram buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+
+class Metric:
+    """ The base of all metrics: a name, a description, and a value per
+        combination of label values.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, description: str, labels=()):
+        self.name = name
+        self.description = description
+        # The names of the labels each value is identified by.
+        self.labels = tuple(labels)
+
+        self._values = {}
+
+    def _key(self, labels: dict):
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def _format_labels(self, key, extra=None):
+        pairs = list(zip(self.labels, key))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(
+            name, value.replace('\\', '\\\\').replace('"', '\\"'))
+            for name, value in pairs) + '}'
+
+    def samples_by_key(self):
+        """ Gives the metric's values.
+
+        :return: A dictionary of the values, by label value tuple.
+        """
+
+        return dict(self._values)
+
+    def samples(self):
+        """ Gives the metric's samples.
+
+        :return: A list of (name suffix, label key, extra label, value).
+        """
+
+        return [('', key, None, value) for key, value in self._values.items()]
+
+    def expose(self) -> str:
+        """ Gives the metric in the text exposition format.
+
+        :return: The metric's text.
+        """
+
+        lines = ["# HELP {} {}".format(self.name, self.description),
+                 "# TYPE {} {}".format(self.name, self.kind)]
+        for suffix, key, extra, value in self.samples():
+            lines.append("{}{}{} {}".format(self.name, suffix,
+                                            self._format_labels(key, extra),
+                                            _format_value(value)))
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """ A value that only goes up.
+    """
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def total(self):
+        return sum(self._values.values())
+
+
+class Gauge(Metric):
+    """ A value that can go up and down, either set directly or read from a
+        function whenever it's asked for.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, description: str, labels=()):
+        super().__init__(name, description, labels)
+
+        # The function giving the values, if set. It returns a number, or a
+        # dictionary of numbers by label key when the gauge has labels.
+        self._function = None
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """ Makes the gauge read its values from a function.
+
+        :param function: A function taking no arguments, that returns the
+            value, or a dictionary of values by label value tuple.
+        """
+
+        self._function = function
+
+    def value(self, **labels):
+        if self._function is not None:
+            values = self._read()
+            return values.get(self._key(labels), 0)
+        return self._values.get(self._key(labels), 0)
+
+    def samples_by_key(self):
+        if self._function is None:
+            return super().samples_by_key()
+        return self._read()
+
+    def samples(self):
+        if self._function is None:
+            return super().samples()
+        return [('', key, None, value) for key, value in self._read().items()]
+
+    def _read(self):
+        try:
+            values = self._function()
+        except Exception:
+            logs.log("Could not read gauge {}.".format(self.name),
+                     level=logging.WARN)
+            return {}
+
+        if isinstance(values, dict):
+            return dict((key if isinstance(key, tuple) else (str(key),), v)
+                        for key, v in values.items())
+        return {(): values}
+
+
+class Histogram(Metric):
+    """ A distribution of observed values, counted in buckets.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, labels=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+
+        # The upper bounds of the buckets, in increasing order. A last bucket
+        # holds everything above them.
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = {
+                'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0,
+                'count': 0, 'max': 0.0}
+
+        entry['counts'][bisect_left(self.buckets, value)] += 1
+        entry['sum'] += value
+        entry['count'] += 1
+        entry['max'] = max(entry['max'], value)
+
+    def time(self, **labels):
+        """ Gives a context manager that observes the time spent within it.
+        """
+
+        return _Timing(self, labels)
+
+    def keys(self):
+        """ Gives the label value tuples that have been observed.
+        """
+
+        return list(self._values.keys())
+
+    def summary(self, key=()):
+        """ Sums up the values observed for a combination of labels.
+
+        :param key: The label values, in order.
+        :type key: tuple
+
+        :return: A dictionary with the count, mean, max, p50, p95 and p99 of
+            the values, or None if none were observed.
+        """
+
+        entry = self._values.get(tuple(key))
+        if entry is None or entry['count'] == 0:
+            return None
+
+        return {
+            'count': entry['count'],
+            'mean': entry['sum'] / entry['count'],
+            'max': entry['max'],
+            'p50': self._quantile(entry, 0.5),
+            'p95': self._quantile(entry, 0.95),
+            'p99': self._quantile(entry, 0.99)
+        }
+
+    def _quantile(self, entry, q: float):
+        """ Estimates a quantile from the buckets, assuming the values are
+            spread evenly within each one.
+        """
+
+        rank = q * entry['count']
+        seen = 0
+        for i, count in enumerate(entry['counts']):
+            if count == 0:
+                continue
+            if seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) \
+                    else entry['max']
+                return min(entry['max'],
+                           lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return entry['max']
+
+    def samples(self):
+        samples = []
+        for key, entry in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,),
+                                    entry['counts']):
+                cumulative += count
+                samples.append(('_bucket', key, ('le', _format_value(bound)),
+                                cumulative))
+            samples.append(('_sum', key, None, entry['sum']))
+            samples.append(('_count', key, None, entry['count']))
+        return samples
+
+
+class _Timing:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self._histogram = histogram
+        self._labels = labels
+        self._started = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self._histogram.observe(time.perf_counter() - self._started,
+                                **self._labels)
+
+
+class Registry:
+    """ Holds the metrics, by name.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _get(self, cls, name, description, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, description, **kwargs)
+        return metric
+
+    def counter(self, name: str, description: str, labels=()) -> Counter:
+        """ Gives the counter with the given name, creating it if needed.
+        """
+        return self._get(Counter, name, description, labels=labels)
+
+    def gauge(self, name: str, description: str, labels=()) -> Gauge:
+        """ Gives the gauge with the given name, creating it if needed.
+        """
+        return self._get(Gauge, name, description, labels=labels)
+
+    def histogram(self, name: str, description: str, labels=(),
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        """ Gives the histogram with the given name, creating it if needed.
+        """
+        return self._get(Histogram, name, description, labels=labels,
+                         buckets=buckets)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        """ Gives every metric in the text exposition format.
+
+        :return: The text.
+        """
+
+        return '\n'.join(metric.expose() for metric in
+                         self._metrics.values()) + '\n'
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return str(value)
+
+
+registry = Registry()
+
+# The metrics used across the bot.
+TICK_DRIFT = registry.histogram(
+    'pomodorobot_tick_drift_seconds',
+    "How late timer ticks happen, compared to when they were due.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+LOOP_LAG = registry.histogram(
+    'pomodorobot_loop_lag_seconds',
+    "How late the event loop runs a callback scheduled for a given time.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+LOOP_STALLS = registry.histogram(
+    'pomodorobot_loop_stall_seconds',
+    "How long the event loop stayed blocked, when blocked past the stall "
+    "limit.", buckets=(1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+DISCORD_LATENCY = registry.histogram(
+    'pomodorobot_discord_request_seconds',
+    "The time Discord API calls take, by route.", labels=('route',))
+DISCORD_ERRORS = registry.counter(
+    'pomodorobot_discord_errors_total',
+    "The Discord API calls that failed, by route and status.",
+    labels=('route', 'status'))
+RATE_LIMITED = registry.counter(
+    'pomodorobot_discord_rate_limited_total',
+    "The times Discord answered with a 429 (rate limited).")
+DB_COMMIT = registry.histogram(
+    'pomodorobot_db_commit_seconds', "The time database commits take.")
+COMMAND_LATENCY = registry.histogram(
+    'pomodorobot_command_seconds',
+    "The time commands take to be handled, by command.", labels=('command',))
+COMMAND_STAGES = registry.histogram(
+    'pomodorobot_command_stage_seconds',
+    "The time commands spend in each stage of being handled (checks, db, "
+    "send, handler).", labels=('command', 'stage'))
+BUS_LATENCY = registry.histogram(
+    'pomodorobot_bus_dispatch_seconds',
+    "The time the event bus' listeners take to handle an event, counted from "
+    "when it was published, by listener.", labels=('listener',))
+BUS_DROPPED = registry.counter(
+    'pomodorobot_bus_dropped_total',
+    "The events dropped because a listener's queue was full, by listener.",
+    labels=('listener',))
+QUEUE_DEPTH = registry.gauge(
+    'pomodorobot_queue_depth',
+    "The amount of items waiting in each queue.", labels=('queue',))
+ACTIVE_TIMERS = registry.gauge(
+    'pomodorobot_timers', "The amount of timers set up, by state.",
+    labels=('state',))
+SUBSCRIBERS = registry.gauge(
+    'pomodorobot_subscribers', "The amount of users subscribed to timers.")
+TASKS = registry.gauge(
+    'pomodorobot_background_tasks',
+    "The amount of background tasks running, queued and delayed, by group.",
+    labels=('group', 'state'))
+TASK_ERRORS = registry.counter(
+    'pomodorobot_background_task_errors_total',
+    "The background tasks that ended with an exception, by group and "
+    "exception type.", labels=('group', 'error'))
+TASKS_DROPPED = registry.counter(
+    'pomodorobot_background_tasks_dropped_total',
+    "The background tasks dropped because their group's queue was full, or "
+    "because the bot was shutting down, by group.", labels=('group',))
+
+
+class RateLimitCounter(logging.Handler):
+    """ Counts the rate limit warnings logged by discord.py's HTTP client.
+    """
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = record.getMessage()
+        except Exception:
+            return
+        if 'rate limited' in message:
+            RATE_LIMITED.inc()
+
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request = await asyncio.wait_for(reader.readline(), 5)
+        # Skip the headers
+        while True:
+            line = await asyncio.wait_for(reader.readline(), 5)
+            if line in (b'\r\n', b'\n', b''):
+                break
+
+        parts = request.decode('latin-1').split()
+        if len(parts) >= 2 and parts[0] == 'GET' and \
+                parts[1].split('?')[0] in ('/', '/metrics'):
+            status, body = "200 OK", registry.expose().encode('utf8')
+        else:
+            status, body = "404 Not Found", b"Not found\n"
+
+        writer.write("HTTP/1.1 {}\r\n"
+                     "Content-Type: text/plain; version=0.0.4; charset=utf-8"
+                     "\r\nContent-Length: {}\r\nConnection: close\r\n\r\n"
+                     .format(status, len(body)).encode('latin-1') + body)
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError, UnicodeDecodeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(host='127.0.0.1', port=9464):
+    """ Starts serving the metrics over HTTP, in the text exposition format.
+
+    :param host: The address to listen on.
+    :param port: The port to listen on.
+
+    :return: The server.
+    """
+
+    server = await asyncio.start_server(_serve, host, port)
+    logs.log("Serving metrics on http://{}:{}/metrics".format(host, port))
+    return server
@@ -0,0 +1,81 @@
+import io
+import os
+import sys
+import time
+import pstats
+import asyncio
+import cProfile
+
+import pomodorobot.core.logs as logs
+
+# Whether a capture is going on.
+_capturing = False
+
+
+class ProfilerBusy(Exception):
+    """ Raised when a capture is asked for while another one is going on.
+    """
+    pass
+
+
+def is_capturing() -> bool:
+    """ Tells whether a capture is going on.
+    """
+
+    return _capturing
+
+
+async def capture(seconds, directory='profiles', top=10):
+    """ Profiles everything running on the event loop for a while, writes the
+        stats to a pstats file (which can be read with `pstats`, snakeviz, or
+        turned into a call graph with gprof2dot) and sums up the hottest
+        functions. Only one capture can go on at a time.
+
+    :param seconds: The time to profile for, in seconds.
+    :param directory: The directory to write the file to.
+    :param top: The amount of functions to sum up.
+
+    :return: The path of the file written, and a list of (function, calls,
+        own time, cumulative time) tuples for the functions that took the most
+        time on their own, slowest first.
+
+    :raises: ProfilerBusy: If a capture is going on already, or another
+        profiler is active.
+    """
+
+    global _capturing
+    if _capturing or sys.getprofile() is not None:
+        raise ProfilerBusy()
+
+    _capturing = True
+    profiler = cProfile.Profile()
+    try:
+        logs.log("Profiling for {}s.".format(seconds))
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+    finally:
+        _capturing = False
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "profile-{}.pstats"
+                        .format(time.strftime('%Y%m%d-%H%M%S')))
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.dump_stats(path)
+    logs.log("Wrote the profile to {}.".format(path))
+
+    hottest = sorted(stats.stats.items(), key=lambda item: item[1][2],
+                     reverse=True)[:top]
+    return path, [(_describe(function), calls, own, cumulative)
+                  for function, (_, calls, own, cumulative, _) in hottest]
+
+
+def _describe(function) -> str:
+    filename, line, name = function
+    if filename == '~':
+        # Built-in functions
+        return name
+    return "{}:{}({})".format(os.path.basename(filename), line, name)
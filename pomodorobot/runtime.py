@@ -0,0 +1,197 @@
+import logging
+
+import discord
+
+import pomodorobot.lib as lib
+
+from pomodorobot.tasks import supervisor
+from pomodorobot.timer import Action, State
+
+
+class Driver:
+    """ Represents the task making a timer run. There's at most one per timer.
+    """
+
+    def __init__(self, channel: discord.Channel, start_idx: int, started):
+        # The channel of the timer being driven.
+        self.channel = channel
+        # The index of the period the timer starts from, if started while
+        # stopped.
+        self.start_idx = start_idx
+        # The date and time the driver started at.
+        self.started = started
+        # The amount of times the driver made the timer run: once, plus once
+        # per time it was asked to run again while stopping or pausing.
+        self.runs = 0
+
+
+class TimerRuntime:
+    """ Keeps track of the drivers making the timers run, making sure every
+        timer has exactly one while it runs. Starting, resuming, pausing and
+        stopping a timer only ask its driver to do so, making one if needed,
+        and return right away: the driver carries the request out on its next
+        iteration.
+    """
+
+    def __init__(self, bot):
+        # The bot the timers run on.
+        self.bot = bot
+
+        # The drivers, by channel ID.
+        self._drivers = {}
+
+    def __len__(self):
+        return len(self._drivers)
+
+    def drivers(self):
+        """ Gives the drivers currently running.
+
+        :return: The list of drivers.
+        """
+
+        return list(self._drivers.values())
+
+    def is_driven(self, channel: discord.Channel) -> bool:
+        """ Tells whether a channel's timer has a driver.
+
+        :param channel: The timer's channel.
+        :type channel: discord.Channel
+        """
+
+        return channel.id in self._drivers
+
+    def start(self, channel: discord.Channel, start_idx=0) -> bool:
+        """ Starts a channel's timer, unless it's running or about to.
+
+        :param channel: The timer's channel.
+        :type channel: discord.Channel
+
+        :param start_idx: The index of the period to start from, if the timer
+            is stopped.
+        :type start_idx: int
+
+        :return: True if the timer is going to start, False if it was running
+            or about to already, or there's no timer.
+        """
+
+        timer = self._timer(channel)
+        if timer is None:
+            return False
+
+        if timer.get_state() == State.RUNNING or timer.action == Action.RUN:
+            # Picks up a timer whose driver was lost, if any.
+            self._drive(channel, start_idx)
+            return False
+
+        timer.start()
+        self._drive(channel, start_idx)
+        return True
+
+    def resume(self, channel: discord.Channel) -> bool:
+        """ Resumes a channel's timer, if it's paused.
+
+        :param channel: The timer's channel.
+        :type channel: discord.Channel
+
+        :return: True if the timer is going to resume, False if it wasn't
+            paused, it's about to resume already, or there's no timer.
+        """
+
+        timer = self._timer(channel)
+        if timer is None or timer.action == Action.RUN or \
+                not timer.resume():
+            return False
+
+        self._drive(channel)
+        return True
+
+    def pause(self, channel: discord.Channel) -> bool:
+        """ Pauses a channel's timer, if it's running.
+
+        :param channel: The timer's channel.
+        :type channel: discord.Channel
+
+        :return: True if the timer is going to pause, False if it wasn't
+            running, or there's no timer.
+        """
+
+        timer = self._timer(channel)
+        if timer is None or not timer.pause():
+            return False
+
+        self._drive(channel)
+        return True
+
+    def stop(self, channel: discord.Channel) -> bool:
+        """ Stops a channel's timer. A running timer stops on its next
+            iteration, a paused one right away.
+
+        :param channel: The timer's channel.
+        :type channel: discord.Channel
+
+        :return: True if the timer is going to stop, False if it was stopped
+            right away, or wasn't running at all.
+        """
+
+        timer = self._timer(channel)
+        if timer is None or not timer.stop():
+            return False
+
+        self._drive(channel)
+        return True
+
+    def _timer(self, channel: discord.Channel):
+        interface = self.bot.get_interface(channel, False)
+        return None if interface is None else interface.timer
+
+    def _drive(self, channel: discord.Channel, start_idx=None):
+        driver = self._drivers.get(channel.id)
+        if driver is not None:
+            if start_idx is not None:
+                driver.start_idx = start_idx
+            return
+
+        driver = self._drivers[channel.id] = Driver(
+            channel, start_idx or 0, self.bot.clock.now())
+        if not supervisor.spawn('timers', self._run(driver),
+                                loop=self.bot.loop):
+            del self._drivers[channel.id]
+
+    async def _run(self, driver: Driver):
+        channel = driver.channel
+
+        try:
+            while True:
+                driver.runs += 1
+                await self.bot.run_timer(channel, driver.start_idx)
+
+                # Asked to run again while it was stopping or pausing.
+                timer = self._timer(channel)
+                if timer is None or timer.action != Action.RUN or \
+                        timer.get_state() == State.RUNNING:
+                    break
+
+        except discord.HTTPException as err:
+            lib.log("Connection interrupted, pausing the timer: {}"
+                    .format(err), channel_id=channel.id, level=logging.WARN)
+            self._interrupted(channel)
+            try:
+                await self.bot.safe_send(
+                    channel,
+                    "@here\nConnection interrupted, please resume! (1)")
+            except discord.HTTPException:
+                pass
+
+        finally:
+            if self._drivers.get(channel.id) is driver:
+                del self._drivers[channel.id]
+
+    def _interrupted(self, channel: discord.Channel):
+        timer = self._timer(channel)
+        if timer is None or timer.get_state() != State.RUNNING:
+            return
+
+        if self.bot.engine is not None:
+            self.bot.engine.unload(channel.id)
+        timer.action = Action.NONE
+        timer.set_state(State.PAUSED)
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+from collections import deque
+
+import pomodorobot.core.logs as logs
+import pomodorobot.metrics as metrics
+
+
+class TaskGroup:
+    """ Represents a named group of background tasks, of which only so many
+        run at once. The others wait in a queue, in order, and are dropped
+        once the queue is full.
+    """
+
+    def __init__(self, name: str, limit=None, max_queued=None):
+        # The group's name.
+        self.name = name
+        # The amount of tasks that can run at once, or None for no limit.
+        self.limit = limit
+        # The amount of tasks that can wait for their turn, or None for no
+        # limit. Tasks submitted past it are dropped.
+        self.max_queued = max_queued
+
+        # The tasks running.
+        self.running = set()
+        # The coroutines waiting for their turn.
+        self.queued = deque()
+        # The coroutines waiting for their delay to pass, along with the
+        # handle of the call that submits them, by an object identifying them.
+        self.delayed = {}
+
+    def has_room(self) -> bool:
+        """ Tells whether another task can start right away.
+        """
+
+        return self.limit is None or len(self.running) < self.limit
+
+    def is_full(self) -> bool:
+        """ Tells whether the queue can't take any more coroutines.
+        """
+
+        return self.max_queued is not None and \
+            len(self.queued) >= self.max_queued
+
+
+class TaskSupervisor:
+    """ Owns the bot's background work. Tasks are run in named groups, each
+        with its own limit of tasks running at once, and a queue for the
+        ones waiting. The exceptions tasks end with are logged and counted,
+        and every task can be cancelled at once when shutting down.
+    """
+
+    def __init__(self):
+        # The task groups, by name.
+        self.groups = {}
+        # Whether the supervisor is shutting down, and takes no more tasks.
+        self.closed = False
+
+        self._loop = None
+
+        metrics.TASKS.set_function(self._counts)
+
+    def configure(self, name: str, limit=None, max_queued=None):
+        """ Sets the limits of a task group, creating it if needed. Tasks
+            already running or queued are left alone.
+
+        :param name: The group's name.
+        :param limit: The amount of tasks that can run at once, or None for
+            no limit.
+        :param max_queued: The amount of tasks that can wait for their turn,
+            or None for no limit.
+
+        :return: The group.
+        :rtype: TaskGroup
+        """
+
+        group = self.groups.get(name)
+        if group is None:
+            group = self.groups[name] = TaskGroup(name, limit, max_queued)
+        else:
+            group.limit = limit
+            group.max_queued = max_queued
+            self._fill(group)
+        return group
+
+    def spawn(self, name: str, coro, delay=0, loop=None) -> bool:
+        """ Runs a coroutine in the background, as part of a task group. If
+            the group is running as many tasks as it can, the coroutine waits
+            for its turn, unless the group's queue is full, in which case it's
+            dropped.
+
+        :param name: The name of the group, created without limits if it
+            doesn't exist.
+        :param coro: The coroutine to run.
+        :param delay: The time, in seconds, to wait before submitting the
+            coroutine to the group. The wait doesn't take up the group's
+            room.
+        :param loop: The event loop to run it on. Defaults to the current
+            one.
+
+        :return: Whether the coroutine was run, queued or delayed, rather than
+            dropped.
+        """
+
+        if loop is not None:
+            self._loop = loop
+
+        group = self.groups.get(name)
+        if group is None:
+            group = self.configure(name)
+
+        if delay > 0 and not self.closed:
+            token = object()
+
+            def submit():
+                del group.delayed[token]
+                self._submit(group, coro)
+
+            handle = (self._loop or asyncio.get_event_loop()).call_later(
+                delay, submit)
+            group.delayed[token] = (handle, coro)
+            return True
+
+        return self._submit(group, coro)
+
+    def running(self, name: str) -> int:
+        """ Gives the amount of tasks of a group that are running.
+
+        :param name: The group's name.
+        """
+
+        group = self.groups.get(name)
+        return 0 if group is None else len(group.running)
+
+    async def shutdown(self, timeout=5):
+        """ Stops taking tasks, drops the queued and delayed ones, and cancels
+            the running ones, waiting a while for them to end.
+
+        :param timeout: The time, in seconds, to wait for the tasks to end.
+        """
+
+        self.closed = True
+
+        tasks = []
+        for group in self.groups.values():
+            for handle, coro in group.delayed.values():
+                handle.cancel()
+                coro.close()
+            metrics.TASKS_DROPPED.inc(len(group.delayed), group=group.name)
+            group.delayed.clear()
+
+            while group.queued:
+                group.queued.popleft().close()
+                metrics.TASKS_DROPPED.inc(group=group.name)
+
+            for task in group.running:
+                task.cancel()
+                tasks.append(task)
+
+        if not tasks:
+            return
+
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logs.log("{} background tasks didn't end in time."
+                     .format(len(pending)), level=logging.WARN)
+
+    def _submit(self, group: TaskGroup, coro) -> bool:
+        if self.closed or (not group.has_room() and group.is_full()):
+            coro.close()
+            metrics.TASKS_DROPPED.inc(group=group.name)
+            logs.log(lambda: "Dropped a background task of group '{}'{}."
+                     .format(group.name,
+                             " (shutting down)" if self.closed else ""),
+                     level=logging.DEBUG)
+            return False
+
+        if group.has_room():
+            self._start(group, coro)
+        else:
+            group.queued.append(coro)
+        return True
+
+    def _start(self, group: TaskGroup, coro):
+        task = asyncio.ensure_future(coro, loop=self._loop)
+        group.running.add(task)
+        task.add_done_callback(
+            lambda finished: self._finished(group, finished))
+
+    def _finished(self, group: TaskGroup, task: asyncio.Task):
+        group.running.discard(task)
+
+        if not task.cancelled() and task.exception() is not None:
+            error = task.exception()
+            metrics.TASK_ERRORS.inc(group=group.name,
+                                    error=type(error).__name__)
+            logs.log("A background task of group '{}' failed: {}"
+                     .format(group.name, error), level=logging.ERROR)
+            logs.log_exception(error)
+
+        if not self.closed:
+            self._fill(group)
+
+    def _fill(self, group: TaskGroup):
+        while group.queued and group.has_room():
+            self._start(group, group.queued.popleft())
+
+    def _counts(self):
+        counts = {}
+        for name, group in self.groups.items():
+            counts[(name, 'running')] = len(group.running)
+            counts[(name, 'queued')] = len(group.queued)
+            counts[(name, 'delayed')] = len(group.delayed)
+        return counts
+
+
+supervisor = TaskSupervisor()
@@ -0,0 +1,243 @@
+import time
+import asyncio
+import logging
+import weakref
+from functools import wraps
+
+import pomodorobot.core.logs as logs
+import pomodorobot.metrics as metrics
+
+# The amount of spans kept per trace for the slow command log. Later spans
+# are only added to the totals, so long-running commands don't pile them up.
+MAX_SPANS = 50
+
+
+class Trace:
+    """ Represents a command being handled, and the time spent in each stage
+        of handling it: running checks, accessing the database, and sending
+        requests to Discord. Whatever is left is the handler's own time.
+    """
+
+    def __init__(self):
+        # The qualified name of the command, once it's known.
+        self.command = None
+        # The time (as given by `time.perf_counter`) the trace started at.
+        self.started = time.perf_counter()
+        # The first spans recorded, in order, as (stage, name, duration)
+        # tuples, and the time spent in each stage, by stage.
+        self.spans = []
+        self.stages = {}
+
+        # The stages with a span currently open. Spans within a span of the
+        # same stage are not recorded, so time isn't counted twice.
+        self._open = set()
+
+    def add(self, stage: str, name, duration):
+        """ Records time spent in a stage.
+
+        :param stage: The stage the time was spent in.
+        :param name: What the time was spent on.
+        :param duration: The time spent, in seconds.
+        """
+
+        self.stages[stage] = self.stages.get(stage, 0) + duration
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append((stage, name, duration))
+
+    def totals(self):
+        """ Sums up the time spent in each stage.
+
+        :return: A dictionary of times, in seconds, by stage. The 'handler'
+            stage holds the time spent outside of the others.
+        """
+
+        totals = dict(self.stages)
+        totals['handler'] = max(0.0, time.perf_counter() - self.started -
+                                sum(totals.values()))
+        return totals
+
+
+class Tracer:
+    """ Traces the commands, keeping one trace per task handling a message,
+        and aggregates the traces per command once they're done. Commands
+        slower than a threshold get their breakdown logged, at most once in a
+        while per command.
+    """
+
+    def __init__(self):
+        # The time, in seconds, from which a command is considered slow
+        # (value is configurable).
+        self.slow_threshold = 2.0
+        # The minimum time, in seconds, between two logs of slow runs of the
+        # same command (value is configurable).
+        self.slow_log_interval = 60
+
+        self._traces = weakref.WeakKeyDictionary()
+        # When a slow run of each command was last logged, and the slow runs
+        # left out since.
+        self._slow_logged = {}
+        self._slow_skipped = {}
+
+    def trace(self):
+        """ Gives a context manager tracing what happens within it, unless
+            there's a trace going on for the current task already.
+        """
+
+        return _Tracing(self)
+
+    def current(self):
+        """ Gives the trace of the current task.
+
+        :return: The trace, or None if there's none.
+        """
+
+        task = _current_task()
+        return None if task is None else self._traces.get(task)
+
+    def name(self, command: str):
+        """ Names the command the current trace is for.
+
+        :param command: The command's qualified name.
+        """
+
+        trace = self.current()
+        if trace is not None:
+            trace.command = command
+
+    def span(self, stage: str, name=None):
+        """ Gives a context manager recording the time spent within it in the
+            current trace, if there's one.
+
+        :param stage: The stage the time is spent in ('checks', 'db' or
+            'send').
+        :param name: What the time is spent on.
+        """
+
+        return _Span(self.current(), stage, name)
+
+    def record(self, stage: str, name, duration):
+        """ Records time spent in a stage in the current trace, if there's one
+            and no span of that stage is open.
+
+        :param stage: The stage the time was spent in.
+        :param name: What the time was spent on.
+        :param duration: The time spent, in seconds.
+        """
+
+        trace = self.current()
+        if trace is not None and stage not in trace._open:
+            trace.add(stage, name, duration)
+
+    def finish(self, trace: Trace):
+        """ Aggregates a finished trace, and logs it if it was slow.
+
+        :param trace: The trace.
+        :type trace: Trace
+        """
+
+        if trace.command is None:
+            return
+
+        total = time.perf_counter() - trace.started
+        totals = trace.totals()
+        metrics.COMMAND_LATENCY.observe(total, command=trace.command)
+        for stage, duration in totals.items():
+            metrics.COMMAND_STAGES.observe(duration, command=trace.command,
+                                           stage=stage)
+
+        if total < self.slow_threshold:
+            return
+
+        now = time.monotonic()
+        last = self._slow_logged.get(trace.command)
+        if last is not None and now - last < self.slow_log_interval:
+            self._slow_skipped[trace.command] = \
+                self._slow_skipped.get(trace.command, 0) + 1
+            return
+
+        skipped = self._slow_skipped.pop(trace.command, 0)
+        self._slow_logged[trace.command] = now
+
+        logs.log("Slow command '{}': {:.0f}ms ({}){}.\n{}".format(
+            trace.command, total * 1000,
+            ", ".join("{} {:.0f}ms".format(stage, duration * 1000)
+                      for stage, duration in totals.items()),
+            "" if skipped == 0 else
+            ", {} more slow runs since the last one logged".format(skipped),
+            "\n".join("  {:>7} {:>8.1f}ms  {}".format(stage, duration * 1000,
+                                                      name or "")
+                      for stage, name, duration in trace.spans)),
+            level=logging.WARN)
+
+    def check(self, predicate):
+        """ Decorates a command check so the time it takes is recorded.
+
+        :param predicate: The check.
+
+        :return: The decorated check.
+        """
+
+        @wraps(predicate)
+        def traced(ctx):
+            with self.span('checks', predicate.__name__):
+                return predicate(ctx)
+
+        return traced
+
+
+class _Tracing:
+    def __init__(self, tracer: Tracer):
+        self._tracer = tracer
+        self._task = None
+        self._trace = None
+
+    def __enter__(self):
+        task = _current_task()
+        if task is not None and task not in self._tracer._traces:
+            self._task = task
+            self._trace = self._tracer._traces[task] = Trace()
+        return self._tracer.current()
+
+    def __exit__(self, *_):
+        if self._trace is not None:
+            del self._tracer._traces[self._task]
+            self._tracer.finish(self._trace)
+
+
+class _Span:
+    def __init__(self, trace: Trace, stage: str, name):
+        self._trace = trace
+        self._stage = stage
+        self._name = name
+        self._started = None
+
+    def __enter__(self):
+        if self._trace is None or self._stage in self._trace._open:
+            self._trace = None
+            return self
+
+        self._trace._open.add(self._stage)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        if self._trace is None:
+            return
+
+        self._trace._open.discard(self._stage)
+        self._trace.add(self._stage, self._name,
+                        time.perf_counter() - self._started)
+
+
+def _current_task():
+    try:
+        return asyncio.current_task()
+    except AttributeError:
+        # Before Python 3.7
+        return asyncio.Task.current_task()
+    except RuntimeError:
+        # No loop running
+        return None
+
+
+tracer = Tracer()
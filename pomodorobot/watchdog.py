@@ -0,0 +1,142 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+
+import pomodorobot.core.logs as logs
+import pomodorobot.metrics as metrics
+
+
+class Watchdog:
+    """ Keeps an eye on the event loop. A heartbeat running on the loop
+        measures how late it wakes up, and warns when it's late past a
+        threshold. A thread on the side watches the heartbeat: when the loop
+        stays blocked past the stall limit, it captures the stack the loop
+        is blocked in and logs it, while the loop still is.
+    """
+
+    def __init__(self):
+        # The time, in seconds, between two heartbeats (value is
+        # configurable).
+        self.interval = 0.5
+        # The lag, in seconds, past which a warning is logged (value is
+        # configurable).
+        self.warn_threshold = 0.25
+        # The time, in seconds, the loop has to stay blocked for to be
+        # considered stalled, and have its stack captured (value is
+        # configurable).
+        self.stall_threshold = 2.0
+        # The minimum time, in seconds, between two lag warnings (value is
+        # configurable).
+        self.warn_log_interval = 60
+
+        # The date and time (as given by `time.time`) and duration, in
+        # seconds, of the last stall, if any.
+        self.last_stall = None
+
+        # The time (as given by `time.monotonic`) of the last heartbeat.
+        self._beat = None
+        # The identifier of the thread running the loop.
+        self._loop_thread = None
+        # The stack captured during the current stall, if any.
+        self._stall_stack = None
+
+        self._heartbeat = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+        # When a lag warning was last logged, and the warnings left out
+        # since.
+        self._warned = None
+        self._warn_skipped = 0
+
+    def start(self, loop=None):
+        """ Starts the heartbeat and the watching thread, unless they were
+            started already. Must be called from the loop's thread.
+
+        :param loop: The event loop to watch. Defaults to the current one.
+        """
+
+        if self._heartbeat is not None:
+            return
+
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+
+        self._heartbeat = asyncio.ensure_future(self._run(), loop=loop)
+        self._thread = threading.Thread(target=self._watch,
+                                        name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stops the heartbeat and the watching thread.
+        """
+
+        if self._heartbeat is None:
+            return
+
+        self._heartbeat.cancel()
+        self._heartbeat = None
+        self._stopped.set()
+        self._thread = None
+
+    async def _run(self):
+        while True:
+            self._beat = started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+
+            lag = max(0.0, self._beat - started - self.interval)
+            metrics.LOOP_LAG.observe(lag)
+
+            if lag >= self.stall_threshold:
+                self._stalled(lag)
+            elif lag >= self.warn_threshold:
+                self._lagged(lag)
+
+    def _stalled(self, duration):
+        metrics.LOOP_STALLS.observe(duration)
+        self.last_stall = (time.time(), duration)
+
+        stack, self._stall_stack = self._stall_stack, None
+        logs.log("The event loop was blocked for {:.2f}s.{}".format(
+            duration, "" if stack is not None else
+            " It wasn't caught in the act, so no stack was captured."),
+            level=logging.WARN, event='loop_stall')
+
+    def _lagged(self, lag):
+        now = time.monotonic()
+        if self._warned is not None and \
+                now - self._warned < self.warn_log_interval:
+            self._warn_skipped += 1
+            return
+
+        skipped, self._warn_skipped = self._warn_skipped, 0
+        self._warned = now
+        logs.log("The event loop is lagging: {:.0f}ms late{}.".format(
+            lag * 1000, "" if skipped == 0 else
+            ", {} more lags since the last one logged".format(skipped)),
+            level=logging.WARN, event='loop_lag')
+
+    def _watch(self):
+        while not self._stopped.wait(min(self.stall_threshold / 4, 0.25)):
+            blocked = time.monotonic() - self._beat - self.interval
+            if blocked < self.stall_threshold or \
+                    self._stall_stack is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+
+            self._stall_stack = ''.join(
+                traceback.format_stack(frame)).rstrip()
+            logs.log("The event loop has been blocked for {:.2f}s, in:\n{}"
+                     .format(blocked, self._stall_stack),
+                     level=logging.WARN, event='loop_stall')
+
+
+watchdog = Watchdog()
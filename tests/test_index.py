@@ -0,0 +1,98 @@
+from pomodorobot.core.index import TimerIndex
+from pomodorobot.core.timer import State, TimerStateEvent
+
+
+class _Timer:
+    """ Stands in for a timer, with only what the index looks at.
+    """
+
+    def __init__(self, channel_id, server_id):
+        self.channel_id = channel_id
+        self.server_id = server_id
+
+    def get_channel_id(self):
+        return self.channel_id
+
+    def get_server_id(self):
+        return self.server_id
+
+
+def _set_up(index, timer):
+    index.update(TimerStateEvent(timer, None, State.STOPPED))
+
+
+def _reset(index, timer, state=State.STOPPED):
+    index.update(TimerStateEvent(timer, state, None))
+
+
+def _channels(timers):
+    return [timer.channel_id for timer in timers]
+
+
+def test_set_up_order():
+    index = TimerIndex()
+    for channel_id, server_id in (('a', 's1'), ('b', 's2'), ('c', 's1')):
+        _set_up(index, _Timer(channel_id, server_id))
+
+    assert _channels(index.page()) == ['a', 'b', 'c']
+    assert _channels(index.page('s1')) == ['a', 'c']
+    assert index.count_in('s2') == 1
+
+
+def test_state_changes_keep_the_order():
+    index = TimerIndex()
+    a, b = _Timer('a', 's1'), _Timer('b', 's1')
+    _set_up(index, a)
+    _set_up(index, b)
+
+    index.update(TimerStateEvent(a, State.STOPPED, State.RUNNING))
+    index.update(TimerStateEvent(a, State.RUNNING, State.PAUSED))
+
+    assert _channels(index.page('s1')) == ['a', 'b']
+    assert index.count(State.PAUSED) == 1
+    assert index.count(State.STOPPED) == 1
+
+
+def test_reset_removes_the_timer():
+    index = TimerIndex()
+    a, b, c = _Timer('a', 's1'), _Timer('b', 's1'), _Timer('c', 's2')
+    for timer in (a, b, c):
+        _set_up(index, timer)
+
+    index.update(TimerStateEvent(b, State.STOPPED, State.RUNNING))
+    _reset(index, b, State.RUNNING)
+
+    assert _channels(index.page()) == ['a', 'c']
+    assert _channels(index.page('s1')) == ['a']
+    assert index.count(State.RUNNING) == 0
+    assert index.find('b') is None
+    assert len(index) == 2
+
+    # A server left without timers is dropped.
+    _reset(index, c)
+    assert index.count_in('s2') == 0
+    assert 's2' not in index._order
+
+
+def test_set_up_again_after_reset():
+    index = TimerIndex()
+    a, b, c = _Timer('a', 's1'), _Timer('b', 's1'), _Timer('c', 's1')
+    for timer in (a, b, c):
+        _set_up(index, timer)
+
+    _reset(index, a)
+    _set_up(index, a)
+
+    # Set up again, the timer goes after the others.
+    assert _channels(index.page('s1')) == ['b', 'c', 'a']
+    assert _channels(index.page('s1', start=1, size=1)) == ['c']
+
+
+def test_repeated_set_up_is_indexed_once():
+    index = TimerIndex()
+    a = _Timer('a', 's1')
+    _set_up(index, a)
+    _set_up(index, a)
+
+    assert _channels(index.page()) == ['a']
+    assert index.count_in('s1') == 1
@@ -0,0 +1,64 @@
+import pomodorobot.journal as journal
+
+from pomodorobot.journal import RECORD, Journal, _used_records
+
+
+def _segment(used, total):
+    """ Builds the contents of a segment of `total` records, of which the
+        first `used` are written.
+    """
+
+    data = bytearray(total * RECORD.size)
+    for i in range(used):
+        RECORD.pack_into(data, i * RECORD.size, 1000.0 + i,
+                         journal.KIND_STATE, 0, 1, 42, 0)
+    return data
+
+
+def test_used_records():
+    for total in (1, 2, 7, 64):
+        for used in range(total + 1):
+            assert _used_records(_segment(used, total)) == used
+
+
+def test_used_records_empty():
+    assert _used_records(bytearray()) == 0
+
+
+def test_reopen_appends_after_the_last_record(tmp_path):
+    directory = str(tmp_path)
+
+    written = Journal(directory, segment_records=8, batch_size=1)
+    written.open()
+    for i in range(5):
+        written.append(journal.KIND_SUB, channel_id=42, user_id=i,
+                       timestamp=1000.0 + i)
+    written.close()
+
+    reopened = Journal(directory, segment_records=8, batch_size=1)
+    reopened.open()
+    reopened.append(journal.KIND_UNSUB, channel_id=42, user_id=5,
+                    timestamp=1005.0)
+    reopened.close()
+
+    records = list(journal.read(directory))
+    assert [record.user_id for record in records] == list(range(6))
+    assert records[-1].kind == journal.KIND_UNSUB
+
+
+def test_full_segments_move_on(tmp_path):
+    directory = str(tmp_path)
+
+    written = Journal(directory, segment_records=4, batch_size=1)
+    written.open()
+    for i in range(10):
+        written.append(journal.KIND_SUB, channel_id=42, user_id=i,
+                       timestamp=1000.0 + i)
+    written.close()
+
+    assert len(journal.segments(directory)) == 3
+    assert [record.user_id for record in journal.read(directory)] == \
+        list(range(10))
+    assert [record.user_id
+            for record in journal.read(directory, since=1007.0)] == \
+        [7, 8, 9]
@@ -0,0 +1,60 @@
+from pomodorobot.core.schedule import ScheduleIndex
+
+
+def _index(*durations):
+    index = ScheduleIndex()
+    index.rebuild_durations(durations)
+    return index
+
+
+def test_locate_skips_zero_length_periods():
+    index = _index(1500, 0, 300)
+
+    assert index.locate(0) == (0, 0)
+    assert index.locate(1499) == (0, 1499)
+    # The empty period starts and ends at the same second, so the timer is
+    # never in it.
+    assert index.locate(1500) == (2, 0)
+    assert index.locate(1799) == (2, 299)
+
+
+def test_locate_empty_schedules():
+    assert _index().locate(0) is None
+    assert _index(0, 0).locate(0, repeat=True) is None
+    assert _index(60).locate(-1) is None
+
+
+def test_locate_past_the_end():
+    index = _index(1500, 0, 300)
+
+    assert index.locate(1800) is None
+    assert index.locate(1800, repeat=True) == (0, 0)
+    # Several loops through the schedule.
+    assert index.locate(2 * 1800 + 1510, repeat=True) == (2, 10)
+
+
+def test_time_until_ahead():
+    index = _index(1500, 300, 900)
+
+    assert index.time_until(1, 0) == 1500
+    assert index.time_until(2, 0, offset=100) == 1700
+    assert index.time_until(1, 1) == 0
+
+
+def test_time_until_across_loops():
+    index = _index(1500, 300, 900)
+
+    assert index.time_until(0, 2, offset=100) is None
+    assert index.time_until(0, 2, offset=100, repeat=True) == 800
+    assert index.time_until(1, 2, offset=899, repeat=True) == 1501
+    # Reaching the current period again takes a whole loop, minus the time
+    # spent in it.
+    assert index.time_until(1, 1, offset=10, repeat=True) == 2690
+
+
+def test_time_until_zero_length_periods():
+    index = _index(1500, 0, 300)
+
+    assert index.time_until(1, 0) == 1500
+    assert index.time_until(2, 0) == 1500
+    assert index.time_until(1, 2, offset=10, repeat=True) == 1790
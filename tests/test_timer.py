@@ -0,0 +1,123 @@
+import asyncio
+
+from pomodorobot.core.clock import SimulatedClock
+from pomodorobot.core.timer import Timer, State
+
+
+def _derived(periods="A:1,B:2", repeat=True):
+    clock = SimulatedClock()
+    timer = Timer(derived=True, clock=clock)
+    timer.setup(periods, repeat, True)
+    timer.set_state(State.RUNNING)
+    timer.set_period(0)
+    return timer, clock
+
+
+def _next_period(timer):
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(timer.next_period_async())
+    finally:
+        loop.close()
+
+
+def test_period_is_derived():
+    timer, clock = _derived()
+
+    clock.advance(90)
+    assert timer.get_period() == 1
+    assert 30 <= timer.curr_time < 31
+    assert "On B period" in timer.time()
+    # The loop hasn't announced the change yet.
+    assert timer.announced_period() == 0
+    assert timer.period_over()
+
+
+def test_announcing_keeps_the_time():
+    timer, clock = _derived()
+
+    clock.advance(90)
+    _next_period(timer)
+
+    assert timer.announced_period() == 1
+    assert timer.get_period() == 1
+    assert 30 <= timer.curr_time < 31
+    assert not timer.period_over()
+
+
+def test_loops_through_the_schedule():
+    timer, clock = _derived("A:1")
+
+    clock.advance(61)
+    assert timer.get_period() == 0
+    assert timer.period_over()
+
+    _next_period(timer)
+    assert not timer.period_over()
+
+
+def test_runs_out_of_periods():
+    timer, clock = _derived(repeat=False)
+
+    clock.advance(600)
+    assert timer.get_period() == 1
+    assert timer.curr_time == 120
+
+
+def test_pauses_hold_the_time():
+    timer, clock = _derived()
+
+    clock.advance(30)
+    timer.set_state(State.PAUSED)
+    clock.advance(600)
+    assert timer.get_period() == 0
+    assert 30 <= timer.curr_time < 31
+
+    timer.set_state(State.RUNNING)
+    clock.advance(40)
+    assert timer.get_period() == 1
+
+
+def test_goto_and_setting_the_time():
+    timer, clock = _derived()
+
+    clock.advance(30)
+    timer.goto(2)
+    assert timer.get_period() == 1
+    assert timer.announced_period() == 1
+    assert timer.curr_time < 1
+
+    timer.curr_time = 100
+    assert timer.get_period() == 1
+    assert 100 <= timer.curr_time < 101
+    assert not timer.period_over()
+    assert timer.time_until(0) is not None
+
+
+def test_changing_periods_keeps_the_position():
+    timer, clock = _derived("A:1,B:2,C:3")
+
+    clock.advance(90)
+    _next_period(timer)
+
+    timer.add_periods(0, "D:5")
+    assert timer.get_period() == 2
+    assert timer.announced_period() == 2
+    assert 30 <= timer.curr_time < 31
+
+    timer.remove_periods(0, 1)
+    assert timer.get_period() == 1
+    assert 30 <= timer.curr_time < 31
+    assert not timer.period_over()
+
+
+def test_stopping_resets():
+    timer, clock = _derived()
+
+    clock.advance(90)
+    timer.set_state(State.PAUSED)
+    timer.stop()
+
+    assert timer.get_state() == State.STOPPED
+    assert timer.get_period() == -1
+    assert timer.curr_time == 0